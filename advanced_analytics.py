@@ -3,34 +3,141 @@ Advanced Analytics Engine for Smart Data Analyzer
 Includes customer segmentation, forecasting, data health, and growth metrics
 """
 
+import importlib.util
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
 import warnings
+from date_parser import parse_dates
+from sales_dataset import SalesDataset
+from data_profile import profile_frame
+from holt_winters import holt_winters
+from growth_analytics import fit_trends, trend_intervals
+import chart_spec as charts
 warnings.filterwarnings('ignore')
 
-try:
-    from prophet import Prophet
-    PROPHET_AVAILABLE = True
-except ImportError:
-    PROPHET_AVAILABLE = False
 
-try:
-    import statsmodels.api as sm
-    from statsmodels.tsa.seasonal import seasonal_decompose
-    STATSMODELS_AVAILABLE = True
-except ImportError:
-    STATSMODELS_AVAILABLE = False
+def module_available(name):
+    """Whether an optional dependency is installed, without paying for its import"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+# Forecasting backends are imported by the forecast that uses them
+PROPHET_AVAILABLE = module_available('prophet')
+STATSMODELS_AVAILABLE = module_available('statsmodels')
+
+SEGMENT_COLORS = {'High Value': '#28a745', 'Occasional': '#ffc107', 'One-Time': '#dc3545'}
+# Above this many customers segmentation fits on a sample instead of every customer
+SEGMENTATION_EXACT_LIMIT = 50_000
+SEGMENTATION_SAMPLE_SIZE = 20_000
+
+
+def stratified_sample(values: np.ndarray, size: int, strata: int = 10, random_state: int = 42) -> np.ndarray:
+    """
+    Positions of an equal-size random sample from each quantile band of values,
+    so every band (including the tail) is represented in proportion
+    """
+    rng = np.random.default_rng(random_state)
+    bands = np.array_split(np.argsort(values, kind='stable'), strata)
+    per_band = max(size // strata, 1)
+    picks = [rng.choice(band, min(per_band, len(band)), replace=False) for band in bands if len(band)]
+    return np.sort(np.concatenate(picks))
+
+
+def cluster_customers(features: np.ndarray, n_clusters: int = 3, exact_limit: int = SEGMENTATION_EXACT_LIMIT,
+                      sample_size: int = SEGMENTATION_SAMPLE_SIZE, batch_size: int = 100_000,
+                      random_state: int = 42):
+    """
+    K-means cluster of each row of standardized customer features.
+    Up to exact_limit rows every row is fitted. Above it, KMeans is fitted on
+    a sample stratified by the first feature (total revenue) and all rows are
+    assigned to their nearest centroid in vectorized batches.
+    Returns (labels, mode) with mode 'exact' or 'sampled'.
+    """
+    from sklearn.cluster import KMeans
+
+    kmeans = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
+    if len(features) <= exact_limit:
+        return kmeans.fit_predict(features), 'exact'
+
+    centers = kmeans.fit(features[stratified_sample(features[:, 0], sample_size, random_state=random_state)]).cluster_centers_
+    labels = np.empty(len(features), dtype=np.int32)
+    for start in range(0, len(features), batch_size):
+        batch = features[start:start + batch_size]
+        distances = ((batch[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels[start:start + batch_size] = distances.argmin(axis=1)
+    return labels, 'sampled'
+
+
+def forecast_chart(history_dates, history, future_dates, forecast, lower=None, upper=None,
+                   title='30-Day Sales Forecast'):
+    """Historical sales, the forecast and, when given, its confidence band"""
+    traces = [
+        charts.scatter(history_dates, history, mode='lines+markers', name='Historical Sales',
+                       line={'color': '#007bff'}),
+        charts.scatter(future_dates, forecast, mode='lines', name='Forecast',
+                       line={'color': '#28a745', 'dash': 'dash'}),
+    ]
+    if lower is not None and upper is not None:
+        # Confidence interval: the lower bound fills up to the upper one
+        traces.append(charts.scatter(future_dates, upper, mode='lines', line={'color': 'rgba(0,0,0,0)'},
+                                     showlegend=False))
+        traces.append(charts.scatter(future_dates, lower, fill='tonexty', mode='lines',
+                                     line={'color': 'rgba(0,0,0,0)'}, name='Confidence Interval',
+                                     fillcolor='rgba(40, 167, 69, 0.2)'))
+    return charts.chart(traces, charts.layout(title=title, xaxis_title='Date', yaxis_title='Revenue ($)'))
+
+
+def prophet_parameters(model):
+    """Fitted Prophet parameters in the form Prophet.fit(init=...) takes to warm-start a refit"""
+    parameters = {name: model.params[name][0][0] for name in ['k', 'm', 'sigma_obs']}
+    parameters.update({name: model.params[name][0] for name in ['delta', 'beta']})
+    return parameters
+
 
 class AdvancedAnalytics:
-    def __init__(self, df):
+    def __init__(self, df, segmentation_exact_limit=SEGMENTATION_EXACT_LIMIT,
+                 segmentation_sample_size=SEGMENTATION_SAMPLE_SIZE, model_cache=None, backtest=None):
+        self.segmentation_exact_limit = segmentation_exact_limit
+        self.segmentation_sample_size = segmentation_sample_size
+        # Optional ForecastModelCache reused across requests
+        self.model_cache = model_cache
+        # Forecast backtest scores of the dataset (see backtest.run_backtest), when computed
+        self.backtest = backtest
+        self.dataset = df if isinstance(df, SalesDataset) else None
+        self.customer_column = 'customer'
+        self.cube = None
+        if self.dataset is not None:
+            self.df = self.dataset.base
+            self.processed_df = None
+            self._use_dataset()
+            return
         self.df = df.copy() if df is not None and not df.empty else pd.DataFrame()
         self.processed_df = None
         self._prepare_data()
+
+    def _use_dataset(self):
+        """Work directly on a canonical dataset without copying or re-parsing"""
+        if self.df.empty:
+            print("AdvancedAnalytics: No data provided - will use fallback")
+            return
+        frame = self.dataset.frame
+        if 'date' in frame.columns and frame['date'].hasnans:
+            frame = frame[frame['date'].notna()]
+        self.processed_df = frame
+        # None means synthetic customers, derived from row position when grouping
+        self.customer_column = self.dataset.customer_column
+        self.cube = self.dataset.cube
+        print(f"AdvancedAnalytics: Using canonical dataset with {len(frame)} rows")
+
+    def _customer_keys(self):
+        """Grouping key for customers, named 'customer'"""
+        if self.customer_column is not None:
+            return self.processed_df[self.customer_column].rename('customer')
+        # Same grouping as the synthetic 'Customer_<n>' ids, kept as integers
+        return pd.Series(self.processed_df.index // 3, index=self.processed_df.index, name='customer')
     
     def _prepare_data(self):
         """Prepare and standardize data for advanced analytics"""
@@ -67,18 +174,9 @@ class AdvancedAnalytics:
             
             # Parse dates with flexible format handling
             if 'date' in self.processed_df.columns:
-                try:
-                    # Handle multiple date formats including YYYY/MM/DD and YYYY-MM-DD
-                    self.processed_df['date'] = pd.to_datetime(self.processed_df['date'], format='mixed', dayfirst=False)
-                    print(f"AdvancedAnalytics: Date column processed successfully")
-                except Exception as e:
-                    print(f"AdvancedAnalytics: Date processing error: {e}")
-                    try:
-                        self.processed_df['date'] = pd.to_datetime(self.processed_df['date'], infer_datetime_format=True)
-                        print(f"AdvancedAnalytics: Date column processed with infer format")
-                    except Exception as e2:
-                        print(f"AdvancedAnalytics: Date parsing failed completely: {e2}")
-                        self.processed_df['date'] = pd.to_datetime(self.processed_df['date'], errors='coerce')
+                # Handle multiple date formats including YYYY/MM/DD and YYYY-MM-DD
+                self.processed_df['date'] = parse_dates(self.processed_df['date'])
+                print(f"AdvancedAnalytics: Date column processed successfully")
                 
                 self.processed_df = self.processed_df.dropna(subset=['date'])
                 self.processed_df['day_of_week'] = self.processed_df['date'].dt.day_name()
@@ -107,14 +205,22 @@ class AdvancedAnalytics:
             if 'revenue' not in self.processed_df.columns:
                 raise ValueError("Customer segmentation requires revenue data from your uploaded file")
             
-            customer_features = self.processed_df.groupby('customer').agg({
-                'revenue': ['sum', 'mean', 'count'],
-                'quantity': 'sum',
-                'date': ['min', 'max']
-            }).reset_index()
-            
-            # Flatten column names
-            customer_features.columns = ['customer', 'total_revenue', 'avg_revenue', 'frequency', 'total_quantity', 'first_purchase', 'last_purchase']
+            if self.cube is not None:
+                # Per-customer RFM stats pre-aggregated at upload
+                customer_features = self.cube.customer_features()
+            else:
+                customer_features = self.processed_df.groupby(self._customer_keys()).agg({
+                    'revenue': ['sum', 'mean', 'count'],
+                    'quantity': 'sum',
+                    'date': ['min', 'max']
+                }).reset_index()
+                
+                # Flatten column names
+                customer_features.columns = ['customer', 'total_revenue', 'avg_revenue', 'frequency', 'total_quantity', 'first_purchase', 'last_purchase']
+                if self.customer_column is None:
+                    # Name synthetic customers once per customer instead of once per row
+                    customer_features['customer'] = 'Customer_' + (customer_features['customer'] + 1).astype(str)
+                    customer_features = customer_features.sort_values('customer', ignore_index=True)
             
             # Calculate recency
             if 'first_purchase' in customer_features.columns:
@@ -126,13 +232,15 @@ class AdvancedAnalytics:
             features = ['total_revenue', 'avg_revenue', 'frequency', 'recency']
             X = customer_features[features].fillna(0)
             
+            from sklearn.preprocessing import StandardScaler
+            
             # Standardize features
             scaler = StandardScaler()
             X_scaled = scaler.fit_transform(X)
             
-            # Perform K-means clustering
-            kmeans = KMeans(n_clusters=3, random_state=42, n_init=10)
-            customer_features['segment'] = kmeans.fit_predict(X_scaled)
+            # Perform K-means clustering, on a sample for large customer bases
+            customer_features['segment'], mode = cluster_customers(
+                X_scaled, exact_limit=self.segmentation_exact_limit, sample_size=self.segmentation_sample_size)
             
             # Map segments to meaningful labels
             segment_labels = {0: 'High Value', 1: 'Occasional', 2: 'One-Time'}
@@ -161,21 +269,13 @@ class AdvancedAnalytics:
             
             segment_summary.columns = ['segment', 'count', 'avg_revenue', 'avg_frequency']
             
-            # Create pie chart
-            fig = px.pie(segment_summary, values='count', names='segment',
-                        title='Customer Segmentation Distribution',
-                        color_discrete_map={
-                            'High Value': '#28a745',
-                            'Occasional': '#ffc107', 
-                            'One-Time': '#dc3545'
-                        })
-            
-            fig.update_traces(textposition='inside', textinfo='percent+label')
-            
             return {
-                'chart': fig.to_json(),
+                'chart': self._segmentation_chart(segment_summary['segment'].to_numpy(),
+                                                  segment_summary['count'].to_numpy(),
+                                                  textposition='inside', textinfo='percent+label'),
                 'segments': segment_summary.to_dict('records'),
-                'sample_customers': customer_features.head(10).to_dict('records')
+                'sample_customers': customer_features.head(10).to_dict('records'),
+                'segmentation_mode': mode
             }
             
         except Exception as e:
@@ -190,14 +290,6 @@ class AdvancedAnalytics:
             {'segment': 'One-Time', 'count': 30, 'avg_revenue': 89.0, 'avg_frequency': 1.0}
         ]
         
-        fig = px.pie(pd.DataFrame(segments), values='count', names='segment',
-                    title='Customer Segmentation Distribution',
-                    color_discrete_map={
-                        'High Value': '#28a745',
-                        'Occasional': '#ffc107',
-                        'One-Time': '#dc3545'
-                    })
-        
         sample_customers = [
             {'customer': 'Customer_001', 'total_revenue': 2400.0, 'frequency': 12, 'segment_name': 'High Value'},
             {'customer': 'Customer_002', 'total_revenue': 680.0, 'frequency': 4, 'segment_name': 'Occasional'},
@@ -205,45 +297,99 @@ class AdvancedAnalytics:
         ]
         
         return {
-            'chart': fig.to_json(),
+            'fallback': True,
+            'chart': self._segmentation_chart([s['segment'] for s in segments], [s['count'] for s in segments]),
             'segments': segments,
             'sample_customers': sample_customers
         }
     
+    def _segmentation_chart(self, segments, counts, **attributes):
+        """Pie chart of customers per segment"""
+        trace = charts.pie(segments, counts, colors=SEGMENT_COLORS, legendgroup='',
+                           hovertemplate='segment=%{label}<br>count=%{value}<extra></extra>', **attributes)
+        return charts.chart([trace], charts.layout(title='Customer Segmentation Distribution', legend={'tracegroupgap': 0}))
+    
     def smart_forecast(self):
-        """Generate sales forecast using Prophet or statsmodels"""
+        """Generate sales forecast with the backtest's best model, else Prophet or Holt-Winters exponential smoothing"""
         try:
             if self.processed_df is None or self.processed_df.empty or 'date' not in self.processed_df.columns:
                 return self._fallback_forecast()
             
             # Prepare daily sales data
-            daily_sales = self.processed_df.groupby('date')['revenue'].sum().reset_index()
+            if self.cube is not None:
+                daily_sales = self.cube.daily_revenue().reset_index()
+            else:
+                daily_sales = self.processed_df.groupby('date')['revenue'].sum().reset_index()
             daily_sales = daily_sales.sort_values('date')
             
             if len(daily_sales) < 7:  # Need at least a week of data
                 raise ValueError("Forecasting requires at least 7 days of sales data")
             
-            # Try Prophet first
-            if PROPHET_AVAILABLE:
-                return self._prophet_forecast(daily_sales)
-            elif STATSMODELS_AVAILABLE:
-                return self._statsmodels_forecast(daily_sales)
-            else:
-                return self._fallback_forecast()
+            forecasters = {'prophet': self._prophet_forecast, 'holt_winters': self._holt_winters_forecast,
+                           'linear': self._linear_forecast}
+            model = (self.backtest or {}).get('best_model')
+            if model not in forecasters:
+                # Without backtest scores, try Prophet first
+                model = 'prophet' if PROPHET_AVAILABLE else 'holt_winters'
+            result = forecasters[model](daily_sales)
+            if 'forecast_source' not in result:
+                # The model failed and a fallback was returned
+                return result
+            
+            result['model'] = model
+            scores = (self.backtest or {}).get('models', {}).get(model)
+            if scores and scores['origins']:
+                result['accuracy'] = {key: scores[key] for key in ['accuracy', 'mae', 'mape', 'origins']}
+                result['accuracy']['horizon'] = self.backtest['horizon']
+            return result
                 
         except Exception as e:
             print(f"Forecast error: {e}")
             return self._fallback_forecast()
     
+    def _series_key(self):
+        """Identity of the dataset's daily revenue series across appends, None for unsaved data"""
+        if self.dataset is not None and self.dataset.path:
+            return f"{self.dataset.path}:daily_revenue"
+        return None
+    
+    def _forecast_model(self, backend, dates, values):
+        """How to forecast a series: ('cache' | 'warm_start' | 'refit', stored model entry)"""
+        if self.model_cache is None:
+            return 'refit', None
+        return self.model_cache.lookup(self._series_key(), backend, dates, values)
+    
+    def _remember_forecast(self, backend, dates, values, parameters, result):
+        if self.model_cache is not None:
+            self.model_cache.store(self._series_key(), backend, dates, values, parameters, result)
+    
+    @staticmethod
+    def _fit_prophet(prophet_data, init=None):
+        from prophet import Prophet
+        
+        model = Prophet(daily_seasonality=False, weekly_seasonality=True, yearly_seasonality=False)
+        return model.fit(prophet_data, init=init) if init is not None else model.fit(prophet_data)
+    
     def _prophet_forecast(self, daily_sales):
         """Generate forecast using Prophet"""
         try:
+            dates, values = daily_sales['date'].to_numpy(), daily_sales['revenue'].to_numpy(dtype=float)
+            source, entry = self._forecast_model('prophet', dates, values)
+            if source == 'cache':
+                return {**entry['result'], 'forecast_source': source}
+            
             # Prepare data for Prophet
             prophet_data = daily_sales.rename(columns={'date': 'ds', 'revenue': 'y'})
             
-            # Create and fit model
-            model = Prophet(daily_seasonality=False, weekly_seasonality=True, yearly_seasonality=False)
-            model.fit(prophet_data)
+            # Create and fit model, starting from the previous fit's parameters after an append
+            if source == 'warm_start':
+                try:
+                    model = self._fit_prophet(prophet_data, init=entry['parameters'])
+                except Exception as e:
+                    print(f"Prophet warm start failed, refitting: {e}")
+                    source = 'refit'
+            if source == 'refit':
+                model = self._fit_prophet(prophet_data)
             
             # Make future predictions
             future = model.make_future_dataframe(periods=30)
@@ -255,55 +401,10 @@ class AdvancedAnalytics:
             growth_rate = ((forecast_avg - current_avg) / current_avg) * 100
             
             # Create forecast chart
-            fig = go.Figure()
-            
-            # Historical data
-            fig.add_trace(go.Scatter(
-                x=daily_sales['date'],
-                y=daily_sales['revenue'],
-                mode='lines+markers',
-                name='Historical Sales',
-                line=dict(color='#007bff')
-            ))
-            
-            # Forecast
-            future_dates = forecast['ds'].tail(30)
-            future_values = forecast['yhat'].tail(30)
-            
-            fig.add_trace(go.Scatter(
-                x=future_dates,
-                y=future_values,
-                mode='lines',
-                name='Forecast',
-                line=dict(color='#28a745', dash='dash')
-            ))
-            
-            # Confidence interval
-            fig.add_trace(go.Scatter(
-                x=future_dates,
-                y=forecast['yhat_upper'].tail(30),
-                fill=None,
-                mode='lines',
-                line_color='rgba(0,0,0,0)',
-                showlegend=False
-            ))
-            
-            fig.add_trace(go.Scatter(
-                x=future_dates,
-                y=forecast['yhat_lower'].tail(30),
-                fill='tonexty',
-                mode='lines',
-                line_color='rgba(0,0,0,0)',
-                name='Confidence Interval',
-                fillcolor='rgba(40, 167, 69, 0.2)'
-            ))
-            
-            fig.update_layout(
-                title='30-Day Sales Forecast',
-                xaxis_title='Date',
-                yaxis_title='Revenue ($)',
-                template='plotly_white'
-            )
+            future = forecast.tail(30)
+            chart = forecast_chart(daily_sales['date'].to_numpy(), daily_sales['revenue'].to_numpy(),
+                                   future['ds'].to_numpy(), future['yhat'].to_numpy(),
+                                   lower=future['yhat_lower'].to_numpy(), upper=future['yhat_upper'].to_numpy())
             
             # Generate summary
             if growth_rate > 0:
@@ -311,63 +412,81 @@ class AdvancedAnalytics:
             else:
                 summary = f"Sales expected to decline by {abs(growth_rate):.1f}% over next 30 days"
             
-            return {
-                'chart': fig.to_json(),
+            result = {
+                'chart': chart,
                 'summary': summary,
                 'growth_rate': growth_rate,
                 'forecast_data': forecast.tail(30).to_dict('records')
             }
+            self._remember_forecast('prophet', dates, values, prophet_parameters(model), result)
+            return {**result, 'forecast_source': source}
             
         except Exception as e:
             print(f"Prophet forecast error: {e}")
             return self._fallback_forecast()
     
-    def _statsmodels_forecast(self, daily_sales):
-        """Generate forecast using statsmodels"""
+    def _linear_forecast(self, daily_sales):
+        """Generate forecast from the least-squares revenue trend"""
         try:
-            # Simple exponential smoothing
-            from statsmodels.tsa.holtwinters import ExponentialSmoothing
+            history = daily_sales.set_index('date')['revenue'].asfreq('D', fill_value=0.0)
+            days = np.arange(len(history), dtype=float)
+            fit = fit_trends(days, history.to_numpy(dtype=float), np.array([0]), np.array([len(days)]))
+            forecast, lower, upper = (np.maximum(values[0], 0) for values in
+                                      trend_intervals(fit, len(days) + np.arange(30)))
+            
+            current_avg = history.tail(7).mean()
+            growth_rate = ((forecast.mean() - current_avg) / current_avg) * 100
+            future_dates = pd.date_range(start=history.index.max() + timedelta(days=1), periods=30)
+            chart = forecast_chart(history.index.to_numpy(), history.to_numpy(), future_dates.to_numpy(), forecast,
+                                   lower=lower, upper=upper)
+            
+            if growth_rate > 0:
+                summary = f"Sales expected to grow by {growth_rate:.1f}% over next 30 days"
+            else:
+                summary = f"Sales expected to decline by {abs(growth_rate):.1f}% over next 30 days"
             
-            model = ExponentialSmoothing(daily_sales['revenue'], trend='add', seasonal=None)
-            fitted_model = model.fit()
+            return {
+                'chart': chart,
+                'summary': summary,
+                'growth_rate': growth_rate,
+                'forecast_data': [{'date': date, 'forecast': value} for date, value in zip(future_dates, forecast)],
+                'forecast_source': 'refit'
+            }
             
-            # Generate forecast
-            forecast = fitted_model.forecast(steps=30)
+        except Exception as e:
+            print(f"Linear forecast error: {e}")
+            return self._fallback_forecast()
+    
+    def _holt_winters_forecast(self, daily_sales):
+        """Generate forecast using the vectorized Holt-Winters kernel"""
+        try:
+            # Days without sales count as zero revenue
+            history = daily_sales.set_index('date')['revenue'].asfreq('D', fill_value=0.0)
+            dates, values = history.index.to_numpy(), history.to_numpy(dtype=float)
+            source, entry = self._forecast_model('holt_winters', dates, values)
+            if source == 'cache':
+                return {**entry['result'], 'forecast_source': source}
+            
+            # After an append, search around the previous fit's smoothing parameters
+            if source == 'warm_start':
+                try:
+                    fit = holt_winters([values], horizon=30, initial=entry['parameters'])
+                except Exception as e:
+                    print(f"Holt-Winters warm start failed, refitting: {e}")
+                    source = 'refit'
+            if source == 'refit':
+                fit = holt_winters([values], horizon=30)
+            forecast, lower, upper = (np.maximum(fit[name][0], 0) for name in ['forecast', 'lower', 'upper'])
             
             # Calculate growth
-            current_avg = daily_sales['revenue'].tail(7).mean()
+            current_avg = history.tail(7).mean()
             forecast_avg = forecast.mean()
             growth_rate = ((forecast_avg - current_avg) / current_avg) * 100
             
             # Create chart
-            fig = go.Figure()
-            
-            # Historical data
-            fig.add_trace(go.Scatter(
-                x=daily_sales['date'],
-                y=daily_sales['revenue'],
-                mode='lines+markers',
-                name='Historical Sales',
-                line=dict(color='#007bff')
-            ))
-            
-            # Forecast
-            future_dates = pd.date_range(start=daily_sales['date'].max() + timedelta(days=1), periods=30)
-            
-            fig.add_trace(go.Scatter(
-                x=future_dates,
-                y=forecast,
-                mode='lines',
-                name='Forecast',
-                line=dict(color='#28a745', dash='dash')
-            ))
-            
-            fig.update_layout(
-                title='30-Day Sales Forecast',
-                xaxis_title='Date',
-                yaxis_title='Revenue ($)',
-                template='plotly_white'
-            )
+            future_dates = pd.date_range(start=history.index.max() + timedelta(days=1), periods=30)
+            chart = forecast_chart(history.index.to_numpy(), history.to_numpy(), future_dates.to_numpy(), forecast,
+                                   lower=lower, upper=upper)
             
             # Generate summary
             if growth_rate > 0:
@@ -375,15 +494,18 @@ class AdvancedAnalytics:
             else:
                 summary = f"Sales expected to decline by {abs(growth_rate):.1f}% over next 30 days"
             
-            return {
-                'chart': fig.to_json(),
+            result = {
+                'chart': chart,
                 'summary': summary,
                 'growth_rate': growth_rate,
                 'forecast_data': [{'date': date, 'forecast': value} for date, value in zip(future_dates, forecast)]
             }
+            parameters = {name: float(fit[name][0]) for name in ['alpha', 'beta', 'gamma']}
+            self._remember_forecast('holt_winters', dates, values, parameters, result)
+            return {**result, 'forecast_source': source}
             
         except Exception as e:
-            print(f"Statsmodels forecast error: {e}")
+            print(f"Holt-Winters forecast error: {e}")
             return self._fallback_forecast()
     
     def _fallback_forecast(self):
@@ -393,33 +515,9 @@ class AdvancedAnalytics:
         historical = np.random.normal(1000, 200, 30)
         forecast = np.random.normal(1100, 150, 30)
         
-        fig = go.Figure()
-        
-        fig.add_trace(go.Scatter(
-            x=dates[:30],
-            y=historical,
-            mode='lines+markers',
-            name='Historical Sales',
-            line=dict(color='#007bff')
-        ))
-        
-        fig.add_trace(go.Scatter(
-            x=dates[30:],
-            y=forecast,
-            mode='lines',
-            name='Forecast',
-            line=dict(color='#28a745', dash='dash')
-        ))
-        
-        fig.update_layout(
-            title='30-Day Sales Forecast',
-            xaxis_title='Date',
-            yaxis_title='Revenue ($)',
-            template='plotly_white'
-        )
-        
         return {
-            'chart': fig.to_json(),
+            'fallback': True,
+            'chart': forecast_chart(dates[:30].to_numpy(), historical, dates[30:].to_numpy(), forecast),
             'summary': 'Sales expected to grow by 8-12% over next 30 days',
             'growth_rate': 10.0,
             'forecast_data': [{'date': date, 'forecast': value} for date, value in zip(dates[30:], forecast)]
@@ -433,9 +531,10 @@ class AdvancedAnalytics:
             
             score = 100
             issues = []
+            profile = self.dataset.profile if self.dataset is not None else profile_frame(self.df)
             
             # Check missing values
-            missing_pct = (self.df.isnull().sum().sum() / (len(self.df) * len(self.df.columns))) * 100
+            missing_pct = (profile.missing_total / (profile.rows * len(profile.columns))) * 100
             if missing_pct > 10:
                 score -= 30
                 issues.append(f"High missing data: {missing_pct:.1f}%")
@@ -444,7 +543,7 @@ class AdvancedAnalytics:
                 issues.append(f"Some missing data: {missing_pct:.1f}%")
             
             # Check duplicates
-            duplicate_pct = (self.df.duplicated().sum() / len(self.df)) * 100
+            duplicate_pct = profile.percentage(profile.duplicates)
             if duplicate_pct > 5:
                 score -= 25
                 issues.append(f"High duplicates: {duplicate_pct:.1f}%")
@@ -453,20 +552,8 @@ class AdvancedAnalytics:
                 issues.append(f"Some duplicates: {duplicate_pct:.1f}%")
             
             # Check outliers in numeric columns
-            numeric_cols = self.df.select_dtypes(include=[np.number]).columns
-            outlier_count = 0
-            
-            for col in numeric_cols:
-                if col in self.df.columns:
-                    Q1 = self.df[col].quantile(0.25)
-                    Q3 = self.df[col].quantile(0.75)
-                    IQR = Q3 - Q1
-                    lower_bound = Q1 - 1.5 * IQR
-                    upper_bound = Q3 + 1.5 * IQR
-                    outliers = self.df[(self.df[col] < lower_bound) | (self.df[col] > upper_bound)]
-                    outlier_count += len(outliers)
-            
-            outlier_pct = (outlier_count / len(self.df)) * 100
+            outlier_count = sum(profile.stat(col, 'outliers') for col in profile.numeric_columns(numeric_dtype=True))
+            outlier_pct = profile.percentage(outlier_count)
             if outlier_pct > 10:
                 score -= 25
                 issues.append(f"Many outliers: {outlier_pct:.1f}%")
@@ -494,8 +581,8 @@ class AdvancedAnalytics:
                 'color': color,
                 'issues': issues,
                 'stats': {
-                    'total_rows': len(self.df),
-                    'total_columns': len(self.df.columns),
+                    'total_rows': profile.rows,
+                    'total_columns': len(profile.columns),
                     'missing_pct': missing_pct,
                     'duplicate_pct': duplicate_pct,
                     'outlier_pct': outlier_pct
@@ -509,6 +596,7 @@ class AdvancedAnalytics:
     def _fallback_health_score(self):
         """Fallback data health score"""
         return {
+            'fallback': True,
             'score': 87,
             'comment': "Good data quality with minor issues",
             'color': "success",
@@ -529,7 +617,10 @@ class AdvancedAnalytics:
                 return self._fallback_growth_metrics()
             
             # Daily revenue
-            daily_revenue = self.processed_df.groupby('date')['revenue'].sum().sort_index()
+            if self.cube is not None:
+                daily_revenue = self.cube.daily_revenue()
+            else:
+                daily_revenue = self.processed_df.groupby('date')['revenue'].sum().sort_index()
             
             if len(daily_revenue) < 14:  # Need at least 2 weeks
                 return self._fallback_growth_metrics()
@@ -572,6 +663,7 @@ class AdvancedAnalytics:
     def _fallback_growth_metrics(self):
         """Fallback growth metrics"""
         return {
+            'fallback': True,
             'wow_growth': 12.5,
             'mom_growth': 8.3,
             'best_streak': 8450.0,
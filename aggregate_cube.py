@@ -0,0 +1,293 @@
+"""
+Aggregate Cube for Smart Data Analyzer
+Pre-aggregates a sales dataset once at upload (day x product, weekday x hour
+and per-customer RFM) so the analytics engines answer groupby questions in
+time proportional to the cube rather than the transaction count. Appended
+rows are folded in as partial aggregates and compacted on load.
+"""
+
+import os
+import json
+import uuid
+import shutil
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Any
+
+from data_store import (save_dataset, load_dataset, append_dataset, is_dataset, _replace_directory, _write_json,
+                        _number_labels)
+
+CUBE_DIRNAME = 'cube'
+CUBE_META_FILENAME = 'cube.json'
+CUBE_VERSION = 1
+CUBE_TABLES = ['daily_product', 'hour_weekday', 'customers']
+TABLE_KEYS = {'daily_product': ['day', 'product'], 'hour_weekday': ['weekday', 'hour'], 'customers': ['customer']}
+# Measures combined with something other than a sum when partial aggregates merge
+MERGE_FUNCS = {'first_purchase': 'min', 'last_purchase': 'max'}
+
+
+def _sum_and_count(grouped, column: str, prefix: str) -> pd.DataFrame:
+    """NaN-skipping sum and non-null count of one column per group"""
+    return grouped[column].agg(['sum', 'count']).rename(columns={'sum': prefix, 'count': f'{prefix}_count'})
+
+
+def _compact(name: str, table: pd.DataFrame) -> pd.DataFrame:
+    """Merge partial aggregates that share a key"""
+    keys = TABLE_KEYS[name]
+    funcs = {column: MERGE_FUNCS.get(column, 'sum') for column in table.columns if column not in keys}
+    return table.groupby(keys, dropna=False, sort=True).agg(funcs).reset_index()
+
+
+def _stored_keys(tables: List[pd.DataFrame], column: str) -> List[pd.DataFrame]:
+    """Numeric keys as text once any batch holds text keys, as the dataset store labels the column"""
+    numeric = [pd.api.types.is_numeric_dtype(table[column].dtype) for table in tables]
+    if all(numeric):
+        return tables
+    return [table.assign(**{column: _number_labels(table[column]).to_numpy()}) if is_numeric else table
+            for table, is_numeric in zip(tables, numeric)]
+
+
+def _read_cube_meta(cube_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(cube_path, CUBE_META_FILENAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class AggregateCube:
+    """
+    Pre-aggregated views of one dataset.
+
+    daily_product: one row per (day, product), NaN/NaT keys kept, with
+        rows, revenue (NaN-skipping sum), revenue_count, and over complete
+        rows (quantity and price present) complete_rows, quantity,
+        price_sum, and the stockout_count/stockout_price_sum of
+        zero-quantity, priced rows.
+    hour_weekday: one row per (weekday 0-6, hour) with rows, revenue,
+        revenue_count.
+    customers: per-customer revenue sum/count, quantity and first/last
+        purchase over rows with a date. Keys are the customer column values,
+        or row position // 3 when the dataset has no customer column.
+    """
+
+    def __init__(self, daily_product: pd.DataFrame, hour_weekday: pd.DataFrame,
+                 customers: pd.DataFrame, synthetic_customers: bool):
+        self.daily_product = daily_product
+        self.hour_weekday = hour_weekday
+        self.customers = customers
+        self.synthetic_customers = synthetic_customers
+        self._views: Dict[Any, Any] = {}
+
+    def _view(self, key, compute):
+        """Memoize a derived view; the cube never changes once built, so callers share it read-only"""
+        if key not in self._views:
+            self._views[key] = compute()
+        return self._views[key]
+
+    @classmethod
+    def build(cls, dataset, row_offset: int = 0) -> 'AggregateCube':
+        """
+        Aggregate a SalesDataset's rows.
+        row_offset is the position of the first row in the full dataset, used
+        when the rows are a batch appended to it.
+        """
+        frame = dataset.frame
+        day = frame['date'].dt.normalize()
+        revenue = frame['revenue']
+        complete = frame['quantity'].notna() & frame['price'].notna()
+        stockout = complete & (frame['quantity'] == 0) & (frame['price'] > 0)
+
+        measures = pd.DataFrame({
+            'day': day,
+            'product': frame['product'],
+            'revenue': revenue,
+            'complete_rows': complete.astype(np.int64),
+            'quantity': frame['quantity'].where(complete),
+            'price_sum': frame['price'].where(complete),
+            'stockout_count': stockout.astype(np.int64),
+            'stockout_price_sum': frame['price'].where(stockout, 0.0),
+        })
+        grouped = measures.groupby(['day', 'product'], dropna=False, sort=True)
+        daily_product = pd.concat([
+            grouped.size().rename('rows'),
+            _sum_and_count(grouped, 'revenue', 'revenue'),
+            grouped[['complete_rows', 'quantity', 'price_sum', 'stockout_count', 'stockout_price_sum']].sum(),
+        ], axis=1).reset_index()
+
+        dated = frame['date'].notna()
+        slots = pd.DataFrame({
+            'weekday': frame['date'].dt.dayofweek[dated].astype(np.int8),
+            'hour': frame['date'].dt.hour[dated].astype(np.int8),
+            'revenue': revenue[dated],
+        })
+        grouped = slots.groupby(['weekday', 'hour'], sort=True)
+        hour_weekday = pd.concat([
+            grouped.size().rename('rows'),
+            _sum_and_count(grouped, 'revenue', 'revenue'),
+        ], axis=1).reset_index()
+
+        synthetic = dataset.customer_column is None
+        if synthetic:
+            key = pd.Series((row_offset + np.arange(len(frame))) // 3, index=frame.index)
+        else:
+            key = frame[dataset.customer_column]
+        people = pd.DataFrame({'customer': key, 'revenue': revenue, 'quantity': frame['quantity'],
+                               'date': frame['date']})[dated]
+        grouped = people.groupby('customer', sort=True)
+        customers = pd.concat([
+            _sum_and_count(grouped, 'revenue', 'revenue'),
+            grouped['quantity'].sum(),
+            grouped['date'].agg(['min', 'max']).rename(columns={'min': 'first_purchase', 'max': 'last_purchase'}),
+        ], axis=1).reset_index()
+
+        return cls(daily_product, hour_weekday, customers, synthetic)
+
+    @classmethod
+    def combine(cls, partials: List['AggregateCube']) -> 'AggregateCube':
+        """
+        Cube of consecutive batches of one dataset from the cubes of each
+        batch (built with their row_offset), so a dataset ingested chunk by
+        chunk is never aggregated as a whole
+        """
+        tables = {}
+        for name in CUBE_TABLES:
+            parts = [getattr(partial, name) for partial in partials]
+            for key in TABLE_KEYS[name]:
+                parts = _stored_keys(parts, key)
+            tables[name] = _compact(name, pd.concat(parts, ignore_index=True))
+        return cls(synthetic_customers=partials[0].synthetic_customers, **tables)
+
+    # Persistence
+
+    def save(self, dataset_path: str, content_hash: Optional[str] = None) -> None:
+        """Store the cube alongside its dataset, tagged with the dataset's content hash"""
+        cube_path = os.path.join(dataset_path, CUBE_DIRNAME)
+        tmp_path = f"{cube_path}.tmp-{uuid.uuid4().hex[:8]}"
+        os.makedirs(tmp_path)
+        try:
+            for name in CUBE_TABLES:
+                save_dataset(getattr(self, name), os.path.join(tmp_path, name))
+            rows = {name: len(getattr(self, name)) for name in CUBE_TABLES}
+            _write_json(os.path.join(tmp_path, CUBE_META_FILENAME), {
+                'version': CUBE_VERSION, 'content_hash': content_hash,
+                'synthetic_customers': self.synthetic_customers,
+                'rows': rows, 'compacted_rows': rows,
+            })
+            _replace_directory(tmp_path, cube_path)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, dataset_path: str, content_hash: Optional[str] = None) -> Optional['AggregateCube']:
+        """Load a stored cube, or None when missing or built from other data"""
+        cube_path = os.path.join(dataset_path, CUBE_DIRNAME)
+        meta = _read_cube_meta(cube_path)
+        if meta is None or meta.get('version') != CUBE_VERSION or meta.get('content_hash') != content_hash:
+            return None
+        tables = {}
+        for name in CUBE_TABLES:
+            table_path = os.path.join(cube_path, name)
+            if not is_dataset(table_path):
+                return None
+            # Rows past the recorded count belong to an append still in progress
+            table = load_dataset(table_path)
+            rows = meta.get('rows', {}).get(name, len(table))
+            table = table.iloc[:rows]
+            if rows > meta.get('compacted_rows', {}).get(name, rows):
+                table = _compact(name, table)
+            tables[name] = table
+        return cls(synthetic_customers=meta['synthetic_customers'], **tables)
+
+    @classmethod
+    def append(cls, dataset_path: str, rows, row_offset: int, previous_hash: str, content_hash: str) -> bool:
+        """
+        Fold rows appended to a dataset into its stored cube.
+        The rows are aggregated on their own and appended to each table as
+        partial aggregates, so the cost follows the batch size; once partial
+        rows outnumber compacted ones the cube is rewritten compacted.
+        Returns False when there is no current cube to extend.
+        """
+        cube_path = os.path.join(dataset_path, CUBE_DIRNAME)
+        meta = _read_cube_meta(cube_path)
+        if (meta is None or meta.get('version') != CUBE_VERSION or meta.get('content_hash') != previous_hash
+                or meta['synthetic_customers'] != (rows.customer_column is None)):
+            return False
+        partial = cls.build(rows, row_offset=row_offset)
+        table_rows = {}
+        for name in CUBE_TABLES:
+            table_path = os.path.join(cube_path, name)
+            if not is_dataset(table_path):
+                return False
+            table_rows[name] = append_dataset(getattr(partial, name), table_path, dedupe=False)['rows']
+        compacted = meta.get('compacted_rows') or {
+            name: table_rows[name] - len(getattr(partial, name)) for name in CUBE_TABLES}
+        _write_json(os.path.join(cube_path, CUBE_META_FILENAME), {
+            **meta, 'content_hash': content_hash, 'rows': table_rows, 'compacted_rows': compacted,
+        })
+        if any(table_rows[name] > 2 * compacted.get(name, 0) for name in CUBE_TABLES):
+            cls.load(dataset_path, content_hash).save(dataset_path, content_hash)
+        return True
+
+    # Queries
+
+    def daily_revenue(self, require_revenue: bool = False) -> pd.Series:
+        """
+        Revenue per day, sorted by day.
+        require_revenue drops days whose rows all lack revenue, matching a
+        dropna(subset=['revenue']) before grouping.
+        """
+        def compute():
+            table = self.daily_product[self.daily_product['day'].notna()]
+            by_day = table.groupby('day', sort=True)[['revenue', 'revenue_count']].sum()
+            if require_revenue:
+                by_day = by_day[by_day['revenue_count'] > 0]
+            return by_day['revenue'].rename_axis('date')
+        return self._view(('daily_revenue', require_revenue), compute)
+
+    def product_totals(self) -> pd.DataFrame:
+        """Per-product totals over all days, indexed by product"""
+        def compute():
+            table = self.daily_product[self.daily_product['product'].notna()]
+            return table.groupby('product', sort=True)[
+                ['rows', 'revenue', 'revenue_count', 'complete_rows', 'quantity', 'price_sum',
+                 'stockout_count', 'stockout_price_sum']
+            ].sum()
+        return self._view('product_totals', compute)
+
+    def weekday_revenue(self) -> pd.DataFrame:
+        """Revenue sum and count per weekday (0 = Monday)"""
+        return self.hour_weekday.groupby('weekday', sort=True)[['revenue', 'revenue_count']].sum()
+
+    def hour_revenue(self) -> pd.DataFrame:
+        """Revenue sum and count per hour of day"""
+        return self.hour_weekday.groupby('hour', sort=True)[['revenue', 'revenue_count']].sum()
+
+    def revenue_mean(self) -> float:
+        """Mean revenue per row over the whole dataset"""
+        count = self.daily_product['revenue_count'].sum()
+        return float(self.daily_product['revenue'].sum() / count) if count else float('nan')
+
+    def customer_features(self) -> pd.DataFrame:
+        """Per-customer features in the shape customer_segmentation expects"""
+        return self._view('customer_features', self._customer_features).copy()
+
+    def _customer_features(self) -> pd.DataFrame:
+        customers = self.customers
+        features = pd.DataFrame({
+            'customer': customers['customer'],
+            'total_revenue': customers['revenue'],
+            'avg_revenue': customers['revenue'] / customers['revenue_count'].where(customers['revenue_count'] > 0),
+            'frequency': customers['revenue_count'],
+            'total_quantity': customers['quantity'],
+            'first_purchase': customers['first_purchase'],
+            'last_purchase': customers['last_purchase'],
+        })
+        if self.synthetic_customers:
+            features['customer'] = 'Customer_' + (features['customer'] + 1).astype(str)
+            features = features.sort_values('customer', ignore_index=True)
+        return features
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: len(getattr(self, name)) for name in CUBE_TABLES}
@@ -13,9 +13,68 @@ app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key-change-in-prod
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Configure upload settings
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', '16')) * 1024 * 1024  # 16MB default, raise for large POS exports
 app.config['UPLOAD_FOLDER'] = 'uploads'
 
+# CSV uploads above this size are streamed into the dataset store in chunks.
+# Keep it (and PARALLEL_INGEST_MB) below MAX_UPLOAD_MB, raising them together, or no upload reaches it
+app.config['STREAMING_INGEST_THRESHOLD'] = int(os.environ.get('STREAMING_INGEST_MB', '8')) * 1024 * 1024
+app.config['INGEST_CHUNK_ROWS'] = int(os.environ.get('INGEST_CHUNK_ROWS', '100000'))
+
+# Very large CSVs are parsed on a process pool when more than one worker is configured
+app.config['PARALLEL_INGEST_WORKERS'] = int(os.environ.get('PARALLEL_INGEST_WORKERS', '0'))
+app.config['PARALLEL_INGEST_THRESHOLD'] = int(os.environ.get('PARALLEL_INGEST_MB', '256')) * 1024 * 1024
+
+# Per-worker memory budget for recently used datasets
+app.config['DATASET_CACHE_BYTES'] = int(os.environ.get('DATASET_CACHE_MB', '512')) * 1024 * 1024
+
+# Map stored dataset columns read-only so gunicorn workers share one copy of the pages
+# (off on Windows, where mapped files block replacing a re-uploaded dataset)
+app.config['DATASET_MMAP'] = os.environ.get('DATASET_MMAP', '0' if os.name == 'nt' else '1') == '1'
+
+# Analytics results are cached per dataset content hash in memory and on disk
+app.config['ANALYTICS_CACHE_DIR'] = os.environ.get('ANALYTICS_CACHE_DIR', os.path.join('cache', 'analytics'))
+app.config['ANALYTICS_CACHE_TTL'] = int(os.environ.get('ANALYTICS_CACHE_TTL', '86400'))
+app.config['ANALYTICS_CACHE_MEMORY_BYTES'] = int(os.environ.get('ANALYTICS_CACHE_MEMORY_MB', '64')) * 1024 * 1024
+app.config['ANALYTICS_CACHE_DISK_BYTES'] = int(os.environ.get('ANALYTICS_CACHE_DISK_MB', '512')) * 1024 * 1024
+
+# Analytics sections run concurrently on a shared per-worker thread pool; a section still
+# running ANALYTICS_SECTION_TIMEOUT seconds after it started is reported as timed out
+app.config['ANALYTICS_SECTION_WORKERS'] = int(os.environ.get('ANALYTICS_SECTION_WORKERS', '4'))
+app.config['ANALYTICS_SECTION_TIMEOUT'] = float(os.environ.get('ANALYTICS_SECTION_TIMEOUT', '30'))
+
+# Customer segmentation fits KMeans on a stratified sample of SEGMENTATION_SAMPLE_SIZE customers
+# instead of all of them above SEGMENTATION_EXACT_LIMIT customers
+app.config['SEGMENTATION_EXACT_LIMIT'] = int(os.environ.get('SEGMENTATION_EXACT_LIMIT', '50000'))
+app.config['SEGMENTATION_SAMPLE_SIZE'] = int(os.environ.get('SEGMENTATION_SAMPLE_SIZE', '20000'))
+
+# Batch forecasts fit one model per product (or product x store). The default holt_winters backend fits
+# every series in one vectorized call; the others run on a pool of FORECAST_WORKERS processes
+# (0 = one per CPU, 1 = in-process), stopping a series' fit after FORECAST_SERIES_TIMEOUT seconds
+app.config['FORECAST_BACKEND'] = os.environ.get('FORECAST_BACKEND', 'auto')
+app.config['FORECAST_WORKERS'] = int(os.environ.get('FORECAST_WORKERS', '0'))
+app.config['FORECAST_SERIES_TIMEOUT'] = float(os.environ.get('FORECAST_SERIES_TIMEOUT', '20'))
+app.config['FORECAST_HORIZON'] = int(os.environ.get('FORECAST_HORIZON', '30'))
+
+# Fitted dashboard forecast models are kept for FORECAST_MODEL_CACHE_TTL seconds, keyed by the series they
+# were fitted on; a series that only gained up to FORECAST_WARM_START_DAYS days is refit from the previous fit
+app.config['FORECAST_MODEL_CACHE_DIR'] = os.environ.get('FORECAST_MODEL_CACHE_DIR', os.path.join('cache', 'forecast_models'))
+app.config['FORECAST_MODEL_CACHE_TTL'] = int(os.environ.get('FORECAST_MODEL_CACHE_TTL', str(7 * 86400)))
+app.config['FORECAST_WARM_START_DAYS'] = int(os.environ.get('FORECAST_WARM_START_DAYS', '14'))
+
+# Forecasters are backtested once per dataset in the background, from BACKTEST_ORIGINS cut-offs scored over
+# BACKTEST_HORIZON days, on BACKTEST_WORKERS processes (0 = one per CPU); the scores pick the dashboard model
+app.config['BACKTEST_HORIZON'] = int(os.environ.get('BACKTEST_HORIZON', '30'))
+app.config['BACKTEST_ORIGINS'] = int(os.environ.get('BACKTEST_ORIGINS', '8'))
+app.config['BACKTEST_WORKERS'] = int(os.environ.get('BACKTEST_WORKERS', '0'))
+
+# Heavy analysis dependencies (sklearn, reportlab, plotly, Prophet) load on first use; set
+# WARM_UP_IMPORTS=1 with gunicorn --preload to load them once in the master before forking
+app.config['WARM_UP_IMPORTS'] = os.environ.get('WARM_UP_IMPORTS', '0') == '1'
+
+# Charts name a shared Plotly template that browsers cache for CHART_TEMPLATE_MAX_AGE seconds
+app.config['CHART_TEMPLATE_MAX_AGE'] = int(os.environ.get('CHART_TEMPLATE_MAX_AGE', '86400'))
+
 # Configure Flask-Mail for automated email delivery
 app.config['MAIL_SERVER'] = 'smtp.gmail.com'
 app.config['MAIL_PORT'] = 587
@@ -35,6 +94,8 @@ os.makedirs('reports', exist_ok=True)
 try:
     from routes import *
     print("Full Smart Data Analyzer loaded with NumPy support")
+    if app.config['WARM_UP_IMPORTS']:
+        warm_up()
 except Exception as e:
     print(f"Loading minimal app due to: {e}")
     from minimal_app import *
@@ -0,0 +1,216 @@
+"""
+Forecast Backtesting for Smart Data Analyzer
+Scores the dashboard's forecasters on a dataset's daily revenue by rolling-
+origin evaluation: each model is fitted on the history up to a series of
+cut-off days, on the same series the dashboard fits it on, and compared with
+the calendar days that followed, giving MAE and MAPE for every day of the
+horizon. The scores report how accurate a forecast really is and which
+model to use for the dataset.
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from typing import Dict, List, Optional, Any
+
+from batch_forecast import BACKENDS, IN_PROCESS_BACKENDS, VECTORIZED_BACKENDS, available_backends, time_limit
+from growth_analytics import fit_trends, trend_intervals
+
+# The forecasters behind the dashboard's 30-day forecast: a linear trend, Holt-Winters and Prophet
+BACKTEST_MODELS = ['linear', 'holt_winters', 'prophet']
+# Like the dashboard, these are fitted on the days with sales only; the others on every
+# calendar day, zero without sales
+SALES_DAY_MODELS = {'prophet'}
+# The growth page's revenue trend line, scored for its accuracy rating but not a forecast model
+TREND_MODEL = 'trend'
+BACKTEST_HORIZON = 30
+BACKTEST_ORIGINS = 8
+# Days between consecutive cut-offs, and the least history a model is fitted on
+ORIGIN_STEP = 7
+MIN_TRAIN_DAYS = 28
+MIN_HORIZON = 7
+# MAPE below these is rated High, then Moderate; anything above is Low
+ACCURACY_RATINGS = [(10.0, 'High'), (25.0, 'Moderate')]
+
+
+def rolling_origins(n_days: int, horizon: int = BACKTEST_HORIZON, origins: int = BACKTEST_ORIGINS,
+                    step: int = ORIGIN_STEP, min_train: int = MIN_TRAIN_DAYS):
+    """
+    Cut-offs for a series of n_days: the history before each cut-off is
+    fitted and the following horizon days are scored. The latest cut-off
+    leaves exactly horizon days; earlier ones step back by step days while at
+    least min_train days remain. The horizon shrinks for short series.
+    Returns (cutoffs in ascending order, horizon).
+    """
+    horizon = min(horizon, n_days - min_train)
+    if horizon < MIN_HORIZON:
+        raise ValueError(f"Backtesting requires at least {min_train + MIN_HORIZON} days of sales data")
+    latest = n_days - horizon
+    cutoffs = latest - step * np.arange(origins)
+    return np.sort(cutoffs[cutoffs >= min_train]), horizon
+
+
+def accuracy_rating(mape: Optional[float]) -> str:
+    """'High', 'Moderate' or 'Low' for a mean absolute percentage error"""
+    if mape is None or np.isnan(mape):
+        return 'Low'
+    for limit, rating in ACCURACY_RATINGS:
+        if mape < limit:
+            return rating
+    return 'Low'
+
+
+def trend_forecast(dates: np.ndarray, values: np.ndarray, future_dates: np.ndarray) -> np.ndarray:
+    """
+    The revenue trend line of GrowthAnalytics.predict_revenue_trend at
+    future_dates: least squares over days since the first date
+    """
+    days = (dates - dates[0]).astype(float)
+    fit = fit_trends(days, values, np.array([0]), np.array([len(values)]))
+    return trend_intervals(fit, (future_dates - dates[0]).astype(float))[0][0]
+
+
+def fit_origins(model: str, dates: np.ndarray, values: np.ndarray, cutoffs: List[int], horizon: int,
+                timeout: Optional[float] = None, sold: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Forecasts of one model (or TREND_MODEL) for the horizon calendar days
+    after each cut-off, shaped (cutoffs, horizon); runs in a pool worker or
+    in-process. sold marks the days with sales (default all). A fit that
+    fails or exceeds the time limit leaves its row NaN.
+    """
+    forecasts = np.full((len(cutoffs), horizon), np.nan)
+    if model in VECTORIZED_BACKENDS:
+        fit = VECTORIZED_BACKENDS[model]([values[:cutoff] for cutoff in cutoffs], horizon)
+        return fit['forecast']
+    sold = np.ones(len(values), dtype=bool) if sold is None else sold
+    for row, cutoff in enumerate(cutoffs):
+        try:
+            with time_limit(timeout):
+                if model == TREND_MODEL:
+                    history = sold[:cutoff]
+                    forecasts[row] = trend_forecast(dates[:cutoff][history], values[:cutoff][history],
+                                                    dates[cutoff:cutoff + horizon])
+                elif model in SALES_DAY_MODELS:
+                    # Forecasts start the day after the last sale, so skip the days up to the cut-off
+                    history = sold[:cutoff]
+                    gap = cutoff - 1 - np.flatnonzero(history)[-1]
+                    forecasts[row] = BACKENDS[model](dates[:cutoff][history], values[:cutoff][history],
+                                                     horizon + gap)[0][gap:]
+                else:
+                    forecasts[row] = BACKENDS[model](dates[:cutoff], values[:cutoff], horizon)[0]
+        except Exception as e:
+            print(f"Backtest: {model} fit at day {cutoff} failed: {e}")
+    return forecasts
+
+
+def score_forecasts(forecasts: np.ndarray, actual: np.ndarray) -> Dict[str, Any]:
+    """
+    MAE and MAPE per horizon day over the origins with a forecast, and their
+    averages. Revenue cannot be negative, so forecasts are clipped at zero as
+    the dashboard shows them; days without sales are left out of MAPE.
+    """
+    fitted = ~np.isnan(forecasts).any(axis=1)
+    if not fitted.any():
+        return {'origins': 0, 'mae': None, 'mape': None, 'mae_by_horizon': [], 'mape_by_horizon': []}
+    errors = np.abs(np.maximum(forecasts[fitted], 0) - actual[fitted])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = np.where(actual[fitted] > 0, errors / actual[fitted] * 100, np.nan)
+    mae = errors.mean(axis=0)
+    counted = (~np.isnan(percentage)).sum(axis=0)
+    mape = np.where(counted > 0, np.nansum(percentage, axis=0) / np.maximum(counted, 1), np.nan)
+    rounded = lambda array: [None if np.isnan(value) else round(float(value), 3) for value in array]
+    overall_mape = np.nanmean(percentage) if counted.any() else np.nan
+    return {
+        'origins': int(fitted.sum()),
+        'mae': round(float(mae.mean()), 3),
+        'mape': None if np.isnan(overall_mape) else round(float(overall_mape), 3),
+        'mae_by_horizon': rounded(mae),
+        'mape_by_horizon': rounded(mape),
+    }
+
+
+def run_backtest(dates, values, models: Optional[List[str]] = None, horizon: int = BACKTEST_HORIZON,
+                 origins: int = BACKTEST_ORIGINS, workers: Optional[int] = None,
+                 timeout: Optional[float] = None, sold: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Backtest forecasters on a daily series (one value per consecutive day,
+    zero without sales); sold marks the days with sales, which SALES_DAY_MODELS
+    and the trend line are fitted on (default all days).
+    Vectorized and fast models are fitted in-process; the others (Prophet)
+    fit their origins in parallel on workers processes (None = one per CPU,
+    1 = in-process). models defaults to the installed BACKTEST_MODELS.
+    Returns the cut-offs, per-model scores, best_model (the model with the
+    lowest MAE) and the scores of the trend line.
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    values = np.asarray(values, dtype=float)
+    sold = np.ones(len(values), dtype=bool) if sold is None else np.asarray(sold, dtype=bool)
+    installed = available_backends()
+    models = [model for model in (models or BACKTEST_MODELS) if model in installed]
+    if not models:
+        raise ValueError("No forecasting model available for backtesting")
+    cutoffs, horizon = rolling_origins(len(values), horizon, origins)
+    actual = np.array([values[cutoff:cutoff + horizon] for cutoff in cutoffs])
+    started = time.perf_counter()
+
+    forecasts = {}
+    pooled = [model for model in models if model not in VECTORIZED_BACKENDS and model not in IN_PROCESS_BACKENDS]
+    workers = workers or os.cpu_count() or 1
+    for model in models:
+        if model not in pooled or workers <= 1:
+            forecasts[model] = fit_origins(model, dates, values, list(cutoffs), horizon, timeout, sold)
+    forecasts[TREND_MODEL] = fit_origins(TREND_MODEL, dates, values, list(cutoffs), horizon, timeout, sold)
+    if pooled and workers > 1:
+        # One task per model and cut-off; spawned workers avoid forking a threaded web server process
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(pooled) * len(cutoffs)), mp_context=context) as executor:
+            futures = {model: [executor.submit(fit_origins, model, dates, values, [cutoff], horizon, timeout, sold)
+                               for cutoff in cutoffs] for model in pooled}
+            for model, model_futures in futures.items():
+                forecasts[model] = np.vstack([future.result() for future in model_futures])
+
+    scores = {model: score_forecasts(forecasts[model], actual) for model in models + [TREND_MODEL]}
+    for score in scores.values():
+        score['accuracy'] = accuracy_rating(score['mape'])
+    ranked = [model for model in models if scores[model]['origins']]
+    summary = {
+        'horizon': horizon,
+        'origins': [str(date) for date in dates[cutoffs]],
+        'last_day': str(dates[-1]),
+        'models': {model: scores[model] for model in models},
+        'trend': scores[TREND_MODEL],
+        'best_model': min(ranked, key=lambda model: scores[model]['mae']) if ranked else None,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+    print(f"Backtest: {len(models)} models over {len(cutoffs)} origins in {summary['seconds']:.2f}s, "
+          f"best {summary['best_model']}")
+    return summary
+
+
+def daily_series(dataset):
+    """
+    The dashboard's daily revenue of a dataset: every calendar day from the
+    first to the last sale, zero without sales, and the days with sales
+    """
+    if dataset.cube is not None:
+        daily = dataset.cube.daily_revenue()
+        sold_days = dataset.cube.daily_revenue(require_revenue=True).index
+    else:
+        frame = dataset.frame[dataset.frame['date'].notna()]
+        day = frame['date'].dt.normalize()
+        daily = frame.groupby(day)['revenue'].sum()
+        sold_days = day[frame['revenue'].notna()].unique()
+    if daily.empty:
+        raise ValueError("Backtesting requires dated sales")
+    daily = daily.asfreq('D', fill_value=0.0)
+    return daily.index.to_numpy(), daily.to_numpy(dtype=float), daily.index.isin(sold_days)
+
+
+def backtest_dataset(dataset, **kwargs) -> Dict[str, Any]:
+    """Backtest the daily revenue of a dataset as the dashboard forecasts it; see run_backtest"""
+    dates, values, sold = daily_series(dataset)
+    result = run_backtest(dates, values, sold=sold, **kwargs)
+    result['content_hash'] = dataset.content_hash
+    return result
@@ -0,0 +1,445 @@
+"""
+Batch Forecasting for Smart Data Analyzer
+Forecasts daily revenue for every product (or product x store) series with
+one model per series, fitted on a process pool with a per-series time limit.
+Each series' forecast is stored next to its dataset, so the dashboard can
+look up any product without refitting.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import signal
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Any, Callable
+
+from data_store import save_dataset, load_dataset, is_dataset, _replace_directory, _write_json
+from growth_analytics import fit_trends, trend_intervals
+from holt_winters import holt_winters
+from advanced_analytics import module_available
+
+FORECAST_DIRNAME = 'forecasts'
+FORECAST_META_FILENAME = 'forecast.json'
+FORECAST_VERSION = 1
+FORECAST_ARRAYS = ['forecast', 'lower', 'upper']
+DEFAULT_HORIZON = 30
+MIN_HISTORY_DAYS = 7
+# Series handed to a pool worker per task, so short fits are not dominated by IPC
+CHUNK_SERIES = 50
+
+
+class SeriesTimeout(Exception):
+    """A series' model fit exceeded its time limit"""
+
+
+def alarm_available() -> bool:
+    """Whether time_limit can interrupt a fit here: SIGALRM exists and this is the main thread"""
+    return hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread()
+
+
+@contextmanager
+def time_limit(seconds: Optional[float]):
+    """
+    Raise SeriesTimeout inside the block after seconds.
+    Uses SIGALRM, so the limit is only enforced on the main thread of a
+    process on platforms that have it (pool workers on Linux and macOS);
+    elsewhere the block runs to completion.
+    """
+    if not seconds or not alarm_available():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise SeriesTimeout(f"Model fit exceeded {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+# Model backends: fit(dates, values, horizon) -> (forecast, lower, upper) arrays of horizon days
+
+def linear_forecast(dates: np.ndarray, values: np.ndarray, horizon: int):
+    """Least-squares trend with 95% prediction intervals"""
+    x = np.arange(len(values), dtype=float)
+    fit = fit_trends(x, values, np.array([0]), np.array([len(values)]))
+    forecast, lower, upper = trend_intervals(fit, np.arange(len(values), len(values) + horizon))
+    return forecast[0], lower[0], upper[0]
+
+
+def holt_winters_forecast(dates: np.ndarray, values: np.ndarray, horizon: int):
+    """Holt-Winters with additive trend and weekly seasonality (NumPy kernel, one series)"""
+    fit = holt_winters([values], horizon)
+    return fit['forecast'][0], fit['lower'][0], fit['upper'][0]
+
+
+def exponential_smoothing_forecast(dates: np.ndarray, values: np.ndarray, horizon: int):
+    """Holt's additive trend, with weekly seasonality given two weeks of history (statsmodels)"""
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    seasonal = 'add' if len(values) >= 14 else None
+    model = ExponentialSmoothing(values, trend='add', seasonal=seasonal,
+                                 seasonal_periods=7 if seasonal else None).fit()
+    forecast = np.asarray(model.forecast(horizon), dtype=float)
+    spread = 1.96 * np.std(values - model.fittedvalues) * np.sqrt(np.arange(1, horizon + 1))
+    return forecast, forecast - spread, forecast + spread
+
+
+def prophet_forecast(dates: np.ndarray, values: np.ndarray, horizon: int):
+    """Prophet with weekly seasonality"""
+    from prophet import Prophet
+
+    model = Prophet(daily_seasonality=False, weekly_seasonality=True, yearly_seasonality=False)
+    model.fit(pd.DataFrame({'ds': dates, 'y': values}))
+    future = model.predict(model.make_future_dataframe(periods=horizon).tail(horizon))
+    return future['yhat'].to_numpy(), future['yhat_lower'].to_numpy(), future['yhat_upper'].to_numpy()
+
+
+BACKENDS: Dict[str, Callable] = {
+    'linear': linear_forecast,
+    'holt_winters': holt_winters_forecast,
+    'exponential_smoothing': exponential_smoothing_forecast,
+    'prophet': prophet_forecast,
+}
+BACKEND_MODULES = {'exponential_smoothing': 'statsmodels', 'prophet': 'prophet'}
+# Backends fast enough that starting a process pool costs more than it saves
+IN_PROCESS_BACKENDS = {'linear'}
+# Backends that fit all series of a batch in one vectorized call
+VECTORIZED_BACKENDS = {'holt_winters': holt_winters}
+
+
+def available_backends() -> List[str]:
+    """Backends whose dependencies are installed"""
+    return [name for name in BACKENDS if name not in BACKEND_MODULES or module_available(BACKEND_MODULES[name])]
+
+
+def resolve_backend(name: str = 'auto') -> str:
+    """
+    Backend to use for a configured name.
+    'auto' is the vectorized Holt-Winters kernel; statsmodels fits take
+    around a hundred times longer per series and Prophet fits seconds, so
+    those are only used when asked for.
+    """
+    available = available_backends()
+    if name == 'auto':
+        return 'holt_winters'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown forecast backend: {name}. Available backends: {', '.join(available)}")
+    if name not in available:
+        raise ValueError(f"Forecast backend {name} needs {BACKEND_MODULES[name]}, which is not installed")
+    return name
+
+
+# Series
+
+def sales_series(dataset, by_store: bool = False) -> Dict[str, Any]:
+    """
+    Daily revenue of every product (or product x store) series of a dataset.
+    Returns the series keys (a DataFrame sorted by key), and per series its
+    [starts, ends) range in flat day/revenue arrays sorted by series and day.
+    Days are counted from first_day; every series runs to last_day, and days
+    without sales between its first sale and last_day have no revenue.
+    """
+    keys = ['product', 'store'] if by_store else ['product']
+    if by_store:
+        if dataset.store_column is None:
+            raise ValueError("Per-store forecasts need a store column (e.g. store, branch or location)")
+        frame = dataset.frame
+        table = pd.DataFrame({'day': frame['date'].dt.normalize(), 'product': frame['product'],
+                              'store': frame[dataset.store_column], 'revenue': frame['revenue']})
+    elif dataset.cube is not None:
+        table = dataset.cube.daily_product[['day', 'product', 'revenue']]
+    else:
+        frame = dataset.frame
+        table = pd.DataFrame({'day': frame['date'].dt.normalize(), 'product': frame['product'],
+                              'revenue': frame['revenue']})
+    daily = table.groupby(keys + ['day'], sort=True)['revenue'].sum()
+    if daily.empty:
+        raise ValueError("Batch forecasting requires dated sales with a product")
+
+    days = daily.index.get_level_values('day')
+    first_day, last_day = days.min(), days.max()
+    series_codes = daily.groupby(level=keys, sort=True).ngroup().to_numpy()
+    starts = np.flatnonzero(np.r_[True, series_codes[1:] != series_codes[:-1]])
+    return {
+        'keys': daily.index.droplevel('day')[starts].to_frame(index=False),
+        'day': ((days - first_day) // pd.Timedelta(days=1)).to_numpy(dtype=np.int64),
+        'revenue': daily.to_numpy(dtype=float),
+        'starts': starts,
+        'ends': np.r_[starts[1:], len(daily)].astype(np.int64),
+        'first_day': first_day,
+        'last_day': last_day,
+    }
+
+
+def series_history(dataset, last_day, product, store=None, days: int = 90) -> pd.Series:
+    """Daily revenue of one series over the days up to last_day, zero on days without sales"""
+    if store is None and dataset.cube is not None:
+        table = dataset.cube.daily_product
+        match = table['product'] == product
+    else:
+        frame = dataset.frame
+        table = pd.DataFrame({'day': frame['date'].dt.normalize(), 'revenue': frame['revenue']})
+        match = frame['product'] == product
+        if store is not None:
+            match &= frame[dataset.store_column].astype(str) == str(store)
+    revenue = table[match.to_numpy()].groupby('day')['revenue'].sum()
+    return revenue.reindex(pd.date_range(end=pd.Timestamp(last_day), periods=days), fill_value=0.0)
+
+
+def _dense_history(day: np.ndarray, revenue: np.ndarray, last_day: int) -> np.ndarray:
+    """Revenue for every day from a series' first sale to last_day"""
+    return np.bincount(day - day[0], weights=revenue, minlength=last_day - day[0] + 1)
+
+
+def _series_result(task: Dict[str, Any], values: np.ndarray) -> Dict[str, Any]:
+    return {'series': task['series'], 'history_days': len(values), 'error': '', 'status': 'insufficient_data'}
+
+
+def _store_forecast(result: Dict[str, Any], values: np.ndarray, forecast, lower, upper) -> None:
+    """Record a fitted series' forecast, clipped at zero since revenue cannot be negative"""
+    result['forecast'], result['lower'], result['upper'] = (
+        np.maximum(np.asarray(array, dtype=float), 0) for array in (forecast, lower, upper))
+    result['status'] = 'ok'
+    recent = values[-7:].mean()
+    result['growth_rate'] = (result['forecast'].mean() - recent) / recent * 100 if recent else np.nan
+
+
+def forecast_chunk(backend: str, tasks: List[Dict[str, Any]], horizon: int,
+                   timeout: Optional[float]) -> List[Dict[str, Any]]:
+    """
+    Fit each series of a chunk; runs in a pool worker or in-process.
+    A series that fails or exceeds the time limit is reported with its status
+    instead of failing the chunk.
+    """
+    fit = BACKENDS[backend]
+    results = []
+    for task in tasks:
+        values = _dense_history(task['day'], task['revenue'], task['last_day'])
+        dates = task['first_day'] + np.arange(task['day'][0], task['last_day'] + 1).astype('timedelta64[D]')
+        result = _series_result(task, values)
+        start = time.perf_counter()
+        if len(values) >= MIN_HISTORY_DAYS:
+            try:
+                with time_limit(timeout):
+                    forecast, lower, upper = fit(dates, values, horizon)
+                _store_forecast(result, values, forecast, lower, upper)
+            except SeriesTimeout as e:
+                result['status'], result['error'] = 'timed_out', str(e)
+            except Exception as e:
+                result['status'], result['error'] = 'failed', str(e)
+        result['seconds'] = time.perf_counter() - start
+        results.append(result)
+    return results
+
+
+def forecast_vectorized(backend: str, tasks: List[Dict[str, Any]], horizon: int) -> List[Dict[str, Any]]:
+    """
+    Fit every series at once with a vectorized backend.
+    Per-series time limits do not apply; each series is credited an equal
+    share of the run time.
+    """
+    histories = [_dense_history(task['day'], task['revenue'], task['last_day']) for task in tasks]
+    results = [_series_result(task, values) for task, values in zip(tasks, histories)]
+    fitted = [row for row, values in enumerate(histories) if len(values) >= MIN_HISTORY_DAYS]
+    start = time.perf_counter()
+    if fitted:
+        fit = VECTORIZED_BACKENDS[backend]([histories[row] for row in fitted], horizon)
+        for position, row in enumerate(fitted):
+            _store_forecast(results[row], histories[row], *(fit[name][position] for name in FORECAST_ARRAYS))
+    seconds = (time.perf_counter() - start) / max(len(fitted), 1)
+    for result in results:
+        result['seconds'] = seconds if result['status'] == 'ok' else 0.0
+    return results
+
+
+# Storage
+
+class ForecastStore:
+    """
+    Stored batch forecasts of one dataset for one backend and grouping.
+    A run lives in <dataset>/forecasts/<backend>-<product|product_store>/:
+    a `series` table with one row per series (keys, status, growth_rate,
+    history_days, seconds, error), forecast/lower/upper arrays with one row
+    of horizon days per series, and forecast.json tagging the run with the
+    dataset's content hash. Progress of a running batch is kept in a
+    status file beside it, so any worker can report it.
+    """
+
+    def __init__(self, dataset_path: str, backend: str, by_store: bool = False):
+        self.backend = backend
+        self.by_store = by_store
+        self.path = os.path.join(dataset_path, FORECAST_DIRNAME,
+                                 f"{backend}-{'product_store' if by_store else 'product'}")
+        self.status_path = f"{self.path}.status.json"
+        self._series = None
+
+    def meta(self, content_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Metadata of the stored run, or None when missing or forecast from other data"""
+        try:
+            with open(os.path.join(self.path, FORECAST_META_FILENAME)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != FORECAST_VERSION or (content_hash and meta.get('content_hash') != content_hash):
+            return None
+        return meta
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        """Progress of the latest run started for this store"""
+        try:
+            with open(self.status_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_status(self, **status) -> None:
+        os.makedirs(os.path.dirname(self.status_path), exist_ok=True)
+        _write_json(self.status_path, {'backend': self.backend, 'by_store': self.by_store,
+                                       'updated': time.time(), **status})
+
+    def save(self, keys: pd.DataFrame, results: List[Dict[str, Any]], meta: Dict[str, Any]) -> None:
+        """Store a finished run; results are in series order"""
+        horizon = meta['horizon']
+        table = keys.copy()
+        for column in ['status', 'error']:
+            table[column] = [result[column] for result in results]
+        for column in ['growth_rate', 'seconds']:
+            table[column] = np.array([result.get(column, np.nan) for result in results], dtype=float)
+        table['history_days'] = np.array([result['history_days'] for result in results], dtype=np.int64)
+
+        tmp_path = f"{self.path}.tmp-{uuid.uuid4().hex[:8]}"
+        os.makedirs(tmp_path)
+        try:
+            save_dataset(table, os.path.join(tmp_path, 'series'))
+            for name in FORECAST_ARRAYS:
+                array = np.full((len(results), horizon), np.nan)
+                for row, result in enumerate(results):
+                    if name in result:
+                        array[row] = result[name]
+                np.save(os.path.join(tmp_path, f'{name}.npy'), array)
+            _write_json(os.path.join(tmp_path, FORECAST_META_FILENAME), {'version': FORECAST_VERSION, **meta})
+            _replace_directory(tmp_path, self.path)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        self._series = None
+
+    def series(self) -> pd.DataFrame:
+        """Per-series table of the stored run"""
+        if self._series is None:
+            self._series = load_dataset(os.path.join(self.path, 'series'))
+        return self._series
+
+    def lookup(self, product, store=None) -> Optional[Dict[str, Any]]:
+        """Stored forecast of one series, or None when it was not forecast"""
+        series = self.series()
+        match = series['product'].astype(str) == str(product)
+        if self.by_store:
+            match &= series['store'].astype(str) == str(store)
+        rows = np.flatnonzero(match.to_numpy())
+        if not len(rows):
+            return None
+        row = int(rows[0])
+        meta = self.meta()
+        arrays = {name: np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')[row]
+                  for name in FORECAST_ARRAYS}
+        dates = pd.date_range(pd.Timestamp(meta['last_day']) + pd.Timedelta(days=1), periods=meta['horizon'])
+        record = series.iloc[[row]].to_dict('records')[0]
+        return {
+            **{key: record[key] for key in (['product', 'store'] if self.by_store else ['product'])},
+            'backend': self.backend,
+            'status': record['status'],
+            'error': record['error'] or None,
+            'growth_rate': None if np.isnan(record['growth_rate']) else record['growth_rate'],
+            'history_days': record['history_days'],
+            'dates': dates,
+            **{name: np.asarray(values) for name, values in arrays.items()},
+        }
+
+
+# Batch runs
+
+def run_batch_forecast(dataset, backend: str = 'auto', by_store: bool = False, horizon: int = DEFAULT_HORIZON,
+                       workers: Optional[int] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Forecast every series of a stored dataset and store the results.
+    Vectorized backends fit all series in one call. Otherwise workers=None
+    uses one process per CPU; workers=1 (and fast backends) fit in-process,
+    where the per-series timeout is only enforced on the main thread. A
+    catalog of a single chunk still goes to a worker process when a timeout
+    is set and could not be enforced in-process. Returns the run summary,
+    also stored as the run's metadata; its timeouts_enforced tells whether
+    the timeout applied to every fit.
+    """
+    if not (dataset.path and is_dataset(dataset.path)):
+        raise ValueError("Batch forecasting needs a stored dataset")
+    backend = resolve_backend(backend)
+    store = ForecastStore(dataset.path, backend, by_store)
+    started = time.time()
+    run = {'started': started, 'content_hash': dataset.content_hash}
+    try:
+        series = sales_series(dataset, by_store)
+        first_day = series['first_day'].to_datetime64().astype('datetime64[D]')
+        last_day = int((series['last_day'] - series['first_day']) // pd.Timedelta(days=1))
+        tasks = [{'series': i, 'day': series['day'][start:end], 'revenue': series['revenue'][start:end],
+                  'first_day': first_day, 'last_day': last_day}
+                 for i, (start, end) in enumerate(zip(series['starts'], series['ends']))]
+        chunks = [tasks[i:i + CHUNK_SERIES] for i in range(0, len(tasks), CHUNK_SERIES)]
+        workers = workers or os.cpu_count() or 1
+        store.write_status(state='running', series=len(tasks), completed=0, **run)
+
+        # Runs in the background are off the main thread, where only a worker process can interrupt a fit
+        single_chunk = len(chunks) <= 1 and (not timeout or alarm_available())
+        if backend in VECTORIZED_BACKENDS:
+            results = forecast_vectorized(backend, tasks, horizon)
+            enforced = False
+        elif workers <= 1 or single_chunk or backend in IN_PROCESS_BACKENDS:
+            enforced = alarm_available()
+            results = []
+            for chunk in chunks:
+                results.extend(forecast_chunk(backend, chunk, horizon, timeout))
+                store.write_status(state='running', series=len(tasks), completed=len(results), **run)
+        else:
+            # Spawned workers avoid forking a threaded web server process
+            context = multiprocessing.get_context('spawn')
+            results = []
+            enforced = hasattr(signal, 'SIGALRM')
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as executor:
+                futures = [executor.submit(forecast_chunk, backend, chunk, horizon, timeout) for chunk in chunks]
+                for future in futures:
+                    results.extend(future.result())
+                    store.write_status(state='running', series=len(tasks), completed=len(results), **run)
+
+        statuses = pd.Series([result['status'] for result in results]).value_counts()
+        summary = {
+            'backend': backend,
+            'by_store': by_store,
+            'horizon': horizon,
+            'content_hash': dataset.content_hash,
+            'last_day': series['last_day'].strftime('%Y-%m-%d'),
+            'series': len(results),
+            'statuses': {status: int(count) for status, count in statuses.items()},
+            'timeout': timeout,
+            'timeouts_enforced': bool(timeout) and enforced,
+            'seconds': round(time.time() - started, 3),
+        }
+        store.save(series['keys'], results, summary)
+        store.write_status(state='complete', series=len(results), completed=len(results), **run)
+        print(f"Batch forecast: {len(results)} series with {backend} in {summary['seconds']:.1f}s "
+              f"({', '.join(f'{count} {status}' for status, count in summary['statuses'].items())})")
+        return summary
+    except Exception as e:
+        store.write_status(state='failed', error=str(e), **run)
+        raise
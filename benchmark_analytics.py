@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark: grouped analytics kernels vs. the per-product loops they replaced
+
+Usage: python benchmark_analytics.py [products] [rows]
+"""
+
+import os
+import sys
+import time
+import json
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sales_dataset import SalesDataset
+from growth_analytics import GrowthAnalytics, flag_anomalies, fit_trends, group_offsets
+import chart_spec as charts
+
+
+def create_sales_data(rows, products):
+    """Synthetic transactions over a year for a large catalog"""
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        'product': np.char.add('SKU-', rng.integers(0, products, rows).astype(str)).astype(object),
+        'quantity': rng.integers(0, 20, rows),
+        'price': np.round(rng.uniform(1, 500, rows), 2),
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D'),
+    })
+    df['revenue'] = df['quantity'] * df['price']
+    return df
+
+
+def loop_product_lifecycle(processed_df):
+    """The per-product filtering loop detect_product_lifecycle used to run"""
+    product_trends = processed_df.groupby(['product', 'date'])['revenue'].sum().reset_index()
+    lifecycle_data = []
+    for product in processed_df['product'].unique():
+        product_data = product_trends[product_trends['product'] == product].sort_values('date')
+        if len(product_data) < 3:
+            stage, confidence = 'Launch', 'Low'
+        else:
+            y = product_data['revenue'].values
+            recent_avg = y[-3:].mean()
+            early_avg = y[:3].mean()
+            trend = (recent_avg - early_avg) / early_avg if early_avg > 0 else 0
+            if trend > 0.2:
+                stage = 'Growth'
+            elif trend > -0.1:
+                stage = 'Mature'
+            else:
+                stage = 'Decline'
+            confidence = 'High' if len(product_data) > 10 else 'Medium'
+        lifecycle_data.append({'product': str(product), 'stage': stage, 'confidence': confidence})
+    return lifecycle_data
+
+
+def loop_anomalies(processed_df):
+    """The per-product IQR loop detect_anomalies used to run, without its truncation to 5"""
+    daily_sales = processed_df.groupby(['product', 'date'])['revenue'].sum().reset_index()
+    anomalies = []
+    for product in processed_df['product'].unique():
+        product_data = daily_sales[daily_sales['product'] == product]['revenue']
+        if len(product_data) >= 5:
+            q1 = product_data.quantile(0.25)
+            q3 = product_data.quantile(0.75)
+            iqr = q3 - q1
+            lower_bound = q1 - 1.5 * iqr
+            upper_bound = q3 + 1.5 * iqr
+            for value in product_data[(product_data < lower_bound) | (product_data > upper_bound)]:
+                severity = 'high' if abs(value - product_data.median()) > 2 * product_data.std() else 'medium'
+                anomalies.append((str(product), float(value), severity))
+    return anomalies
+
+
+def loop_trends(x, values, starts, ends):
+    """One sklearn LinearRegression per product, as a per-product trend used to be fitted"""
+    from sklearn.linear_model import LinearRegression
+    return [LinearRegression().fit(x[start:end, None], values[start:end]).coef_[0]
+            for start, end in zip(starts, ends)]
+
+
+def create_daily_sales(products, days):
+    """A (product, date) revenue series with products x days rows"""
+    rng = np.random.default_rng(7)
+    index = pd.MultiIndex.from_product(
+        [[f'SKU-{i:06d}' for i in range(products)], pd.date_range('2024-01-01', periods=days)],
+        names=['product', 'date'])
+    return pd.Series(rng.gamma(2.0, 50.0, len(index)), index=index, name='revenue')
+
+
+def figure_json(dates, revenues, future_dates, predictions):
+    """The revenue trend chart as predict_revenue_trend used to build it"""
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=dates, y=revenues, mode='lines+markers', name='Actual Revenue',
+                             line=dict(color='#0d6efd', width=3)))
+    fig.add_trace(go.Scatter(x=future_dates, y=predictions, mode='lines', name='Predicted Revenue',
+                             line=dict(color='#198754', width=2, dash='dash')))
+    fig.update_layout(title='Revenue Trend Prediction', xaxis_title='Date', yaxis_title='Revenue ($)',
+                      template='plotly_white', height=400)
+    return fig.to_json()
+
+
+def chart_spec_json(dates, revenues, future_dates, predictions):
+    """The same chart as a compact chart spec"""
+    traces = [
+        charts.scatter(dates, revenues, mode='lines+markers', name='Actual Revenue',
+                       line={'color': '#0d6efd', 'width': 3}),
+        charts.scatter(future_dates, predictions, mode='lines', name='Predicted Revenue',
+                       line={'color': '#198754', 'width': 2, 'dash': 'dash'}),
+    ]
+    return json.dumps(charts.chart(traces, charts.layout(title='Revenue Trend Prediction', xaxis_title='Date',
+                                                         yaxis_title='Revenue ($)', height=400)))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+
+    print(f"Creating {rows:,} rows over {products:,} products...")
+    dataset = SalesDataset.from_frame(create_sales_data(rows, products))
+    analytics = GrowthAnalytics(dataset)
+
+    print("\nProduct lifecycle")
+    batched, batched_time = timed(analytics.detect_product_lifecycle)
+    print(f"Grouped pass:     {batched_time:.2f}s")
+    looped, loop_time = timed(loop_product_lifecycle, dataset.frame)
+    print(f"Per-product loop: {loop_time:.2f}s  speedup {loop_time / batched_time:.1f}x")
+
+    stages = [(item['product'], item['stage'], item['confidence']) for item in batched]
+    assert stages == [(item['product'], item['stage'], item['confidence']) for item in looped]
+    print(f"✓ Identical stages for {len(stages):,} products")
+
+    print("\nAnomaly detection")
+    daily_sales = dataset.frame.groupby(['product', 'date'], sort=True)['revenue'].sum()
+    flagged, batched_time = timed(flag_anomalies, daily_sales, top_n=None)
+    print(f"Grouped pass:     {batched_time:.2f}s  ({len(daily_sales):,} daily rows)")
+    looped, loop_time = timed(loop_anomalies, dataset.frame)
+    print(f"Per-product loop: {loop_time:.2f}s  speedup {loop_time / batched_time:.1f}x")
+
+    severity = np.where(flagged['deviation'] > 2 * flagged['std'], 'high', 'medium')
+    found = sorted(zip(flagged['product'].astype(str), flagged['value'], severity))
+    assert found == sorted(looped)
+    print(f"✓ Identical {len(found):,} anomalies")
+
+    print("\nPer-product trend regression")
+    product_daily = analytics.graph.get('product_daily_revenue')
+    values, starts, ends, _ = group_offsets(product_daily)
+    days = ((product_daily.index.get_level_values(1) - product_daily.index.levels[1].min())
+            / pd.Timedelta(days=1)).to_numpy()
+    fit, batched_time = timed(fit_trends, days, values, starts, ends)
+    print(f"Batched solve:    {batched_time:.3f}s  ({len(starts):,} series)")
+    slopes, loop_time = timed(loop_trends, days, values, starts, ends)
+    print(f"LinearRegression: {loop_time:.2f}s  speedup {loop_time / batched_time:.0f}x")
+    assert np.allclose(slopes, fit['slope'])
+    print("✓ Identical slopes")
+
+    daily_sales = create_daily_sales(10_000, 100)
+    _, elapsed = timed(flag_anomalies, daily_sales)
+    print(f"Top 5 of {len(daily_sales):,} daily product rows: {elapsed:.2f}s")
+
+    print("\nRevenue trend chart (one year of days)")
+    rng = np.random.default_rng(3)
+    every_day = pd.date_range('2024-01-01', periods=365).to_numpy()
+    future = (pd.date_range('2025-01-01', periods=30).to_numpy(), rng.gamma(2.0, 500.0, 30))
+    repeats = 20
+    # Days without sales leave gaps that have to be sent date by date
+    for label, dates in [('every day', every_day), ('with gaps', np.sort(rng.choice(every_day, 330, replace=False)))]:
+        chart_args = (dates, rng.gamma(2.0, 500.0, len(dates))) + future
+        figure, figure_time = timed(lambda: [figure_json(*chart_args) for _ in range(repeats)])
+        spec, spec_time = timed(lambda: [chart_spec_json(*chart_args) for _ in range(repeats)])
+        # Figure JSON was embedded in the response as a string, escaping its quotes
+        figure_bytes, spec_bytes = len(json.dumps(figure[0])), len(spec[0])
+        print(f"{label}: go.Figure + to_json {figure_time / repeats * 1000:.1f}ms {figure_bytes:,} bytes, "
+              f"chart spec {spec_time / repeats * 1000:.2f}ms {spec_bytes:,} bytes "
+              f"({figure_time / spec_time:.0f}x faster, {figure_bytes / spec_bytes:.1f}x smaller)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial upload ingestion vs. the parallel byte-range CSV parser
+
+Usage: python benchmark_ingest.py [rows] [max_workers]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from column_mapper import ColumnMapper
+from data_store import save_dataset, load_dataset
+from ingest import parallel_csv_to_dataset
+
+
+def create_sales_csv(path, rows):
+    """Write a synthetic POS export"""
+    rng = np.random.default_rng(42)
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D')
+    df = pd.DataFrame({
+        'Product': np.char.add('SKU-', rng.integers(0, 5000, rows).astype(str)),
+        'Quantity': rng.integers(1, 50, rows),
+        'Price': np.round(rng.uniform(1, 500, rows), 2),
+        'Date': dates.strftime('%Y-%m-%d'),
+        'Store': np.char.add('Store ', rng.integers(1, 40, rows).astype(str)),
+    })
+    df.to_csv(path, index=False)
+
+
+def serial_upload(csv_path, dataset_path, mapper):
+    """Mirror of the in-memory upload_file path"""
+    df = pd.read_csv(csv_path)
+    mapping = mapper.detect_column_mapping(df)['mappings']
+    save_dataset(mapper.apply_mapping(df, mapping), dataset_path)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    workdir = tempfile.mkdtemp(prefix='sda_ingest_bench_')
+    csv_path = os.path.join(workdir, 'export.csv')
+    mapper = ColumnMapper()
+
+    try:
+        print(f"Creating {rows:,} row CSV...")
+        create_sales_csv(csv_path, rows)
+        size_mb = os.path.getsize(csv_path) / 1024 ** 2
+        print(f"File size: {size_mb:.1f}MB, CPUs: {os.cpu_count()}")
+
+        serial_path = os.path.join(workdir, 'serial')
+        baseline = timed(serial_upload, csv_path, serial_path, mapper)
+        print(f"\nSerial upload_file path: {baseline:.2f}s")
+
+        # Ranges sized so every worker gets several to balance load
+        range_bytes = max(1024 * 1024, int(os.path.getsize(csv_path) / (max_workers * 4)))
+        workers = 1
+        while workers <= max_workers:
+            parallel_path = os.path.join(workdir, f'parallel_{workers}')
+            elapsed = timed(parallel_csv_to_dataset, csv_path, parallel_path, mapper,
+                            workers=workers, range_bytes=range_bytes)
+            print(f"Parallel, {workers:2d} workers: {elapsed:.2f}s  speedup {baseline / elapsed:.2f}x")
+            workers *= 2
+
+        # The parallel store must match the serial one row for row
+        pd.testing.assert_frame_equal(load_dataset(serial_path), load_dataset(parallel_path))
+        print("\n✓ Parallel result matches serial ingestion")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one data quality profile vs. per-view full-table passes
+
+Times the passes the report, growth, health and cleaning views used to make
+over a raw upload each (isnull, duplicated, quantiles, to_numeric and date
+parsing again per view) against building one DataProfile and rendering all
+four views from it.
+
+Usage: python benchmark_profile.py [rows]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from data_profile import profile_frame
+from date_parser import parse_dates
+from data_cleaner import SmartDataCleaner
+from routes import detect_data_quality_issues
+
+VIEWS = 4
+
+
+def create_upload(rows):
+    """A raw upload with missing values, duplicates, bad numbers and bad dates"""
+    rng = np.random.default_rng(5)
+    price = np.round(rng.lognormal(3, 1, rows), 2)
+    price[rng.random(rows) < 0.02] = np.nan
+    df = pd.DataFrame({
+        'product': np.char.add('SKU-', rng.integers(0, 1000, rows).astype(str)).astype(object),
+        'quantity': rng.integers(-1, 10, rows),
+        'price': price,
+        'amount': np.where(rng.random(rows) < 0.01, 'n/a', price.astype(str)).astype(object),
+        'date': (pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D'))
+                .strftime('%Y-%m-%d').to_numpy(dtype=object),
+    })
+    return pd.concat([df, df.sample(frac=0.01, random_state=1)], ignore_index=True)
+
+
+def legacy_passes(df):
+    """The full-table passes each view made on its own"""
+    for _ in range(VIEWS):
+        df.isnull().sum()
+        df.duplicated().sum()
+    for col in df.select_dtypes(include=[np.number]).columns:
+        for _ in range(2):
+            q1, q3 = df[col].quantile(0.25), df[col].quantile(0.75)
+            ((df[col] < q1 - 1.5 * (q3 - q1)) | (df[col] > q3 + 1.5 * (q3 - q1))).sum()
+    for col in ['price', 'quantity', 'amount']:
+        for _ in range(2):
+            pd.to_numeric(df[col], errors='coerce')
+    parse_dates(df['date'])
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = create_upload(rows)
+    print(f"{len(df):,} rows, {len(df.columns)} columns\n")
+
+    _, legacy_time = timed(legacy_passes, df)
+    profile, profile_time = timed(profile_frame, df)
+    _, render_time = timed(lambda: (detect_data_quality_issues(profile),
+                                    SmartDataCleaner(df, profile=profile).analyze_data_quality()))
+    print(f"Per-view passes:  {legacy_time:.2f}s")
+    print(f"One profile:      {profile_time:.2f}s  (+{render_time * 1000:.1f} ms to render the views)")
+    print(f"Speedup: {legacy_time / (profile_time + render_time):.1f}x")
+    print(f"\nDuplicates {profile.duplicates:,}, missing {profile.missing_total:,}, "
+          f"non-numeric amounts {profile.numeric['amount']['non_numeric']:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: exact vs. sampled customer segmentation
+
+Fits KMeans over every customer and on a stratified sample, and reports the
+time of each and how stable the sampled segments are against the exact ones.
+
+Usage: python benchmark_segmentation.py [customers] [sample_size]
+"""
+
+import os
+import sys
+import time
+from itertools import permutations
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sales_dataset import SalesDataset
+from advanced_analytics import AdvancedAnalytics, cluster_customers
+
+
+def create_customer_sales(customers, rows_per_customer=3):
+    """Transactions from a customer base with long-tailed basket values"""
+    rng = np.random.default_rng(11)
+    rows = customers * rows_per_customer
+    customer = rng.integers(0, customers, rows)
+    df = pd.DataFrame({
+        'customer_id': np.char.add('C', customer.astype(str)).astype(object),
+        'product': np.char.add('SKU-', rng.integers(0, 500, rows).astype(str)).astype(object),
+        'quantity': rng.integers(1, 10, rows),
+        'price': np.round(rng.lognormal(3, 1, rows), 2),
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D'),
+    })
+    df['revenue'] = df['quantity'] * df['price']
+    return df
+
+
+def standardized_features(dataset):
+    """The standardized RFM matrix customer_segmentation clusters"""
+    features = dataset.cube.customer_features()
+    features['recency'] = (pd.Timestamp('2025-01-01') - features['last_purchase']).dt.days
+    X = features[['total_revenue', 'avg_revenue', 'frequency', 'recency']].fillna(0).to_numpy(dtype=float)
+    return (X - X.mean(axis=0)) / X.std(axis=0)
+
+
+def agreement(exact, sampled, n_clusters=3):
+    """Share of customers in the same segment under the best matching of cluster ids"""
+    return max(np.mean(np.asarray(mapping)[sampled] == exact) for mapping in permutations(range(n_clusters)))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    customers = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    sample_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+
+    print(f"Creating sales from {customers:,} customers...")
+    dataset = SalesDataset.from_frame(create_customer_sales(customers))
+    X = standardized_features(dataset)
+    print(f"{len(X):,} customers with purchases")
+
+    from sklearn.metrics import adjusted_rand_score
+
+    (exact, _), exact_time = timed(cluster_customers, X, exact_limit=len(X))
+    print(f"\nExact KMeans:   {exact_time:.2f}s")
+    for size in [sample_size // 4, sample_size, sample_size * 4]:
+        (sampled, _), sampled_time = timed(cluster_customers, X, exact_limit=0, sample_size=size)
+        print(f"Sampled {size:>7,}: {sampled_time:.2f}s  speedup {exact_time / sampled_time:.1f}x  "
+              f"agreement {agreement(exact, sampled):.1%}  adjusted Rand {adjusted_rand_score(exact, sampled):.3f}")
+
+    print("\nSegment sizes (exact vs sampled)")
+    sampled, _ = cluster_customers(X, exact_limit=0, sample_size=sample_size)
+    exact_sizes = np.sort(np.bincount(exact, minlength=3))[::-1]
+    sampled_sizes = np.sort(np.bincount(sampled, minlength=3))[::-1]
+    for exact_size, sampled_size in zip(exact_sizes, sampled_sizes):
+        print(f"  {exact_size:>9,}  {sampled_size:>9,}")
+
+    print("\n/advanced-analytics customer_segmentation section")
+    for label, limit in [('exact', len(X)), ('sampled', 0)]:
+        analytics = AdvancedAnalytics(dataset, segmentation_exact_limit=limit, segmentation_sample_size=sample_size)
+        result, elapsed = timed(analytics.customer_segmentation)
+        segments = ', '.join(f"{s['segment']} {s['count']:,}" for s in result['segments'])
+        print(f"  {label:8s} {elapsed:.2f}s  {segments}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold import time of the app, to catch startup regressions
+
+Each run imports the app in a fresh interpreter, as a worker respawn does.
+Reports the median import time, the slowest modules from -X importtime,
+lazily loaded dependencies that were imported anyway, and the warm-up cost.
+Exits non-zero when the median exceeds the optional budget in seconds.
+
+Usage: python benchmark_startup.py [runs] [budget_seconds]
+"""
+
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_APP = """
+import json, sys, time
+start = time.perf_counter()
+import app, routes
+elapsed = time.perf_counter() - start
+result = {'seconds': elapsed, 'eager': [m for m in routes.LAZY_MODULES if m in sys.modules]}
+if '--warm-up' in sys.argv:
+    result['warm_up'] = routes.warm_up()
+print('RESULT ' + json.dumps(result))
+"""
+
+
+def run_import(*python_args, warm_up=False):
+    """Import the app in a fresh interpreter; returns the child's result and stderr"""
+    command = [sys.executable, *python_args, '-c', IMPORT_APP] + (['--warm-up'] if warm_up else [])
+    child = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True)
+    line = next(line for line in child.stdout.splitlines() if line.startswith('RESULT '))
+    return json.loads(line[len('RESULT '):]), child.stderr
+
+
+def slowest_modules(importtime_log, count=10, max_depth=2):
+    """Modules with the largest cumulative import time in a -X importtime log, down to max_depth"""
+    modules = []
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= max_depth:
+            modules.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(modules, reverse=True)[:count]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    # The first run also warms the filesystem and bytecode caches
+    run_import()
+    results = [run_import()[0] for _ in range(runs)]
+    median = statistics.median(result['seconds'] for result in results)
+    print(f"Cold 'import app' over {runs} runs: median {median:.3f}s, "
+          f"min {min(r['seconds'] for r in results):.3f}s")
+
+    _, log = run_import('-X', 'importtime')
+    print("\nSlowest imports (cumulative seconds, one run; a module includes what it imports):")
+    for seconds, name in slowest_modules(log):
+        print(f"  {seconds:6.3f}s  {name}")
+
+    eager = results[-1]['eager']
+    if eager:
+        print(f"\n✗ Imported at startup although loaded lazily: {', '.join(eager)}")
+    else:
+        print("\n✓ No lazily loaded dependency imported at startup")
+
+    warm, _ = run_import(warm_up=True)
+    print(f"\nWarm-up (WARM_UP_IMPORTS / gunicorn --preload): {sum(warm['warm_up'].values()):.2f}s")
+    for step, seconds in warm['warm_up'].items():
+        print(f"  {seconds:6.3f}s  {step}")
+
+    if budget is not None and (median > budget or eager):
+        print(f"\n✗ Startup budget of {budget:g}s exceeded")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
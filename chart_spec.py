@@ -0,0 +1,147 @@
+"""
+Compact Chart Specs for Smart Data Analyzer
+Plotly-compatible chart payloads built straight from NumPy arrays. Numeric
+arrays travel as base64 typed arrays and the layout only names its template,
+which the browser fetches once from /chart-template/<name> and caches, instead
+of every figure embedding the whole template the way fig.to_json() does.
+"""
+
+import json
+import base64
+import hashlib
+from functools import lru_cache
+import numpy as np
+from typing import Dict, List, Optional, Any, Sequence, Tuple
+
+CHART_SPEC_VERSION = 1
+DEFAULT_TEMPLATE = 'plotly_white'
+# Integer dtypes plotly.js can decode from typed arrays (it has no 64-bit integers)
+INT_DTYPES = [np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32]
+
+
+def encode_array(values) -> Any:
+    """
+    Plotly.js-ready form of one data array.
+    Numbers become {'dtype', 'bdata'} typed arrays (NaN stays a gap), dates
+    become ISO strings (day precision when every value is at midnight) and
+    anything else a plain list.
+    """
+    array = np.asarray(values)
+    if array.dtype.kind == 'M':
+        unit = 'D' if not (array.astype('datetime64[D]') != array).any() else 's'
+        return np.datetime_as_string(array, unit=unit).tolist()
+    if array.dtype.kind in 'iub':
+        array = array.astype(np.int64)
+        for dtype in INT_DTYPES:
+            info = np.iinfo(dtype)
+            if not len(array) or (array.min() >= info.min and array.max() <= info.max):
+                array = array.astype(dtype)
+                break
+        else:
+            array = array.astype(np.float64)
+    elif array.dtype.kind == 'f':
+        array = array.astype(np.float64)
+    else:
+        return [value if isinstance(value, str) else str(value) for value in array.tolist()]
+    little_endian = array.astype(array.dtype.newbyteorder('<'), copy=False)
+    return {'dtype': little_endian.dtype.str[1:], 'bdata': base64.b64encode(little_endian.tobytes()).decode('ascii')}
+
+
+def decode_array(encoded) -> np.ndarray:
+    """Inverse of encode_array for typed arrays; lists are returned as arrays"""
+    if isinstance(encoded, dict):
+        return np.frombuffer(base64.b64decode(encoded['bdata']), dtype='<' + encoded['dtype'])
+    return np.asarray(encoded)
+
+
+def encode_axis(axis: str, values) -> Dict[str, Any]:
+    """
+    Trace attributes for one coordinate array.
+    Evenly spaced dates or integers (daily series, hours) are sent as a start
+    and step, x0/dx in plotly.js terms, instead of one value per point.
+    """
+    array = np.asarray(values)
+    if len(array) > 2 and array.dtype.kind in 'Miu':
+        steps = np.diff(array)
+        if array.dtype.kind == 'M':
+            if not np.isnat(array).any() and (steps == steps[0]).all() and steps[0] > np.timedelta64(0):
+                step_ms = steps[0] / np.timedelta64(1, 'ms')
+                return {f'{axis}0': encode_array(array[:1])[0], f'd{axis}': float(step_ms)}
+        elif (steps == steps[0]).all() and steps[0] > 0:
+            return {f'{axis}0': int(array[0]), f'd{axis}': int(steps[0])}
+    return {axis: encode_array(array)}
+
+
+def scatter(x, y, **attributes) -> Dict[str, Any]:
+    """Scatter/line trace; attributes are plotly.js trace attributes (mode, name, line, ...)"""
+    return {'type': 'scatter', **encode_axis('x', x), 'y': encode_array(y), **attributes}
+
+
+def bar(x, y, **attributes) -> Dict[str, Any]:
+    """Bar trace; attributes are plotly.js trace attributes (marker, text, ...)"""
+    return {'type': 'bar', **encode_axis('x', x), 'y': encode_array(y), **attributes}
+
+
+def pie(labels, values, colors: Optional[Dict[str, str]] = None, **attributes) -> Dict[str, Any]:
+    """Pie trace, with optional colors by label"""
+    trace = {'type': 'pie', 'labels': encode_array(labels), 'values': encode_array(values), **attributes}
+    if colors:
+        trace['marker'] = {'colors': [colors.get(str(label)) for label in labels]}
+    return trace
+
+
+def layout(title: Optional[str] = None, xaxis_title: Optional[str] = None,
+           yaxis_title: Optional[str] = None, **attributes) -> Dict[str, Any]:
+    """Figure layout; titles use plotly's {'text': ...} form"""
+    result = {}
+    if title is not None:
+        result['title'] = {'text': title}
+    if xaxis_title is not None:
+        result['xaxis'] = {'title': {'text': xaxis_title}}
+    if yaxis_title is not None:
+        result['yaxis'] = {'title': {'text': yaxis_title}}
+    result.update(attributes)
+    return result
+
+
+def stacked_rows(rows: Sequence[Sequence[Dict[str, Any]]], titles: Sequence[str],
+                 vertical_spacing: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Traces and layout for charts stacked in one column, the arrangement of
+    make_subplots(rows=n, cols=1, subplot_titles=titles).
+    Each row's traces are bound to that row's axes.
+    """
+    count = len(rows)
+    spacing = 0.3 / count if vertical_spacing is None else vertical_spacing
+    height = (1 - spacing * (count - 1)) / count
+    traces, axes, annotations = [], {}, []
+    for row, (row_traces, title) in enumerate(zip(rows, titles)):
+        suffix = str(row + 1) if row else ''
+        bottom = round((count - 1 - row) * (height + spacing), 12)
+        top = round(bottom + height, 12)
+        traces.extend({**trace, 'xaxis': f'x{suffix}', 'yaxis': f'y{suffix}'} for trace in row_traces)
+        axes[f'xaxis{suffix}'] = {'anchor': f'y{suffix}', 'domain': [0.0, 1.0]}
+        axes[f'yaxis{suffix}'] = {'anchor': f'x{suffix}', 'domain': [bottom, top]}
+        annotations.append({'text': title, 'x': 0.5, 'y': top, 'xref': 'paper', 'yref': 'paper',
+                            'xanchor': 'center', 'yanchor': 'bottom', 'showarrow': False, 'font': {'size': 16}})
+    return traces, {**axes, 'annotations': annotations}
+
+
+def chart(traces: List[Dict[str, Any]], layout: Dict[str, Any], template: str = DEFAULT_TEMPLATE) -> Dict[str, Any]:
+    """Chart payload: plotly.js data and layout plus the name of the shared template to apply"""
+    return {'version': CHART_SPEC_VERSION, 'template': template, 'data': traces, 'layout': layout}
+
+
+@lru_cache(maxsize=None)
+def template_json(name: str) -> Tuple[str, str]:
+    """
+    A Plotly template serialized once per process, with an ETag for it.
+    Raises KeyError for unknown template names.
+    """
+    import plotly.io as pio
+    from plotly.utils import PlotlyJSONEncoder
+
+    if name not in pio.templates:
+        raise KeyError(name)
+    body = json.dumps(pio.templates[name].to_plotly_json(), cls=PlotlyJSONEncoder, separators=(',', ':'))
+    return body, hashlib.sha256(body.encode('utf-8')).hexdigest()[:16]
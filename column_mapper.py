@@ -5,8 +5,8 @@ Automatically detects and maps various column name patterns to standard fields
 
 import pandas as pd
 import re
-from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Any
+from date_parser import DATE_FORMATS, DateParser, parse_dates
 
 class ColumnMapper:
     def __init__(self):
@@ -37,20 +37,8 @@ class ColumnMapper:
             ]
         }
         
-        # Date format patterns to try
-        self.date_formats = [
-            '%Y-%m-%d',      # ISO: 2023-12-25
-            '%Y/%m/%d',      # 2023/12/25
-            '%d/%m/%Y',      # UK: 25/12/2023
-            '%m/%d/%Y',      # US: 12/25/2023
-            '%d-%m-%Y',      # 25-12-2023
-            '%m-%d-%Y',      # 12-25-2023
-            '%Y-%m-%d %H:%M:%S',  # With time
-            '%Y/%m/%d %H:%M:%S',
-            '%d/%m/%Y %H:%M:%S',
-            '%m/%d/%Y %H:%M:%S',
-            '%Y-%m-%dT%H:%M:%S',  # ISO with T
-        ]
+        # Date format patterns to try (shared with the date parsing engine)
+        self.date_formats = list(DATE_FORMATS)
     
     def detect_column_mapping(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
@@ -205,34 +193,13 @@ class ColumnMapper:
     def _validate_date_column(self, df: pd.DataFrame, date_column: str) -> Dict[str, Any]:
         """Validate and detect date format"""
         try:
-            sample_dates = df[date_column].dropna().head(10).astype(str)
-            detected_format = None
-            success_rate = 0.0
-            
-            for date_format in self.date_formats:
-                try:
-                    successful_parses = 0
-                    for date_str in sample_dates:
-                        try:
-                            datetime.strptime(date_str, date_format)
-                            successful_parses += 1
-                        except:
-                            continue
-                    
-                    current_rate = successful_parses / len(sample_dates)
-                    if current_rate > success_rate:
-                        success_rate = current_rate
-                        detected_format = date_format
-                        
-                    # If we get high success rate, stop searching
-                    if success_rate > 0.8:
-                        break
-                        
-                except Exception:
-                    continue
+            detection = DateParser(self.date_formats).detect(df[date_column].dropna().head(200))
+            success_rate = detection['coverage']
             
             return {
-                'format': detected_format,
+                'format': detection['formats'][0] if detection['formats'] else None,
+                'formats': detection['formats'],
+                'dayfirst': detection['dayfirst'],
                 'confidence': success_rate,
                 'parseable': success_rate > 0.5
             }
@@ -240,8 +207,12 @@ class ColumnMapper:
         except Exception as e:
             return {'error': str(e), 'parseable': False}
     
-    def apply_mapping(self, df: pd.DataFrame, mapping: Dict[str, str]) -> pd.DataFrame:
-        """Apply the column mapping and return standardized DataFrame"""
+    def apply_mapping(self, df: pd.DataFrame, mapping: Dict[str, str],
+                      dayfirst: Optional[bool] = None) -> pd.DataFrame:
+        """
+        Apply the column mapping and return standardized DataFrame.
+        Pass dayfirst to keep ambiguous dates consistent across chunks.
+        """
         try:
             # Create a copy to avoid modifying original
             result_df = df.copy()
@@ -252,7 +223,7 @@ class ColumnMapper:
             
             # Process date column if present
             if 'date' in result_df.columns:
-                result_df['date'] = self._standardize_dates(result_df['date'])
+                result_df['date'] = self._standardize_dates(result_df['date'], dayfirst)
                 # Remove rows with invalid dates
                 result_df = result_df.dropna(subset=['date'])
             
@@ -270,23 +241,9 @@ class ColumnMapper:
         except Exception as e:
             raise ValueError(f"Error applying column mapping: {str(e)}")
     
-    def _standardize_dates(self, date_series: pd.Series) -> pd.Series:
+    def _standardize_dates(self, date_series: pd.Series, dayfirst: Optional[bool] = None) -> pd.Series:
         """Convert various date formats to standard datetime"""
-        # Try pandas built-in parsing first
-        try:
-            return pd.to_datetime(date_series, errors='coerce')
-        except:
-            pass
-        
-        # Try our custom formats
-        for date_format in self.date_formats:
-            try:
-                return pd.to_datetime(date_series, format=date_format, errors='coerce')
-            except:
-                continue
-        
-        # If all else fails, let pandas do its best
-        return pd.to_datetime(date_series, errors='coerce')
+        return parse_dates(date_series, dayfirst=dayfirst)
     
     def validate_required_fields(self, mapping: Dict[str, str]) -> Tuple[bool, List[str]]:
         """Validate that all required fields are mapped"""
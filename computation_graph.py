@@ -0,0 +1,67 @@
+"""
+Computation Graph for Smart Data Analyzer
+Named intermediate results computed lazily, once per analytics instance, and
+shared by every analysis that depends on them, with per-node timings
+"""
+
+import time
+import threading
+from typing import Dict, Any, Callable, Iterable
+
+
+class ComputationGraph:
+    """
+    Small dependency graph of memoized nodes.
+    A node's compute function is called with its dependencies' values, in
+    the order they were declared, the first time the node is requested;
+    later requests share the result. Failures are memoized too and re-raised.
+    Safe to share between threads: each node is computed by one thread while
+    others requesting it wait.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[str, Any] = {}
+        self._results: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, compute: Callable[..., Any], dependencies: Iterable[str] = ()) -> None:
+        """Register a node; dependencies must already be registered"""
+        dependencies = list(dependencies)
+        unknown = [dependency for dependency in dependencies if dependency not in self._nodes]
+        if unknown:
+            raise ValueError(f"Node '{name}' depends on unknown nodes: {', '.join(unknown)}")
+        self._nodes[name] = (compute, dependencies)
+        self._locks[name] = threading.Lock()
+        self._stats[name] = {'seconds': 0.0, 'computed': False, 'hits': 0}
+
+    def get(self, name: str):
+        """Value of a node, computing it and its dependencies on first use"""
+        if name not in self._nodes:
+            raise KeyError(f"Unknown computation node: {name}")
+        compute, dependencies = self._nodes[name]
+        with self._locks[name]:
+            if name not in self._results:
+                arguments = [self.get(dependency) for dependency in dependencies]
+                start = time.perf_counter()
+                try:
+                    self._results[name] = (True, compute(*arguments))
+                except Exception as e:
+                    self._results[name] = (False, e)
+                with self._lock:
+                    self._stats[name]['seconds'] = time.perf_counter() - start
+                    self._stats[name]['computed'] = True
+            else:
+                with self._lock:
+                    self._stats[name]['hits'] += 1
+            ok, value = self._results[name]
+        if not ok:
+            raise value
+        return value
+
+    def timings(self) -> Dict[str, Dict[str, Any]]:
+        """Seconds spent computing each evaluated node (excluding its dependencies) and reuse counts"""
+        with self._lock:
+            return {name: {'seconds': round(stats['seconds'], 6), 'hits': stats['hits']}
+                    for name, stats in self._stats.items() if stats['computed']}
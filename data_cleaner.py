@@ -5,14 +5,17 @@ Detects and reports data quality issues in uploaded Excel/CSV files
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from data_profile import profile_frame, matches
 
 class SmartDataCleaner:
-    def __init__(self, df):
-        """Initialize with uploaded DataFrame"""
+    def __init__(self, df, profile=None):
+        """Initialize with uploaded DataFrame, and its DataProfile when already built"""
         if df is None or df.empty:
             raise ValueError("Data cleaner requires valid uploaded data")
         
-        self.df = df.copy()
+        # Only read, never modified, so no copy is needed
+        self.df = df
+        self.profile = profile if profile is not None else profile_frame(df)
         self.issues = {}
         self.recommendations = []
         
@@ -34,54 +37,39 @@ class SmartDataCleaner:
     
     def _detect_missing_values(self):
         """Detect missing values in critical columns"""
-        missing_data = self.df.isnull().sum()
-        missing_pct = (missing_data / len(self.df) * 100).round(2)
-        
         critical_missing = {}
-        for col in self.df.columns:
-            if missing_data[col] > 0:
-                col_lower = col.lower()
-                if any(keyword in col_lower for keyword in ['price', 'cost', 'amount', 'quantity', 'qty', 'product', 'item']):
-                    critical_missing[col] = {
-                        'count': int(missing_data[col]),
-                        'percentage': float(missing_pct[col])
-                    }
+        for col, count in self.profile.nulls.items():
+            if count > 0 and matches(col, ['price', 'cost', 'amount', 'quantity', 'qty', 'product', 'item']):
+                critical_missing[col] = {
+                    'count': count,
+                    'percentage': float(round(self.profile.percentage(count), 2))
+                }
         
         if critical_missing:
             self.issues['missing_values'] = critical_missing
     
     def _detect_duplicates(self):
         """Detect duplicate records"""
-        duplicate_count = self.df.duplicated().sum()
+        duplicate_count = self.profile.duplicates
         if duplicate_count > 0:
             self.issues['duplicates'] = {
-                'count': int(duplicate_count),
-                'percentage': round(duplicate_count / len(self.df) * 100, 2)
+                'count': duplicate_count,
+                'percentage': round(self.profile.percentage(duplicate_count), 2)
             }
     
     def _detect_outliers(self):
         """Detect outliers in numeric columns using IQR method"""
-        numeric_cols = self.df.select_dtypes(include=[np.number]).columns
         outliers = {}
         
-        for col in numeric_cols:
-            if 'price' in col.lower() or 'cost' in col.lower() or 'amount' in col.lower() or 'quantity' in col.lower():
-                Q1 = self.df[col].quantile(0.25)
-                Q3 = self.df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                
-                outlier_mask = (self.df[col] < lower_bound) | (self.df[col] > upper_bound)
-                outlier_count = outlier_mask.sum()
-                
-                if outlier_count > 0:
-                    outliers[col] = {
-                        'count': int(outlier_count),
-                        'percentage': round(outlier_count / len(self.df) * 100, 2),
-                        'min_value': float(self.df[col].min()),
-                        'max_value': float(self.df[col].max())
-                    }
+        for col in self.profile.numeric_columns(['price', 'cost', 'amount', 'quantity'], numeric_dtype=True):
+            outlier_count = self.profile.stat(col, 'outliers')
+            if outlier_count > 0:
+                outliers[col] = {
+                    'count': outlier_count,
+                    'percentage': round(self.profile.percentage(outlier_count), 2),
+                    'min_value': self.profile.stat(col, 'min'),
+                    'max_value': self.profile.stat(col, 'max')
+                }
         
         if outliers:
             self.issues['outliers'] = outliers
@@ -91,19 +79,13 @@ class SmartDataCleaner:
         format_issues = {}
         
         # Check price/amount columns for non-numeric values
-        for col in self.df.columns:
-            col_lower = col.lower()
-            if 'price' in col_lower or 'cost' in col_lower or 'amount' in col_lower:
-                try:
-                    numeric_values = pd.to_numeric(self.df[col], errors='coerce')
-                    invalid_count = numeric_values.isnull().sum() - self.df[col].isnull().sum()
-                    if invalid_count > 0:
-                        format_issues[col] = {
-                            'issue': 'Non-numeric values in price column',
-                            'count': int(invalid_count)
-                        }
-                except:
-                    pass
+        for col in self.profile.numeric_columns(['price', 'cost', 'amount']):
+            invalid_count = self.profile.stat(col, 'non_numeric')
+            if invalid_count > 0:
+                format_issues[col] = {
+                    'issue': 'Non-numeric values in price column',
+                    'count': invalid_count
+                }
         
         if format_issues:
             self.issues['invalid_formats'] = format_issues
@@ -112,21 +94,16 @@ class SmartDataCleaner:
         """Detect negative values in price/quantity columns"""
         negative_issues = {}
         
-        for col in self.df.columns:
-            col_lower = col.lower()
-            if any(keyword in col_lower for keyword in ['price', 'cost', 'amount', 'quantity', 'qty']):
-                try:
-                    numeric_col = pd.to_numeric(self.df[col], errors='coerce')
-                    negative_count = (numeric_col < 0).sum()
-                    zero_count = (numeric_col == 0).sum()
-                    
-                    if negative_count > 0 or (zero_count > 0 and 'price' in col_lower):
-                        negative_issues[col] = {
-                            'negative_count': int(negative_count),
-                            'zero_count': int(zero_count) if 'price' in col_lower else 0
-                        }
-                except:
-                    pass
+        for col in self.profile.numeric_columns(['price', 'cost', 'amount', 'quantity', 'qty']):
+            negative_count = self.profile.stat(col, 'negative')
+            zero_count = self.profile.stat(col, 'zero')
+            is_price = 'price' in str(col).lower()
+            
+            if negative_count > 0 or (zero_count > 0 and is_price):
+                negative_issues[col] = {
+                    'negative_count': negative_count,
+                    'zero_count': zero_count if is_price else 0
+                }
         
         if negative_issues:
             self.issues['negative_zero_values'] = negative_issues
@@ -135,20 +112,12 @@ class SmartDataCleaner:
         """Analyze date column formats"""
         date_issues = {}
         
-        for col in self.df.columns:
-            col_lower = col.lower()
-            if 'date' in col_lower or 'time' in col_lower:
-                try:
-                    parsed_dates = pd.to_datetime(self.df[col], errors='coerce')
-                    invalid_dates = parsed_dates.isnull().sum() - self.df[col].isnull().sum()
-                    
-                    if invalid_dates > 0:
-                        date_issues[col] = {
-                            'invalid_count': int(invalid_dates),
-                            'sample_invalid': self.df[self.df[col].notna() & parsed_dates.isna()][col].head(3).tolist()
-                        }
-                except:
-                    pass
+        for col, dates in self.profile.dates.items():
+            if dates['invalid'] > 0:
+                date_issues[col] = {
+                    'invalid_count': dates['invalid'],
+                    'sample_invalid': dates['sample_invalid']
+                }
         
         if date_issues:
             self.issues['date_format_issues'] = date_issues
@@ -204,8 +173,8 @@ class SmartDataCleaner:
             'quality_score': quality_score,
             'status': status,
             'total_issues': total_issues,
-            'rows_analyzed': len(self.df),
-            'columns_analyzed': len(self.df.columns)
+            'rows_analyzed': self.profile.rows,
+            'columns_analyzed': len(self.profile.columns)
         }
     
     def get_cleaned_suggestions(self):
@@ -0,0 +1,138 @@
+"""
+Data Quality Profile for Smart Data Analyzer
+Profiles a DataFrame once: one pass per column for missing values, numeric
+coercion failures, negatives and zeros, quartiles and IQR outliers, and date
+parse failures, plus one hash per row for duplicates. The report, growth,
+health and cleaning views of data quality all render from the same profile.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Any
+
+from date_parser import parse_dates
+
+# Text columns with these words in their name are coerced to numbers, or parsed as dates
+NUMERIC_KEYWORDS = ['price', 'cost', 'amount', 'quantity', 'qty']
+DATE_KEYWORDS = ['date', 'time']
+# Invalid date values kept per column as examples
+DATE_SAMPLE_SIZE = 3
+
+
+def matches(column, keywords) -> bool:
+    """Whether a column name contains any of the keywords, ignoring case"""
+    return any(keyword in str(column).lower() for keyword in keywords)
+
+
+def count_duplicates(df: pd.DataFrame) -> int:
+    """Rows repeating an earlier row, from one 64-bit hash per row"""
+    if df.empty:
+        return 0
+    try:
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    except TypeError:
+        # Unhashable cell values (lists, dicts) need the row-by-row comparison
+        return int(df.duplicated().sum())
+    return int(len(hashes) - len(np.unique(hashes)))
+
+
+def numeric_stats(values: np.ndarray, missing: np.ndarray) -> Dict[str, Any]:
+    """
+    Negatives, zeros, range, quartiles and 1.5 IQR outliers of a float
+    column; missing marks the values that are NaN. Bounds and ranges are NaN
+    for columns without values, which then have no outliers.
+    """
+    present = values[~missing]
+    if not len(present):
+        return {'negative': 0, 'zero': 0, 'min': np.nan, 'max': np.nan, 'q1': np.nan, 'q3': np.nan, 'outliers': 0}
+    q1, q3 = np.quantile(present, [0.25, 0.75])
+    iqr = q3 - q1
+    outliers = (present < q1 - 1.5 * iqr) | (present > q3 + 1.5 * iqr)
+    return {
+        'negative': int(np.count_nonzero(present < 0)),
+        'zero': int(np.count_nonzero(present == 0)),
+        'min': float(present.min()),
+        'max': float(present.max()),
+        'q1': float(q1),
+        'q3': float(q3),
+        'outliers': int(np.count_nonzero(outliers)),
+    }
+
+
+class DataProfile:
+    """
+    Data quality statistics of one DataFrame.
+
+    rows, columns, dtypes: shape and dtype names.
+    nulls: missing values per column.
+    duplicates: rows repeating an earlier row.
+    numeric: per numeric column (numeric dtype, or a text column named like
+        a price/cost/amount/quantity), numeric_dtype, non_numeric (values
+        that failed numeric coercion), negative, zero, min, max, q1, q3 and
+        outliers outside 1.5 IQR.
+    dates: per column named like a date/time, invalid (values that failed
+        date parsing) and sample_invalid.
+    """
+
+    def __init__(self, rows: int, columns: List[str], dtypes: Dict[str, str], nulls: Dict[str, int],
+                 duplicates: int, numeric: Dict[str, Dict[str, Any]], dates: Dict[str, Dict[str, Any]]):
+        self.rows = rows
+        self.columns = columns
+        self.dtypes = dtypes
+        self.nulls = nulls
+        self.duplicates = duplicates
+        self.numeric = numeric
+        self.dates = dates
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> 'DataProfile':
+        numeric_columns = set(df.select_dtypes(include=[np.number]).columns)
+        nulls, numeric, dates = {}, {}, {}
+        for col in df.columns:
+            series = df[col]
+            if col in numeric_columns:
+                values = series.to_numpy(dtype=float, na_value=np.nan)
+                missing = np.isnan(values)
+                nulls[col] = int(missing.sum())
+                numeric[col] = {'numeric_dtype': True, 'non_numeric': 0, **numeric_stats(values, missing)}
+                continue
+
+            null = series.isna().to_numpy()
+            nulls[col] = int(null.sum())
+            if matches(col, NUMERIC_KEYWORDS):
+                values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+                missing = np.isnan(values)
+                numeric[col] = {'numeric_dtype': False, 'non_numeric': int(np.count_nonzero(missing & ~null)),
+                                **numeric_stats(values, missing)}
+            if matches(col, DATE_KEYWORDS):
+                if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                    dates[col] = {'invalid': 0, 'sample_invalid': []}
+                else:
+                    invalid = parse_dates(series).isna().to_numpy() & ~null
+                    dates[col] = {'invalid': int(invalid.sum()),
+                                  'sample_invalid': series[invalid].head(DATE_SAMPLE_SIZE).tolist()}
+
+        return cls(rows=len(df), columns=list(df.columns), dtypes={col: str(dtype) for col, dtype in df.dtypes.items()},
+                   nulls=nulls, duplicates=count_duplicates(df), numeric=numeric, dates=dates)
+
+    @property
+    def missing_total(self) -> int:
+        return sum(self.nulls.values())
+
+    def percentage(self, count: int) -> float:
+        """Share of rows, in percent"""
+        return count / self.rows * 100 if self.rows else 0.0
+
+    def numeric_columns(self, keywords: Optional[List[str]] = None, numeric_dtype: bool = False) -> List[str]:
+        """Profiled numeric columns, optionally only native numeric ones or ones named with a keyword"""
+        return [col for col, stats in self.numeric.items()
+                if (not numeric_dtype or stats['numeric_dtype']) and (keywords is None or matches(col, keywords))]
+
+    def stat(self, col, name: str, default=0):
+        """One numeric statistic of a column, default when the column is missing or not numeric"""
+        return self.numeric.get(col, {}).get(name, default)
+
+
+def profile_frame(df: pd.DataFrame) -> DataProfile:
+    """Data quality profile of a DataFrame"""
+    return DataProfile.build(df)
@@ -0,0 +1,484 @@
+"""
+Columnar Dataset Store for Smart Data Analyzer
+Persists processed uploads as typed per-column binary files so analytics
+routes can reload them without re-parsing CSV/Excel
+"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within one process
+    fcntl = None
+
+META_FILENAME = 'meta.json'
+LOCK_FILENAME = '.append.lock'
+STORE_VERSION = 1
+
+# Storage dtype for each column kind
+KIND_DTYPES = {
+    'float': np.float64,
+    'int': np.int64,
+    'bool': np.bool_,
+    'datetime': np.int64,
+    'category': np.int32,
+}
+
+
+def dataset_path_for(filepath: str) -> str:
+    """Return the processed dataset directory for an uploaded file"""
+    return os.path.splitext(filepath)[0] + '_processed'
+
+
+def is_dataset(path: str) -> bool:
+    """Check whether a path points to a columnar dataset directory"""
+    return bool(path) and os.path.isfile(os.path.join(path, META_FILENAME))
+
+
+@contextmanager
+def dataset_lock(path: str):
+    """
+    Hold an exclusive lock on a stored dataset, across processes, so only
+    one append reads and rewrites its columns, metadata and cube at a time
+    """
+    with open(os.path.join(path, LOCK_FILENAME), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _column_kind(series: pd.Series) -> str:
+    """Pick the storage kind for a column"""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) and not series.isna().any():
+        return 'bool'
+    if pd.api.types.is_integer_dtype(dtype) and not series.isna().any():
+        return 'int'
+    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        return 'float'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    return 'category'
+
+
+def _number_labels(values) -> pd.Series:
+    """Numbers as category text: whole floats without '.0', missing values as None"""
+    values = np.asarray(values)
+    labels = pd.Series(values.astype(str), dtype=object)
+    if values.dtype.kind == 'f':
+        whole = np.isfinite(values) & (np.mod(values, 1) == 0)
+        labels[whole] = values[whole].astype(np.int64).astype(str)
+        labels[np.isnan(values)] = None
+    return labels
+
+
+class DatasetWriter:
+    """Writes a DataFrame (or a stream of DataFrame chunks) to a dataset directory"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+        self.columns: List[Dict[str, Any]] = []
+        self.rows = 0
+        self._categories: List[Optional[Dict[str, int]]] = []
+        self._hasher = hashlib.sha256()
+        self._closed = False
+        os.makedirs(self._tmp_path)
+
+    def _init_schema(self, df: pd.DataFrame):
+        for i, name in enumerate(df.columns):
+            kind = _column_kind(df[name])
+            column = {'name': str(name), 'kind': kind, 'file': f'col_{i:04d}.bin'}
+            if kind == 'datetime' and getattr(df[name].dtype, 'tz', None) is not None:
+                column['tz'] = str(df[name].dtype.tz)
+            self.columns.append(column)
+            self._categories.append({} if kind == 'category' else None)
+
+    def _encode(self, i: int, series: pd.Series) -> np.ndarray:
+        """Convert a column chunk to its storage array"""
+        column = self.columns[i]
+        kind = column['kind']
+
+        if kind == 'category':
+            return self._category_codes(i, series)
+
+        if kind == 'datetime':
+            dates = pd.to_datetime(series, errors='coerce')
+            if column.get('tz'):
+                dates = dates.dt.tz_convert('UTC').dt.tz_localize(None)
+            return dates.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+        if kind == 'bool':
+            return series.to_numpy(dtype=np.bool_)
+
+        numeric = pd.to_numeric(series, errors='coerce')
+        if (numeric.isna() & series.notna()).any():
+            # Text in a column that looked numeric so far (e.g. IDs): keep every value as text
+            self._promote_to_category(i)
+            return self._category_codes(i, series)
+        if kind == 'int':
+            # Whole-number floats (e.g. from a later export) still fit the int column
+            integral = pd.api.types.is_integer_dtype(numeric.dtype) or (
+                pd.api.types.is_float_dtype(numeric.dtype) and bool((numeric % 1 == 0).all()))
+            if numeric.isna().any() or not integral:
+                self._promote_to_float(i)
+            else:
+                return numeric.to_numpy(dtype=np.int64)
+        return numeric.to_numpy(dtype=np.float64)
+
+    def _category_codes(self, i: int, series: pd.Series) -> np.ndarray:
+        """Codes of a category column chunk, adding new values to the column's categories"""
+        if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            values = _number_labels(series.to_numpy(dtype=float, na_value=np.nan)
+                                    if series.isna().any() else series.to_numpy())
+        else:
+            values = series.astype(object)
+        mask = values.isna().to_numpy()
+        codes, uniques = pd.factorize(values[~mask].astype(str))
+        lookup = self._categories[i]
+        remap = np.empty(len(uniques), dtype=np.int32)
+        for j, value in enumerate(uniques):
+            code = lookup.get(value)
+            if code is None:
+                code = len(lookup)
+                lookup[value] = code
+            remap[j] = code
+        result = np.full(len(values), -1, dtype=np.int32)
+        result[~mask] = remap[codes]
+        return result
+
+    def _stored_values(self, i: int) -> Optional[np.ndarray]:
+        """Values written so far for a column, None before its first chunk"""
+        column = self.columns[i]
+        file_path = os.path.join(self._tmp_path, column['file'])
+        if not os.path.exists(file_path):
+            return None
+        return np.fromfile(file_path, dtype=KIND_DTYPES[column['kind']], count=self.rows)
+
+    def _replace_column(self, i: int, data: np.ndarray, kind: str):
+        """Swap a column's file for data of another kind"""
+        column = self.columns[i]
+        file_path = os.path.join(self._tmp_path, column['file'])
+        # Replace rather than overwrite so readers mapping the old file are unaffected
+        tmp_file = f"{file_path}.tmp-{uuid.uuid4().hex[:8]}"
+        data.tofile(tmp_file)
+        os.replace(tmp_file, file_path)
+        column['kind'] = kind
+
+    def _promote_to_float(self, i: int):
+        """Rewrite an integer column as float once a later chunk contains gaps"""
+        stored = self._stored_values(i)
+        if stored is None:
+            self.columns[i]['kind'] = 'float'
+        else:
+            self._replace_column(i, stored.astype(np.float64), 'float')
+
+    def _promote_to_category(self, i: int):
+        """Rewrite a numeric column as category once a later chunk contains text"""
+        stored = self._stored_values(i)
+        self._categories[i] = {}
+        if stored is None:
+            self.columns[i]['kind'] = 'category'
+        else:
+            self._replace_column(i, self._category_codes(i, _number_labels(stored)), 'category')
+
+    def append(self, df: pd.DataFrame):
+        """Append a chunk of rows to the dataset"""
+        if self._closed:
+            raise ValueError("Dataset writer is already closed")
+        if not self.columns:
+            self._init_schema(df)
+        elif [str(c) for c in df.columns] != [c['name'] for c in self.columns]:
+            raise ValueError("Chunk columns do not match the dataset schema")
+
+        for i, name in enumerate(df.columns):
+            data = np.ascontiguousarray(self._encode(i, df[name]))
+            self._hasher.update(data.tobytes())
+            with open(os.path.join(self._tmp_path, self.columns[i]['file']), 'ab') as f:
+                data.tofile(f)
+        self.rows += len(df)
+
+    def _write_meta(self) -> Dict[str, Any]:
+        """Write category lists and meta.json, each replaced atomically"""
+        for i, column in enumerate(self.columns):
+            file_path = os.path.join(self._tmp_path, column['file'])
+            if not os.path.exists(file_path):
+                open(file_path, 'wb').close()
+            if column['kind'] == 'category':
+                categories = list(self._categories[i].keys())
+                column['categories'] = f'col_{i:04d}.categories.json'
+                _write_json(os.path.join(self._tmp_path, column['categories']), categories)
+                self._hasher.update(json.dumps(categories).encode())
+        self._hasher.update(json.dumps([c['name'] for c in self.columns]).encode())
+
+        meta = {
+            'version': STORE_VERSION,
+            'rows': self.rows,
+            'columns': self.columns,
+            'content_hash': self._hasher.hexdigest(),
+        }
+        _write_json(os.path.join(self._tmp_path, META_FILENAME), meta, indent=2)
+        return meta
+
+    def close(self) -> Dict[str, Any]:
+        """Finish writing and atomically move the dataset into place"""
+        meta = self._write_meta()
+        _replace_directory(self._tmp_path, self.path)
+        self._closed = True
+        return meta
+
+    def abort(self):
+        """Discard a partially written dataset"""
+        self._closed = True
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+
+class DatasetAppender(DatasetWriter):
+    """
+    Appends rows to an existing dataset in place.
+    Column files only grow and meta.json is replaced last, so readers
+    (memory-mapped ones included) see the previous rows until the append
+    completes; bytes past the recorded row count, left by an interrupted
+    append, are truncated first. The content hash chains the previous hash
+    with the appended data. Concurrent appenders must hold dataset_lock.
+    """
+
+    def __init__(self, path: str):
+        meta = read_meta(path)
+        self.path = path
+        self._tmp_path = path
+        self.columns = meta['columns']
+        self.rows = meta['rows']
+        self._categories = []
+        for column in self.columns:
+            if column['kind'] == 'category':
+                with open(os.path.join(path, column['categories'])) as f:
+                    self._categories.append({value: code for code, value in enumerate(json.load(f))})
+            else:
+                self._categories.append(None)
+            file_path = os.path.join(path, column['file'])
+            if os.path.exists(file_path):
+                os.truncate(file_path, self.rows * np.dtype(KIND_DTYPES[column['kind']]).itemsize)
+        self._hasher = hashlib.sha256(meta['content_hash'].encode())
+        self._closed = False
+        self._stored_rows = self.rows
+        self._replaced_files: List[str] = []
+        self._new_files: List[str] = []
+
+    def _replace_column(self, i: int, data: np.ndarray, kind: str):
+        """Write a column of another kind to a new file; meta.json switches to it on close"""
+        column = self.columns[i]
+        old_file = column['file']
+        column['file'] = f'col_{i:04d}.{kind}.bin'
+        data.tofile(os.path.join(self.path, column['file']))
+        column['kind'] = kind
+        self._replaced_files.append(old_file)
+        self._new_files.append(column['file'])
+
+    def _read_rows(self, i: int, positions: np.ndarray) -> np.ndarray:
+        """Stored values of one column at the given row positions"""
+        column = self.columns[i]
+        data = _read_column_data(os.path.join(self.path, column['file']), KIND_DTYPES[column['kind']],
+                                 self.rows, mmap=True)
+        return np.asarray(data[positions])
+
+    def new_rows(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Mask of the rows in df that are not stored yet.
+        Rows are compared on their encoded values as a multiset, so a row
+        stored k times only filters its first k repeats. When the dataset has
+        a datetime column only stored rows from the chunk's earliest date on
+        are compared, which keeps the check proportional to the overlap.
+        """
+        if not len(df) or not self.rows:
+            return np.ones(len(df), dtype=bool)
+        if [str(c) for c in df.columns] != [c['name'] for c in self.columns]:
+            raise ValueError("Chunk columns do not match the dataset schema")
+
+        encoded = {column['name']: self._encode(i, df[column['name']]) for i, column in enumerate(self.columns)}
+        window = np.arange(self.rows)
+        for i, column in enumerate(self.columns):
+            if column['kind'] == 'datetime':
+                dates = encoded[column['name']]
+                valid = dates[dates != np.iinfo(np.int64).min]
+                if len(valid):
+                    stored_dates = _read_column_data(os.path.join(self.path, column['file']), np.int64,
+                                                     self.rows, mmap=True)
+                    window = np.flatnonzero(np.asarray(stored_dates) >= valid.min())
+                break
+        if not len(window):
+            return np.ones(len(df), dtype=bool)
+
+        # Kinds may have been promoted while encoding, so read the window afterwards
+        stored = {column['name']: self._read_rows(i, window) for i, column in enumerate(self.columns)}
+        incoming = _occurrence_keys(pd.DataFrame(encoded))
+        return ~incoming.isin(_occurrence_keys(pd.DataFrame(stored)))
+
+    def close(self) -> Dict[str, Any]:
+        """Publish the appended rows by replacing meta.json"""
+        meta = self._write_meta()
+        self._closed = True
+        # Readers still mapping a replaced file keep it alive until they let go
+        for name in self._replaced_files:
+            _remove_file(os.path.join(self.path, name))
+        return meta
+
+    def abort(self):
+        """Drop the unpublished rows; meta.json still records the previous state"""
+        self._closed = True
+        for column in read_meta(self.path)['columns']:
+            file_path = os.path.join(self.path, column['file'])
+            if os.path.exists(file_path):
+                os.truncate(file_path, self._stored_rows * np.dtype(KIND_DTYPES[column['kind']]).itemsize)
+        for name in self._new_files:
+            _remove_file(os.path.join(self.path, name))
+
+
+def _occurrence_keys(encoded: pd.DataFrame) -> pd.MultiIndex:
+    """(row hash, occurrence number) per row, so duplicate rows compare as a multiset"""
+    hashes = pd.util.hash_pandas_object(encoded, index=False).to_numpy()
+    occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+    return pd.MultiIndex.from_arrays([hashes, occurrence])
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _write_json(path: str, data, **kwargs):
+    """Write a JSON file through a temporary file and an atomic rename"""
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp_path, path)
+
+
+def _replace_directory(src: str, dst: str):
+    """Swap a freshly written directory into place"""
+    old_path = None
+    if os.path.exists(dst):
+        old_path = f"{dst}.old-{uuid.uuid4().hex[:8]}"
+        os.rename(dst, old_path)
+    os.rename(src, dst)
+    if old_path:
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+def save_dataset(df: pd.DataFrame, path: str) -> Dict[str, Any]:
+    """Persist a DataFrame as a columnar dataset and return its metadata"""
+    writer = DatasetWriter(path)
+    try:
+        writer.append(df)
+        return writer.close()
+    except Exception:
+        writer.abort()
+        raise
+
+
+def append_dataset(df: pd.DataFrame, path: str, dedupe: bool = True) -> Dict[str, Any]:
+    """
+    Append a DataFrame's rows to a stored dataset.
+    With dedupe, rows already stored are skipped. Returns the new metadata
+    plus 'appended' (the rows actually written) and 'duplicates' (skipped count).
+    """
+    appender = DatasetAppender(path)
+    try:
+        keep = appender.new_rows(df) if dedupe else np.ones(len(df), dtype=bool)
+        appended = df[keep]
+        if len(appended):
+            appender.append(appended)
+            meta = appender.close()
+        else:
+            # Nothing new: leave the dataset and its content hash untouched
+            appender.abort()
+            meta = read_meta(path)
+    except Exception:
+        appender.abort()
+        raise
+    return {**meta, 'appended': appended, 'duplicates': int((~keep).sum())}
+
+
+def read_meta(path: str) -> Dict[str, Any]:
+    """Read dataset metadata"""
+    with open(os.path.join(path, META_FILENAME)) as f:
+        return json.load(f)
+
+
+def _read_column_data(filename: str, dtype, rows: int, mmap: bool) -> np.ndarray:
+    """Read raw column values, mapping the file read-only when requested"""
+    if mmap and rows > 0:
+        return np.memmap(filename, dtype=dtype, mode='r', shape=(rows,))
+    return np.fromfile(filename, dtype=dtype, count=rows)
+
+
+def is_mapped(values) -> bool:
+    """True when an array's memory is a read-only file mapping shared between processes"""
+    base = values
+    while base is not None:
+        if isinstance(base, np.memmap):
+            return True
+        base = getattr(base, 'base', None)
+    return False
+
+
+def _decode_column(path: str, column: Dict[str, Any], rows: int, mmap: bool = False):
+    """Load one stored column back into a pandas-compatible array"""
+    kind = column['kind']
+    data = _read_column_data(os.path.join(path, column['file']), KIND_DTYPES[kind], rows, mmap)
+
+    if kind == 'datetime':
+        values = pd.Series(data.view('datetime64[ns]'), copy=False)
+        if column.get('tz'):
+            values = values.dt.tz_localize('UTC').dt.tz_convert(column['tz'])
+        return values
+
+    if kind == 'category':
+        with open(os.path.join(path, column['categories'])) as f:
+            categories = json.load(f)
+        # Code -1 marks a missing value and picks the trailing NaN
+        lookup = np.empty(len(categories) + 1, dtype=object)
+        lookup[:-1] = categories
+        lookup[-1] = np.nan
+        return lookup[data]
+
+    return data
+
+
+def load_dataset(path: str, mmap: bool = False) -> pd.DataFrame:
+    """
+    Load a columnar dataset as a DataFrame.
+    With mmap=True numeric, bool and datetime columns are read-only views of
+    the column files, so every process mapping the same dataset shares one
+    copy of the pages through the OS page cache. Category columns are
+    decoded into private object arrays either way.
+    """
+    meta = read_meta(path)
+    rows = meta['rows']
+    data = {}
+    for column in meta['columns']:
+        data[column['name']] = _decode_column(path, column, rows, mmap)
+    return pd.DataFrame(data, index=pd.RangeIndex(rows), copy=not mmap)
+
+
+def read_processed_file(filepath: str) -> pd.DataFrame:
+    """Load processed upload data, falling back to legacy CSV/Excel files"""
+    if is_dataset(filepath):
+        return load_dataset(filepath)
+    if filepath.lower().endswith('.csv'):
+        return pd.read_csv(filepath)
+    return pd.read_excel(filepath)
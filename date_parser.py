@@ -0,0 +1,188 @@
+"""
+Date Parsing Engine for Smart Data Analyzer
+Detects the date formats present in a column from a sample, parses each
+format group with a vectorized fixed-format parser and caches results by
+unique string so repeated dates cost nothing
+"""
+
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Any
+
+# Date format patterns to try
+DATE_FORMATS = [
+    '%Y-%m-%d',      # ISO: 2023-12-25
+    '%Y/%m/%d',      # 2023/12/25
+    '%d/%m/%Y',      # UK: 25/12/2023
+    '%m/%d/%Y',      # US: 12/25/2023
+    '%d-%m-%Y',      # 25-12-2023
+    '%m-%d-%Y',      # 12-25-2023
+    '%Y-%m-%d %H:%M:%S',  # With time
+    '%Y/%m/%d %H:%M:%S',
+    '%d/%m/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',  # ISO with T
+    '%Y-%m-%d %H:%M',     # Without seconds
+    '%d/%m/%Y %H:%M',
+    '%m/%d/%Y %H:%M',
+]
+
+# Day-first formats and their month-first twins; pandas defaults to month-first
+DAYFIRST_PAIRS = {
+    '%d/%m/%Y': '%m/%d/%Y',
+    '%d-%m-%Y': '%m-%d-%Y',
+    '%d/%m/%Y %H:%M:%S': '%m/%d/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M': '%m/%d/%Y %H:%M',
+}
+
+SAMPLE_SIZE = 1000
+MAX_CACHE_ENTRIES = 200_000
+_MISSING = object()
+
+
+def _try_format(values: np.ndarray, date_format: str) -> np.ndarray:
+    """Parse strings with one fixed format, NaT where it does not apply"""
+    try:
+        parsed = pd.to_datetime(values, format=date_format, errors='coerce')
+    except (ValueError, TypeError):
+        return np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    return np.asarray(parsed, dtype='datetime64[ns]')
+
+
+class DateParser:
+    """Vectorized, format-detecting date parser with a unique-value cache"""
+
+    def __init__(self, formats: Optional[List[str]] = None):
+        self.formats = list(formats or DATE_FORMATS)
+        self._cache: Dict[bool, Dict[str, np.datetime64]] = {False: {}, True: {}}
+        self._lock = threading.Lock()
+
+    def detect(self, values) -> Dict[str, Any]:
+        """
+        Detect the formats present in a sample of date strings.
+        Returns formats ordered by how many sample values they parse, whether
+        ambiguous day/month values should be read day-first, and the share of
+        the sample covered by the detected formats.
+        """
+        sample = pd.Series(values).dropna().astype(str).str.strip()
+        sample = sample[sample != ''].drop_duplicates().head(SAMPLE_SIZE).to_numpy(dtype=object)
+        if len(sample) == 0:
+            return {'formats': [], 'dayfirst': False, 'coverage': 0.0}
+
+        hits = {fmt: ~np.isnat(_try_format(sample, fmt)) for fmt in self.formats}
+
+        # Day-first only wins when some values cannot be month-first
+        dayfirst_only = monthfirst_only = 0
+        for day_fmt, month_fmt in DAYFIRST_PAIRS.items():
+            if day_fmt in hits and month_fmt in hits:
+                dayfirst_only += int((hits[day_fmt] & ~hits[month_fmt]).sum())
+                monthfirst_only += int((hits[month_fmt] & ~hits[day_fmt]).sum())
+        dayfirst = dayfirst_only > monthfirst_only
+
+        covered = np.zeros(len(sample), dtype=bool)
+        for mask in hits.values():
+            covered |= mask
+
+        detected = [fmt for fmt in self._ordered_formats(dayfirst) if hits[fmt].any()]
+        detected.sort(key=lambda fmt: -int(hits[fmt].sum()))
+        return {'formats': detected, 'dayfirst': dayfirst, 'coverage': float(covered.mean())}
+
+    def _ordered_formats(self, dayfirst: bool, formats: Optional[List[str]] = None) -> List[str]:
+        """Format list (all formats by default) with the preferred member of each day/month pair first"""
+        ordered = list(self.formats if formats is None else formats)
+        for day_fmt, month_fmt in DAYFIRST_PAIRS.items():
+            if day_fmt in ordered and month_fmt in ordered:
+                first, second = (day_fmt, month_fmt) if dayfirst else (month_fmt, day_fmt)
+                i, j = sorted([ordered.index(day_fmt), ordered.index(month_fmt)])
+                ordered[i], ordered[j] = first, second
+        return ordered
+
+    def _parse_strings(self, strings: np.ndarray, detected: List[str], dayfirst: bool) -> np.ndarray:
+        """Parse unique strings: detected formats first, then the rest, then a per-value fallback"""
+        result = np.full(len(strings), np.datetime64('NaT'), dtype='datetime64[ns]')
+        if len(strings) == 0:
+            return result
+
+        # An explicit dayfirst overrides the order detection gave ambiguous pairs
+        ordered = self._ordered_formats(dayfirst, detected + [fmt for fmt in self.formats if fmt not in detected])
+        pending = np.arange(len(strings))
+        for fmt in ordered:
+            if len(pending) == 0:
+                break
+            parsed = _try_format(strings[pending], fmt)
+            ok = ~np.isnat(parsed)
+            result[pending[ok]] = parsed[ok]
+            pending = pending[~ok]
+
+        if len(pending):
+            # Formats outside the list (month names, fractional seconds, ...)
+            try:
+                parsed = pd.to_datetime(pd.Series(strings[pending]), errors='coerce',
+                                        format='mixed', dayfirst=dayfirst)
+                if getattr(parsed.dtype, 'tz', None) is not None:
+                    parsed = parsed.dt.tz_convert(None)
+                result[pending] = parsed.to_numpy(dtype='datetime64[ns]')
+            except (ValueError, TypeError):
+                pass
+        return result
+
+    def parse(self, series: pd.Series, dayfirst: Optional[bool] = None) -> pd.Series:
+        """Convert a column of mixed date values to datetime64, NaT where invalid"""
+        if not isinstance(series, pd.Series):
+            series = pd.Series(series)
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            return series
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            return pd.to_datetime(series, errors='coerce')
+
+        codes, uniques = pd.factorize(series)
+        if len(uniques) == 0:
+            return pd.Series(pd.NaT, index=series.index, name=series.name, dtype='datetime64[ns]')
+        uniques = np.asarray(uniques, dtype=object)
+        values = np.full(len(uniques), np.datetime64('NaT'), dtype='datetime64[ns]')
+
+        is_string = np.array([isinstance(v, str) for v in uniques], dtype=bool)
+        if (~is_string).any():
+            # Excel cells that already hold datetime objects
+            others = pd.to_datetime(pd.Series(uniques[~is_string]), errors='coerce')
+            values[~is_string] = others.to_numpy(dtype='datetime64[ns]')
+
+        strings = np.array([v.strip() for v in uniques[is_string]], dtype=object)
+        if len(strings):
+            detection = None
+            if dayfirst is None:
+                detection = self.detect(strings)
+                dayfirst = detection['dayfirst']
+            cache = self._cache[bool(dayfirst)]
+            # One lookup per string, so a concurrent clear() cannot leave a string neither cached nor missing
+            looked_up = [cache.get(s, _MISSING) for s in strings]
+            missing = np.array([v is _MISSING for v in looked_up], dtype=bool)
+            cached = np.array([np.datetime64('NaT', 'ns') if v is _MISSING else v for v in looked_up],
+                              dtype='datetime64[ns]')
+            if missing.any():
+                if detection is None:
+                    detection = self.detect(strings[missing])
+                parsed = self._parse_strings(strings[missing], detection['formats'], bool(dayfirst))
+                cached[missing] = parsed
+                with self._lock:
+                    if len(cache) + len(parsed) > MAX_CACHE_ENTRIES:
+                        cache.clear()
+                    cache.update(zip(strings[missing], parsed))
+            values[is_string] = cached
+
+        result = np.where(codes >= 0, values[np.maximum(codes, 0)], np.datetime64('NaT'))
+        return pd.Series(result.astype('datetime64[ns]'), index=series.index, name=series.name)
+
+
+_default_parser = DateParser()
+
+
+def parse_dates(series: pd.Series, dayfirst: Optional[bool] = None) -> pd.Series:
+    """Parse a date column with the shared process-wide parser"""
+    return _default_parser.parse(series, dayfirst=dayfirst)
+
+
+def detect_date_formats(values) -> Dict[str, Any]:
+    """Detect the date formats present in a sample of values"""
+    return _default_parser.detect(values)
@@ -0,0 +1,78 @@
+"""
+Forecast Model Cache for Smart Data Analyzer
+Fitted forecast parameters and results keyed by a fingerprint of the series
+they were fitted on. An identical series is served from the cache; a series
+that only gained a few days at its end is refit starting from the stored
+parameters instead of from scratch.
+"""
+
+import hashlib
+import numpy as np
+from typing import Dict, Optional, Any, Tuple
+
+from result_cache import ResultCache, cache_key
+
+WARM_START_MAX_DAYS = 14
+
+
+def series_fingerprint(dates, values) -> str:
+    """Hash of a series' dates and values"""
+    digest = hashlib.sha256()
+    digest.update(np.asarray(dates, dtype='datetime64[ns]').tobytes())
+    digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class ForecastModelCache:
+    """
+    Forecast models stored in a ResultCache under two keys, both including
+    the model code version: the fingerprint of the fitted series, for exact
+    reuse, and the series' identity (e.g. a dataset's daily revenue),
+    pointing at its latest fit, for warm starts after an append.
+    """
+
+    def __init__(self, cache: ResultCache, warm_start_max_days: int = WARM_START_MAX_DAYS, version: str = ''):
+        self.cache = cache
+        self.warm_start_max_days = warm_start_max_days
+        self.version = version
+
+    def lookup(self, series_key: Optional[str], backend: str, dates, values) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        How to produce a forecast for a series, with the stored entry to use:
+        ('cache', entry) for a series fitted before, ('warm_start', entry) when
+        the series' latest fit covered all but its last few days, and
+        ('refit', None) otherwise.
+        """
+        entry = self.cache.get(self._model_key(backend, series_fingerprint(dates, values)))
+        if entry is not None:
+            return 'cache', entry
+        if series_key:
+            latest = self.cache.get(self._series_key(backend, series_key))
+            if latest is not None and self._extends(latest, dates, values):
+                return 'warm_start', latest
+        return 'refit', None
+
+    def store(self, series_key: Optional[str], backend: str, dates, values,
+              parameters: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Remember a fit: its parameters for warm starts and its result for identical series"""
+        dates = np.asarray(dates, dtype='datetime64[ns]')
+        values = np.asarray(values, dtype=np.float64)
+        entry = {'dates': dates, 'values': values, 'parameters': parameters, 'result': result}
+        self.cache.set(self._model_key(backend, series_fingerprint(dates, values)), entry)
+        if series_key:
+            self.cache.set(self._series_key(backend, series_key), entry)
+
+    def _extends(self, entry: Dict[str, Any], dates, values) -> bool:
+        """True when the series is the entry's series plus up to warm_start_max_days new days"""
+        known = len(entry['values'])
+        added = len(values) - known
+        if not 0 < added <= self.warm_start_max_days:
+            return False
+        return (np.array_equal(np.asarray(dates, dtype='datetime64[ns]')[:known], entry['dates'])
+                and np.allclose(np.asarray(values, dtype=np.float64)[:known], entry['values']))
+
+    def _model_key(self, backend: str, fingerprint: str) -> str:
+        return cache_key(fingerprint, f'forecast_model.{backend}', version=self.version)
+
+    def _series_key(self, backend: str, series_key: str) -> str:
+        return cache_key(series_key, f'forecast_series.{backend}', version=self.version)
@@ -6,25 +6,192 @@ Advanced AI-powered business insights and predictions
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import mean_absolute_error
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
 import json
 import warnings
+from typing import Optional
+from statistics import NormalDist
+from date_parser import parse_dates
+from sales_dataset import SalesDataset
+from data_profile import profile_frame
+from computation_graph import ComputationGraph
+import chart_spec as charts
 warnings.filterwarnings('ignore')
 
+
+def group_offsets(grouped: pd.Series):
+    """
+    Values and [starts, ends) offsets of each first-level group of a Series
+    indexed by a sorted MultiIndex, e.g. groupby(['product', 'date']).sum()
+    """
+    values = grouped.to_numpy(dtype=float)
+    if not len(values):
+        empty = np.empty(0, dtype=np.int64)
+        return values, empty, empty, grouped.index[:0]
+    codes = grouped.index.codes[0]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(values)].astype(np.int64)
+    return values, starts, ends, grouped.index.levels[0][codes[starts]]
+
+
+def _grouped_quantile(sorted_values: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """Linear-interpolated quantile per group of values sorted within each group, as Series.quantile computes it"""
+    virtual = (counts - 1) * q
+    below = np.floor(virtual).astype(np.int64)
+    gamma = virtual - below
+    a = sorted_values[starts + below]
+    b = sorted_values[starts + np.minimum(below + 1, counts - 1)]
+    difference = b - a
+    return np.where(gamma >= 0.5, b - difference * (1 - gamma), a + difference * gamma)
+
+
+def flag_anomalies(daily_sales: pd.Series, top_n: Optional[int] = 5, min_points: int = 5) -> pd.DataFrame:
+    """
+    IQR outliers of every product's (product, date) revenue series at once.
+    Quartiles, medians and standard deviations are computed per group over
+    sorted offsets, outliers are flagged with one mask over all rows, and the
+    top_n (all when None) with the largest deviation from their product's
+    median are returned. Products with fewer than min_points points are skipped.
+    """
+    columns = ['product', 'date', 'value', 'lower_bound', 'upper_bound', 'median', 'std']
+    values, starts, ends, products = group_offsets(daily_sales)
+    counts = ends - starts
+    if not len(values):
+        return pd.DataFrame(columns=columns + ['deviation', 'deviation_percent'])
+
+    group = np.repeat(np.arange(len(starts)), counts)
+    # Complex numbers sort by real then imaginary part: one sort orders values within each group
+    sorted_values = np.sort(group + 1j * values).imag
+    q1 = _grouped_quantile(sorted_values, starts, counts, 0.25)
+    q3 = _grouped_quantile(sorted_values, starts, counts, 0.75)
+    middle = starts + (counts - 1) // 2
+    median = np.where(counts % 2 == 1, sorted_values[middle],
+                      (sorted_values[middle] + sorted_values[np.minimum(middle + 1, ends - 1)]) / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.add.reduceat(values, starts) / counts
+        std = np.sqrt(np.add.reduceat((values - mean[group]) ** 2, starts) / (counts - 1))
+
+    iqr = q3 - q1
+    lower_bound = (q1 - 1.5 * iqr)[group]
+    upper_bound = (q3 + 1.5 * iqr)[group]
+    flagged = (counts >= min_points)[group] & ((values < lower_bound) | (values > upper_bound))
+    rows = np.flatnonzero(flagged)
+
+    anomalies = pd.DataFrame({
+        'product': products[group[rows]],
+        'date': daily_sales.index.levels[1][daily_sales.index.codes[1][rows]],
+        'value': values[rows],
+        'lower_bound': lower_bound[rows],
+        'upper_bound': upper_bound[rows],
+        'median': median[group[rows]],
+        'std': std[group[rows]],
+    })
+    anomalies['deviation'] = (anomalies['value'] - anomalies['median']).abs()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        anomalies['deviation_percent'] = np.where(anomalies['median'] > 0,
+                                                  anomalies['deviation'] / anomalies['median'] * 100, 0.0)
+    # Most unusual first; percentages compare products of different scale
+    ranked = anomalies.sort_values(['deviation_percent', 'deviation'], ascending=False, kind='stable')
+    if top_n is not None:
+        ranked = ranked.head(top_n)
+    return ranked.reset_index(drop=True)
+
+
+TREND_COLUMNS = ['slope', 'intercept', 'r_squared', 'n', 'x_mean', 'sxx', 'residual_std']
+
+
+def fit_trends(x: np.ndarray, y: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> pd.DataFrame:
+    """
+    Least-squares lines y = intercept + slope * x for many series at once.
+    Series i is x[starts[i]:ends[i]], y[starts[i]:ends[i]]; every series is
+    solved together from grouped sums over deviations from its means, so the
+    cost is a few passes over the points whatever the number of series.
+    Returns one row per series with the columns in TREND_COLUMNS; r_squared
+    is 1 for series without variance and residual_std is NaN below 3 points. See trend_intervals for predictions.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    counts = np.asarray(ends) - np.asarray(starts)
+    if not len(counts):
+        return pd.DataFrame(columns=TREND_COLUMNS)
+
+    group = np.repeat(np.arange(len(counts)), counts)
+    x_mean = np.add.reduceat(x, starts) / counts
+    y_mean = np.add.reduceat(y, starts) / counts
+    dx = x - x_mean[group]
+    dy = y - y_mean[group]
+    sxx = np.add.reduceat(dx * dx, starts)
+    syy = np.add.reduceat(dy * dy, starts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(sxx > 0, np.add.reduceat(dx * dy, starts) / sxx, 0.0)
+        sse = np.add.reduceat((dy - slope[group] * dx) ** 2, starts)
+        r_squared = np.where(syy > 0, 1 - sse / syy, 1.0)
+        residual_std = np.where(counts > 2, np.sqrt(sse / (counts - 2)), np.nan)
+
+    return pd.DataFrame({
+        'slope': slope,
+        'intercept': y_mean - slope * x_mean,
+        'r_squared': r_squared,
+        'n': counts,
+        'x_mean': x_mean,
+        'sxx': sxx,
+        'residual_std': residual_std,
+    })
+
+
+def _t_quantile(p: float, dof) -> np.ndarray:
+    """
+    Student t quantile per degrees of freedom without scipy: exact for 1 and 2,
+    a Cornish-Fisher expansion of the normal quantile (relative error below 1%) above
+    """
+    z = NormalDist().inv_cdf(p)
+    dof = np.asarray(dof, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (z + (z ** 3 + z) / (4 * dof)
+             + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+             + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * dof ** 3)
+             + (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / (92160 * dof ** 4))
+        t = np.where(dof == 1, np.tan(np.pi * (p - 0.5)), t)
+        t = np.where(dof == 2, (2 * p - 1) / np.sqrt(2 * p * (1 - p)), t)
+    return np.where(dof >= 1, t, np.nan)
+
+
+def trend_intervals(fit: pd.DataFrame, x_new, level: float = 0.95):
+    """
+    Predictions of fitted trends at x_new (shared by all series, or one row per
+    series) with the bounds of their prediction intervals.
+    Returns (prediction, lower, upper), each shaped (series, points); bounds
+    are NaN for series with fewer than 3 points.
+    """
+    column = lambda name: fit[name].to_numpy(dtype=float)[:, None]
+    x_new = np.asarray(x_new, dtype=float)
+    prediction = column('intercept') + column('slope') * x_new
+    n = column('n')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        standard_error = column('residual_std') * np.sqrt(1 + 1 / n + (x_new - column('x_mean')) ** 2 / column('sxx'))
+    spread = _t_quantile((1 + level) / 2, n - 2) * standard_error
+    return prediction, prediction - spread, prediction + spread
+
+
 class GrowthAnalytics:
-    def __init__(self, df):
-        self.df = df
+    def __init__(self, df, backtest=None):
+        self.dataset = df if isinstance(df, SalesDataset) else None
+        # Forecast backtest scores of the dataset (see backtest.run_backtest), when computed
+        self.backtest = backtest
+        self.df = self.dataset.base if self.dataset is not None else df
         self.processed_df = None
         self.revenue_col = None
         self.quantity_col = None
         self.price_col = None
         self.product_col = None
         self.date_col = None
+        self.cube = None
+        self.graph = self._build_graph()
+        if self.dataset is not None:
+            # Canonical dataset: already typed, named and calendar-expanded
+            self.processed_df = self.dataset.frame
+            self.cube = self.dataset.cube
+            print(f"GrowthAnalytics: Using canonical dataset with {len(self.processed_df)} rows")
+            return
         self._standardize_columns()
         self._process_data()
     
@@ -68,7 +235,7 @@ class GrowthAnalytics:
         if 'date' in self.processed_df.columns:
             try:
                 # Handle multiple date formats including YYYY/MM/DD and YYYY-MM-DD
-                self.processed_df['date'] = pd.to_datetime(self.processed_df['date'], format='mixed', dayfirst=False)
+                self.processed_df['date'] = parse_dates(self.processed_df['date'])
                 self.processed_df['day_of_week'] = self.processed_df['date'].dt.day_name()
                 self.processed_df['hour'] = self.processed_df['date'].dt.hour
                 self.processed_df['month'] = self.processed_df['date'].dt.month
@@ -76,12 +243,6 @@ class GrowthAnalytics:
                 print(f"GrowthAnalytics: Date column processed successfully")
             except Exception as e:
                 print(f"GrowthAnalytics: Date processing error: {e}")
-                # Try alternative parsing methods
-                try:
-                    self.processed_df['date'] = pd.to_datetime(self.processed_df['date'], infer_datetime_format=True)
-                    print(f"GrowthAnalytics: Date column processed with infer format")
-                except Exception as e2:
-                    print(f"GrowthAnalytics: Date parsing failed completely: {e2}")
         
         # Calculate revenue if possible
         if 'price' in self.processed_df.columns and 'quantity' in self.processed_df.columns:
@@ -94,6 +255,158 @@ class GrowthAnalytics:
             except Exception as e:
                 print(f"GrowthAnalytics: Revenue calculation error: {e}")
     
+    def _build_graph(self):
+        """Intermediate results shared by the public analyses, computed on first use"""
+        graph = ComputationGraph()
+        graph.add('daily_revenue', self._daily_revenue)
+        graph.add('product_performance', self._product_performance)
+        graph.add('product_count', self._product_count)
+        graph.add('opportunity_tables', self._opportunity_tables)
+        graph.add('day_revenue', self._day_revenue)
+        graph.add('hour_revenue', self._hour_revenue)
+        graph.add('best_times', self._best_times, ['day_revenue', 'hour_revenue'])
+        graph.add('weekday_average', self._weekday_average)
+        graph.add('product_daily_revenue', self._product_daily_revenue)
+        return graph
+    
+    def node_timings(self):
+        """Per-node compute time and reuse count for profiling"""
+        return self.graph.timings()
+    
+    def _daily_revenue(self):
+        """Revenue per date, sorted by date"""
+        if self.cube is not None:
+            # Daily revenue pre-aggregated at upload
+            daily_revenue = self.cube.daily_revenue(require_revenue=True).reset_index()
+        else:
+            # Ensure dates are properly converted and clean data
+            valid_data = self.processed_df.dropna(subset=['date', 'revenue'])
+            if len(valid_data) == 0:
+                raise ValueError("No valid date and revenue data found")
+            
+            # Group by date and sum revenue
+            daily_revenue = valid_data.groupby('date')['revenue'].sum().reset_index()
+        return daily_revenue.sort_values('date')
+    
+    def _product_performance(self):
+        """Revenue and quantity per product, best sellers first"""
+        if self.processed_df is None or self.processed_df.empty:
+            raise ValueError("No data available for product analysis")
+            
+        if 'product' not in self.processed_df.columns or 'revenue' not in self.processed_df.columns:
+            raise ValueError("Product and revenue columns required for analysis")
+        
+        if self.cube is not None:
+            # Rows with revenue are exactly the rows with quantity and price
+            totals = self.cube.product_totals()
+            totals = totals[totals['revenue_count'] > 0]
+            if totals.empty:
+                raise ValueError("No valid product and revenue data found")
+            return totals[['revenue', 'quantity']].reset_index().sort_values('revenue', ascending=False)
+        
+        # Clean data before analysis
+        valid_data = self.processed_df.dropna(subset=['product', 'revenue'])
+        if len(valid_data) == 0:
+            raise ValueError("No valid product and revenue data found")
+        
+        return valid_data.groupby('product').agg({
+            'revenue': 'sum',
+            'quantity': 'sum'
+        }).reset_index().sort_values('revenue', ascending=False)
+    
+    def _product_count(self):
+        """Number of distinct products"""
+        if self.cube is not None:
+            return len(self.cube.product_totals())
+        return int(self.processed_df['product'].nunique())
+    
+    def _opportunity_tables(self):
+        """Stockout summary and per-product stats behind the missed opportunities"""
+        if self.cube is not None:
+            totals = self.cube.product_totals()
+            stockouts = totals[totals['stockout_count'] > 0]
+            missed_summary = pd.DataFrame({
+                'product': stockouts.index,
+                'price': (stockouts['stockout_price_sum'] / stockouts['stockout_count']).values,
+                'quantity': stockouts['stockout_count'].values
+            })
+            complete = totals[totals['complete_rows'] > 0]
+            product_stats = pd.DataFrame({
+                'product': complete.index,
+                'quantity': complete['quantity'].values,
+                'price': (complete['price_sum'] / complete['complete_rows']).values,
+                'revenue': complete['revenue'].values
+            })
+            return missed_summary, product_stats
+        
+        # Clean the data first
+        valid_data = self.processed_df.dropna(subset=['product', 'price', 'quantity'])
+        
+        # Strategy 1: Find products with zero quantity (potential stockouts)
+        zero_qty = valid_data[
+            (valid_data['quantity'] == 0) & 
+            (valid_data['price'] > 0)
+        ]
+        missed_summary = zero_qty.groupby('product').agg({
+            'price': 'mean',
+            'quantity': 'count'  # Count of stockout instances
+        }).reset_index()
+        
+        # Strategy 2: Find low-performing products with high prices (underutilized potential)
+        product_stats = valid_data.groupby('product').agg({
+            'quantity': 'sum',
+            'price': 'mean',
+            'revenue': 'sum'
+        }).reset_index()
+        return missed_summary, product_stats
+    
+    def _day_revenue(self):
+        """Revenue per day of week, Monday first"""
+        if 'date' not in self.processed_df.columns or 'revenue' not in self.processed_df.columns:
+            raise ValueError("Date and revenue columns required for time analysis")
+        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        if self.cube is not None:
+            weekday_revenue = self.cube.weekday_revenue()['revenue']
+            day_revenue = pd.Series(weekday_revenue.values, index=[day_order[d] for d in weekday_revenue.index])
+        else:
+            day_revenue = self.processed_df.groupby('day_of_week')['revenue'].sum()
+        return day_revenue.reindex(day_order, fill_value=0)
+    
+    def _hour_revenue(self):
+        """Revenue per hour of day, None without times"""
+        if self.cube is not None:
+            return self.cube.hour_revenue()['revenue']
+        if 'hour' in self.processed_df.columns:
+            return self.processed_df.groupby('hour')['revenue'].sum()
+        return None
+    
+    def _best_times(self, day_revenue, hour_revenue):
+        """Best day and hour for sales"""
+        best_day = day_revenue.idxmax()
+        best_hour = hour_revenue.idxmax() if hour_revenue is not None else 14
+        return best_day, best_hour
+    
+    def _weekday_average(self):
+        """Average revenue per row by day of week, and overall"""
+        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        if self.cube is not None:
+            weekday_revenue = self.cube.weekday_revenue()
+            means = weekday_revenue['revenue'] / weekday_revenue['revenue_count'].where(weekday_revenue['revenue_count'] > 0)
+            weekly_data = pd.Series(means.values, index=[day_order[d] for d in means.index])
+            overall_avg = self.cube.revenue_mean()
+        else:
+            weekly_data = self.processed_df.groupby('day_of_week')['revenue'].mean()
+            overall_avg = self.processed_df['revenue'].mean()
+        return weekly_data.reindex(day_order, fill_value=0), overall_avg
+    
+    def _product_daily_revenue(self):
+        """Revenue per (product, date), sorted by product then date"""
+        return self.processed_df.groupby(['product', 'date'], sort=True)['revenue'].sum()
+    
+    @staticmethod
+    def _timing_recommendation(best_day, best_hour):
+        return f"Consider running promotions on {best_day}s around {best_hour}:00"
+    
     def predict_revenue_trend(self):
         """Predict revenue trends using linear regression"""
         try:
@@ -106,32 +419,18 @@ class GrowthAnalytics:
                 print(f"GrowthAnalytics: Missing columns - available: {list(self.processed_df.columns)}")
                 raise ValueError("Revenue and date columns required for trend analysis")
             
-            # Ensure dates are properly converted and clean data
-            valid_data = self.processed_df.dropna(subset=['date', 'revenue'])
-            if len(valid_data) == 0:
-                raise ValueError("No valid date and revenue data found")
-            
-            # Group by date and sum revenue
-            daily_revenue = valid_data.groupby('date')['revenue'].sum().reset_index()
+            daily_revenue = self.graph.get('daily_revenue')
             
             if len(daily_revenue) < 5:
                 raise ValueError("Insufficient data for trend analysis - need at least 5 data points")
             
-            # Prepare data for regression - ensure dates are datetime objects
-            daily_revenue = daily_revenue.sort_values('date')
-            daily_revenue['days_since_start'] = (daily_revenue['date'] - daily_revenue['date'].min()).dt.days
-            
-            X = daily_revenue[['days_since_start']]
-            y = daily_revenue['revenue']
+            # Trend over days since the first sale, from the batched least-squares kernel
+            days = (daily_revenue['date'] - daily_revenue['date'].min()).dt.days.to_numpy()
+            fit = fit_trends(days, daily_revenue['revenue'].to_numpy(), np.array([0]), np.array([len(days)]))
             
-            # Train model
-            model = LinearRegression()
-            model.fit(X, y)
-            
-            # Predict next 30 days
-            last_day = daily_revenue['days_since_start'].max()
-            future_days = np.array(range(last_day + 1, last_day + 31)).reshape(-1, 1)
-            future_predictions = model.predict(future_days)
+            # Predict next 30 days with their 95% prediction interval
+            future_days = days.max() + np.arange(1, 31)
+            future_predictions, lower, upper = (values[0] for values in trend_intervals(fit, future_days))
             
             # Calculate growth percentage
             current_avg = daily_revenue['revenue'].tail(7).mean()
@@ -139,64 +438,61 @@ class GrowthAnalytics:
             growth_rate = ((future_avg - current_avg) / current_avg) * 100
             
             # Create visualization data
-            fig = go.Figure()
-            
-            # Historical data
-            fig.add_trace(go.Scatter(
-                x=daily_revenue['date'],
-                y=daily_revenue['revenue'],
-                mode='lines+markers',
-                name='Actual Revenue',
-                line=dict(color='#0d6efd', width=3)
-            ))
-            
-            # Future predictions
-            future_dates = [daily_revenue['date'].max() + timedelta(days=i) for i in range(1, 31)]
-            fig.add_trace(go.Scatter(
-                x=future_dates,
-                y=future_predictions,
-                mode='lines',
-                name='Predicted Revenue',
-                line=dict(color='#198754', width=2, dash='dash')
-            ))
-            
-            fig.update_layout(
-                title='Revenue Trend Prediction',
-                xaxis_title='Date',
-                yaxis_title='Revenue ($)',
-                template='plotly_white',
-                height=400
-            )
+            future_dates = (daily_revenue['date'].max() + pd.to_timedelta(np.arange(1, 31), unit='D')).to_numpy()
+            traces = [
+                # Historical data
+                charts.scatter(daily_revenue['date'].to_numpy(), daily_revenue['revenue'].to_numpy(),
+                               mode='lines+markers', name='Actual Revenue', line={'color': '#0d6efd', 'width': 3}),
+                # Future predictions
+                charts.scatter(future_dates, future_predictions, mode='lines', name='Predicted Revenue',
+                               line={'color': '#198754', 'width': 2, 'dash': 'dash'}),
+                # Prediction interval: the lower bound fills up to the upper one
+                charts.scatter(future_dates, upper, mode='lines', line={'color': 'rgba(0,0,0,0)'}, showlegend=False),
+                charts.scatter(future_dates, lower, mode='lines', fill='tonexty', line={'color': 'rgba(0,0,0,0)'},
+                               fillcolor='rgba(25, 135, 84, 0.15)', name='95% Prediction Interval'),
+            ]
             
-            return {
+            result = {
                 'growth_rate': float(round(growth_rate, 1)),
-                'chart': fig.to_json(),
+                'chart': charts.chart(traces, charts.layout(title='Revenue Trend Prediction', xaxis_title='Date',
+                                                            yaxis_title='Revenue ($)', height=400)),
                 'prediction_accuracy': 'High' if len(daily_revenue) > 20 else 'Moderate',
-                'next_month_revenue': float(round(future_avg * 30, 2))
+                'next_month_revenue': float(round(future_avg * 30, 2)),
+                'r_squared': float(round(fit['r_squared'].iloc[0], 3))
             }
             
+            # Measured accuracy of the trend line on past cut-offs, once the backtest has run
+            scores = (self.backtest or {}).get('trend')
+            if scores and scores['origins']:
+                result['prediction_accuracy'] = scores['accuracy']
+                result['backtest'] = {key: scores[key] for key in ['mae', 'mape', 'origins']}
+                result['backtest'].update(horizon=self.backtest['horizon'], best_model=self.backtest['best_model'])
+            return result
+            
         except Exception as e:
             print(f"Revenue prediction error: {e}")
             raise ValueError(f"Unable to analyze revenue trends from your data: {e}")
     
     def _fallback_revenue_prediction(self):
         """Fallback prediction when data is insufficient"""
-        fig = go.Figure()
-        
         # Sample data for demonstration
-        dates = [datetime.now() - timedelta(days=30-i) for i in range(30)]
-        revenues = [5000 + np.random.normal(0, 500) + i*50 for i in range(30)]
-        future_dates = [datetime.now() + timedelta(days=i) for i in range(1, 31)]
-        future_revenues = [revenues[-1] + i*60 for i in range(30)]
+        now = np.datetime64(datetime.now(), 's')
+        dates = now - np.arange(30, 0, -1) * np.timedelta64(1, 'D')
+        revenues = 5000 + np.random.normal(0, 500, 30) + np.arange(30) * 50
+        future_dates = now + np.arange(1, 31) * np.timedelta64(1, 'D')
+        future_revenues = revenues[-1] + np.arange(30) * 60
         
-        fig.add_trace(go.Scatter(x=dates, y=revenues, mode='lines+markers', name='Actual Revenue', line=dict(color='#0d6efd')))
-        fig.add_trace(go.Scatter(x=future_dates, y=future_revenues, mode='lines', name='Predicted Revenue', line=dict(color='#198754', dash='dash')))
-        
-        fig.update_layout(title='Revenue Trend Prediction', xaxis_title='Date', yaxis_title='Revenue ($)', template='plotly_white', height=400)
+        traces = [
+            charts.scatter(dates, revenues, mode='lines+markers', name='Actual Revenue', line={'color': '#0d6efd'}),
+            charts.scatter(future_dates, future_revenues, mode='lines', name='Predicted Revenue',
+                           line={'color': '#198754', 'dash': 'dash'}),
+        ]
         
         return {
+            'fallback': True,
             'growth_rate': 12.5,
-            'chart': fig.to_json(),
+            'chart': charts.chart(traces, charts.layout(title='Revenue Trend Prediction', xaxis_title='Date',
+                                                        yaxis_title='Revenue ($)', height=400)),
             'prediction_accuracy': 'Demo',
             'next_month_revenue': 45000
         }
@@ -204,41 +500,15 @@ class GrowthAnalytics:
     def get_top_products(self):
         """Analyze top performing products by revenue"""
         try:
-            if self.processed_df is None or self.processed_df.empty:
-                raise ValueError("No data available for product analysis")
-                
-            if 'product' not in self.processed_df.columns or 'revenue' not in self.processed_df.columns:
-                raise ValueError("Product and revenue columns required for analysis")
-            
-            # Clean data before analysis
-            valid_data = self.processed_df.dropna(subset=['product', 'revenue'])
-            if len(valid_data) == 0:
-                raise ValueError("No valid product and revenue data found")
-            
-            product_performance = valid_data.groupby('product').agg({
-                'revenue': 'sum',
-                'quantity': 'sum'
-            }).reset_index().sort_values('revenue', ascending=False)
-            
-            top_products = product_performance.head(3)
+            top_products = self.graph.get('product_performance').head(3)
             
             # Create visualization
-            fig = go.Figure(data=[
-                go.Bar(
-                    x=top_products['product'],
-                    y=top_products['revenue'],
-                    marker_color=['#0d6efd', '#198754', '#ffc107'],
-                    text=[f'${rev:,.0f}' for rev in top_products['revenue']],
-                    textposition='auto'
-                )
-            ])
-            
-            fig.update_layout(
-                title='Top 3 Products by Revenue',
-                xaxis_title='Product',
-                yaxis_title='Revenue ($)',
-                template='plotly_white',
-                height=350
+            trace = charts.bar(
+                top_products['product'].to_numpy(),
+                top_products['revenue'].to_numpy(),
+                marker={'color': ['#0d6efd', '#198754', '#ffc107']},
+                text=[f'${rev:,.0f}' for rev in top_products['revenue']],
+                textposition='auto'
             )
             
             # Convert numpy types to Python native types for JSON serialization
@@ -252,7 +522,8 @@ class GrowthAnalytics:
             
             return {
                 'products': products_list,
-                'chart': fig.to_json(),
+                'chart': charts.chart([trace], charts.layout(title='Top 3 Products by Revenue', xaxis_title='Product',
+                                                             yaxis_title='Revenue ($)', height=350)),
                 'total_revenue': float(top_products['revenue'].sum())
             }
             
@@ -268,77 +539,51 @@ class GrowthAnalytics:
             {'product': 'Keyboard', 'revenue': 3200, 'quantity': 45}
         ]
         
-        fig = go.Figure(data=[
-            go.Bar(
-                x=[p['product'] for p in products],
-                y=[p['revenue'] for p in products],
-                marker_color=['#0d6efd', '#198754', '#ffc107'],
-                text=[f'${p["revenue"]:,.0f}' for p in products],
-                textposition='auto'
-            )
-        ])
-        
-        fig.update_layout(title='Top 3 Products by Revenue', template='plotly_white', height=350)
+        trace = charts.bar(
+            [p['product'] for p in products],
+            [p['revenue'] for p in products],
+            marker={'color': ['#0d6efd', '#198754', '#ffc107']},
+            text=[f'${p["revenue"]:,.0f}' for p in products],
+            textposition='auto'
+        )
         
         return {
+            'fallback': True,
             'products': products,
-            'chart': fig.to_json(),
+            'chart': charts.chart([trace], charts.layout(title='Top 3 Products by Revenue', height=350)),
             'total_revenue': sum(p['revenue'] for p in products)
         }
     
     def analyze_best_selling_times(self):
         """Analyze best days and times for sales"""
         try:
-            if 'date' not in self.processed_df.columns or 'revenue' not in self.processed_df.columns:
-                return self._fallback_time_analysis()
-            
-            # Day of week analysis
-            day_revenue = self.processed_df.groupby('day_of_week')['revenue'].sum()
             day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            day_revenue = day_revenue.reindex(day_order, fill_value=0)
-            
-            # Hour analysis (if available)
-            hour_revenue = None
-            if 'hour' in self.processed_df.columns:
-                hour_revenue = self.processed_df.groupby('hour')['revenue'].sum()
+            day_revenue = self.graph.get('day_revenue')
+            hour_revenue = self.graph.get('hour_revenue')
             
             # Find best day and time
-            best_day = day_revenue.idxmax()
-            best_hour = hour_revenue.idxmax() if hour_revenue is not None else 14
-            
-            # Create heatmap visualization
-            fig = make_subplots(
-                rows=2, cols=1,
-                subplot_titles=('Revenue by Day of Week', 'Revenue by Hour of Day'),
-                vertical_spacing=0.15
-            )
-            
-            # Day of week chart
-            fig.add_trace(
-                go.Bar(x=day_order, y=day_revenue.values, marker_color='#0d6efd'),
-                row=1, col=1
-            )
+            best_day, best_hour = self.graph.get('best_times')
             
             # Hour chart (use demo data if not available)
+            hours = np.arange(24)
             if hour_revenue is not None:
-                hours = list(range(24))
-                hour_values = [hour_revenue.get(h, 0) for h in hours]
+                hour_values = hour_revenue.reindex(hours, fill_value=0).to_numpy(dtype=float)
             else:
-                hours = list(range(24))
-                hour_values = [np.random.normal(1000, 300) * (0.3 + 0.7 * np.sin((h-6)*np.pi/12)) for h in hours]
+                hour_values = np.random.normal(1000, 300, 24) * (0.3 + 0.7 * np.sin((hours - 6) * np.pi / 12))
             
-            fig.add_trace(
-                go.Scatter(x=hours, y=hour_values, mode='lines+markers', marker_color='#198754'),
-                row=2, col=1
+            # Day of week chart above the hour chart
+            traces, grid = charts.stacked_rows(
+                [[charts.bar(day_order, day_revenue.to_numpy(), marker={'color': '#0d6efd'})],
+                 [charts.scatter(hours, hour_values, mode='lines+markers', marker={'color': '#198754'})]],
+                titles=('Revenue by Day of Week', 'Revenue by Hour of Day'),
+                vertical_spacing=0.15
             )
             
-            fig.update_layout(height=600, template='plotly_white', showlegend=False)
-            
             return {
                 'best_day': best_day,
                 'best_hour': f"{best_hour}:00",
-                'chart': fig.to_json(),
-                'recommendation': f"Consider running promotions on {best_day}s around {best_hour}:00"
+                'chart': charts.chart(traces, charts.layout(height=600, showlegend=False, **grid)),
+                'recommendation': self._timing_recommendation(best_day, best_hour)
             }
             
         except Exception as e:
@@ -349,19 +594,19 @@ class GrowthAnalytics:
         days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         day_revenues = [8500, 12000, 9500, 11000, 15000, 18000, 7500]
         
-        fig = make_subplots(rows=2, cols=1, subplot_titles=('Revenue by Day of Week', 'Revenue by Hour of Day'))
-        fig.add_trace(go.Bar(x=days, y=day_revenues, marker_color='#0d6efd'), row=1, col=1)
-        
-        hours = list(range(24))
-        hour_revenues = [500 + np.random.normal(0, 200) + 800 * np.sin((h-6)*np.pi/12) for h in hours]
-        fig.add_trace(go.Scatter(x=hours, y=hour_revenues, mode='lines+markers', marker_color='#198754'), row=2, col=1)
-        
-        fig.update_layout(height=600, template='plotly_white', showlegend=False)
+        hours = np.arange(24)
+        hour_revenues = 500 + np.random.normal(0, 200, 24) + 800 * np.sin((hours - 6) * np.pi / 12)
+        traces, grid = charts.stacked_rows(
+            [[charts.bar(days, day_revenues, marker={'color': '#0d6efd'})],
+             [charts.scatter(hours, hour_revenues, mode='lines+markers', marker={'color': '#198754'})]],
+            titles=('Revenue by Day of Week', 'Revenue by Hour of Day')
+        )
         
         return {
+            'fallback': True,
             'best_day': 'Saturday',
             'best_hour': '15:00',
-            'chart': fig.to_json(),
+            'chart': charts.chart(traces, charts.layout(height=600, showlegend=False, **grid)),
             'recommendation': 'Consider running promotions on Saturdays around 15:00'
         }
     
@@ -379,21 +624,11 @@ class GrowthAnalytics:
             
             print(f"GrowthAnalytics: Analyzing missed opportunities from {len(self.processed_df)} rows")
             
-            # Clean the data first
-            valid_data = self.processed_df.dropna(subset=['product', 'price', 'quantity'])
-            
-            # Strategy 1: Find products with zero quantity (potential stockouts)
-            zero_qty = valid_data[
-                (valid_data['quantity'] == 0) & 
-                (valid_data['price'] > 0)
-            ]
+            # Stockouts (zero quantity at a price) and per-product stats for underperformers
+            missed_summary, product_stats = self.graph.get('opportunity_tables')
             
-            if not zero_qty.empty:
-                print(f"GrowthAnalytics: Found {len(zero_qty)} stockout opportunities")
-                missed_summary = zero_qty.groupby('product').agg({
-                    'price': 'mean',
-                    'quantity': 'count'  # Count of stockout instances
-                }).reset_index()
+            if not missed_summary.empty:
+                print(f"GrowthAnalytics: Found {int(missed_summary['quantity'].sum())} stockout opportunities")
                 
                 for _, row in missed_summary.iterrows():
                     # Estimate potential revenue (stockout instances * average price)
@@ -407,13 +642,6 @@ class GrowthAnalytics:
                     })
                     total_missed_revenue += potential_revenue
             
-            # Strategy 2: Find low-performing products with high prices (underutilized potential)
-            product_stats = valid_data.groupby('product').agg({
-                'quantity': 'sum',
-                'price': 'mean',
-                'revenue': 'sum'
-            }).reset_index()
-            
             if len(product_stats) > 1:
                 # Find products with below-median sales but above-median prices
                 median_quantity = product_stats['quantity'].median()
@@ -465,28 +693,16 @@ class GrowthAnalytics:
                     'quality_score': 94.0
                 }
             
+            # The dataset's shared profile covers its stored columns; calendar fields derive from the date
+            profile = self.dataset.profile if self.dataset is not None else profile_frame(self.processed_df)
             summary = {
-                'missing_values': 0,
-                'duplicates': 0,
-                'zero_prices': 0,
-                'negative_quantities': 0,
-                'total_rows': int(len(self.processed_df))
+                'missing_values': profile.missing_total,
+                'duplicates': profile.duplicates,
+                'zero_prices': profile.stat('price', 'zero'),
+                'negative_quantities': profile.stat('quantity', 'negative'),
+                'total_rows': profile.rows
             }
             
-            # Count missing values
-            summary['missing_values'] = int(self.processed_df.isnull().sum().sum())
-            
-            # Count duplicates
-            summary['duplicates'] = int(self.processed_df.duplicated().sum())
-            
-            # Count zero prices
-            if 'price' in self.processed_df.columns:
-                summary['zero_prices'] = int((self.processed_df['price'] == 0).sum())
-            
-            # Count negative quantities
-            if 'quantity' in self.processed_df.columns:
-                summary['negative_quantities'] = int((self.processed_df['quantity'] < 0).sum())
-            
             # Calculate data quality score
             total_issues = sum([summary['missing_values'], summary['duplicates'], 
                               summary['zero_prices'], summary['negative_quantities']])
@@ -511,12 +727,12 @@ class GrowthAnalytics:
             recommendations = []
             
             # Get top products for bundling recommendations
-            top_products = self.get_top_products()['products']
+            top_products = self.graph.get('product_performance')['product'].head(2).tolist()
             if len(top_products) >= 2:
                 recommendations.append({
                     'type': 'bundling',
                     'title': 'Product Bundling Opportunity',
-                    'recommendation': f"Bundle {top_products[0]['product']} with {top_products[1]['product']} for increased sales",
+                    'recommendation': f"Bundle {top_products[0]} with {top_products[1]} for increased sales",
                     'impact': 'High',
                     'icon': 'fas fa-box'
                 })
@@ -524,12 +740,7 @@ class GrowthAnalytics:
             # Price optimization recommendation
             if 'price' in self.processed_df.columns and 'quantity' in self.processed_df.columns:
                 # Find low-stock, high-demand items
-                stock_analysis = self.processed_df.groupby('product').agg({
-                    'quantity': ['sum', 'count'],
-                    'price': 'mean'
-                }).reset_index()
-                
-                if not stock_analysis.empty:
+                if self.graph.get('product_count') > 0:
                     recommendations.append({
                         'type': 'pricing',
                         'title': 'Price Optimization',
@@ -548,11 +759,15 @@ class GrowthAnalytics:
             })
             
             # Marketing timing recommendation
-            best_times = self.analyze_best_selling_times()
+            try:
+                best_day, best_hour = self.graph.get('best_times')
+            except Exception:
+                # Same advice analyze_best_selling_times falls back to
+                best_day, best_hour = 'Saturday', 15
             recommendations.append({
                 'type': 'marketing',
                 'title': 'Marketing Timing',
-                'recommendation': best_times['recommendation'],
+                'recommendation': self._timing_recommendation(best_day, best_hour),
                 'impact': 'Medium',
                 'icon': 'fas fa-megaphone'
             })
@@ -587,45 +802,60 @@ class GrowthAnalytics:
                 'revenue' not in self.processed_df.columns):
                 return self._fallback_lifecycle_data()
             
-            # Group by product and date to analyze trends
-            product_trends = self.processed_df.groupby(['product', 'date'])['revenue'].sum().reset_index()
-            
-            lifecycle_data = []
-            
-            for product in self.processed_df['product'].unique():
-                product_data = product_trends[product_trends['product'] == product].sort_values('date')
-                
-                if len(product_data) < 3:
-                    stage = 'Launch'
-                    confidence = 'Low'
-                else:
-                    # Calculate trend using linear regression slope
-                    x = range(len(product_data))
-                    y = product_data['revenue'].values
-                    
-                    # Simple trend calculation
-                    recent_avg = y[-3:].mean() if len(y) >= 3 else y.mean()
-                    early_avg = y[:3].mean() if len(y) >= 3 else y.mean()
-                    
-                    trend = (recent_avg - early_avg) / early_avg if early_avg > 0 else 0
-                    
-                    # Classify lifecycle stage
-                    if trend > 0.2:
-                        stage = 'Growth'
-                    elif trend > -0.1:
-                        stage = 'Mature'
-                    else:
-                        stage = 'Decline'
-                    
-                    confidence = 'High' if len(product_data) > 10 else 'Medium'
-                
-                lifecycle_data.append({
+            # One grouped pass: (product, date) totals sorted by product then date,
+            # so each product's series occupies values[starts[i]:ends[i]]
+            product_trends = self.graph.get('product_daily_revenue')
+            values, starts, ends, trend_products = group_offsets(product_trends)
+            points = ends - starts
+            
+            # Simple trend: average of the last 3 points against the first 3
+            mature = points >= 3
+            padded = np.r_[values, 0.0, 0.0, 0.0]
+            first = np.where(mature, starts, len(values))
+            last = np.where(mature, ends, len(values) + 3)
+            early_avg = (padded[first] + padded[first + 1] + padded[first + 2]) / 3
+            recent_avg = (padded[last - 3] + padded[last - 2] + padded[last - 1]) / 3
+            with np.errstate(divide='ignore', invalid='ignore'):
+                trend = np.where(early_avg > 0, (recent_avg - early_avg) / np.where(early_avg > 0, early_avg, 1), 0.0)
+            
+            # Least-squares revenue trend per day of every product, in one batched solve
+            days = (product_trends.index.get_level_values(1) - product_trends.index.levels[1].min()) / pd.Timedelta(days=1)
+            fit = fit_trends(days.to_numpy(), values, starts, ends)
+            
+            # Classify lifecycle stage
+            stage = np.select([~mature, trend > 0.2, trend > -0.1], ['Launch', 'Growth', 'Mature'], 'Decline')
+            confidence = np.select([~mature, points > 10], ['Low', 'High'], 'Medium')
+            
+            table = pd.DataFrame({
+                'stage': stage,
+                'confidence': confidence,
+                'trend_value': np.where(mature, trend, 0.0),
+                'total_revenue': np.add.reduceat(values, starts) if len(values) else np.empty(0),
+                'daily_slope': fit['slope'].to_numpy(dtype=float),
+                'r_squared': fit['r_squared'].to_numpy(dtype=float),
+            }, index=trend_products)
+            
+            # Products in order of first appearance; ones without dated revenue are at launch
+            products = pd.unique(self.processed_df['product'])
+            table = table.reindex(products)
+            missing = table['stage'].isna().to_numpy()
+            table.loc[missing, ['stage', 'confidence']] = ['Launch', 'Low']
+            table = table.fillna({'trend_value': 0.0, 'total_revenue': 0.0, 'daily_slope': 0.0, 'r_squared': 0.0})
+            
+            lifecycle_data = [
+                {
                     'product': str(product),
-                    'stage': stage,
-                    'confidence': confidence,
-                    'trend_value': float(trend) if 'trend' in locals() else 0.0,
-                    'total_revenue': float(product_data['revenue'].sum())
-                })
+                    'stage': product_stage,
+                    'confidence': product_confidence,
+                    'trend_value': float(trend_value),
+                    'total_revenue': float(total_revenue),
+                    'daily_slope': round(float(daily_slope), 4),
+                    'r_squared': round(float(r_squared), 4)
+                }
+                for product, product_stage, product_confidence, trend_value, total_revenue, daily_slope, r_squared in zip(
+                    products, table['stage'], table['confidence'], table['trend_value'], table['total_revenue'],
+                    table['daily_slope'], table['r_squared'])
+            ]
             
             return lifecycle_data
             
@@ -635,9 +865,12 @@ class GrowthAnalytics:
     def _fallback_lifecycle_data(self):
         """Fallback lifecycle data"""
         return [
-            {'product': 'Laptop', 'stage': 'Mature', 'confidence': 'High', 'trend_value': 0.05, 'total_revenue': 12000},
-            {'product': 'Mouse', 'stage': 'Growth', 'confidence': 'Medium', 'trend_value': 0.35, 'total_revenue': 1800},
-            {'product': 'Monitor', 'stage': 'Decline', 'confidence': 'Medium', 'trend_value': -0.25, 'total_revenue': 3200}
+            {'product': 'Laptop', 'stage': 'Mature', 'confidence': 'High', 'trend_value': 0.05, 'total_revenue': 12000,
+             'fallback': True},
+            {'product': 'Mouse', 'stage': 'Growth', 'confidence': 'Medium', 'trend_value': 0.35, 'total_revenue': 1800,
+             'fallback': True},
+            {'product': 'Monitor', 'stage': 'Decline', 'confidence': 'Medium', 'trend_value': -0.25, 'total_revenue': 3200,
+             'fallback': True}
         ]
     
     def detect_seasonality_patterns(self):
@@ -647,41 +880,24 @@ class GrowthAnalytics:
                 'date' not in self.processed_df.columns or 'revenue' not in self.processed_df.columns):
                 return self._fallback_seasonality_data()
             
-            # Weekly patterns
-            weekly_data = self.processed_df.groupby('day_of_week')['revenue'].mean()
             day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            weekly_data = weekly_data.reindex(day_order, fill_value=0)
-            
-            # Monthly patterns (if enough data)
-            monthly_data = None
-            if 'month' in self.processed_df.columns:
-                monthly_data = self.processed_df.groupby('month')['revenue'].mean()
-            
-            # Calculate seasonality index
-            overall_avg = self.processed_df['revenue'].mean()
+            # Weekly patterns and the overall average for the seasonality index
+            weekly_data, overall_avg = self.graph.get('weekday_average')
             weekly_index = {day: float(val / overall_avg) if overall_avg > 0 else 1.0 
                            for day, val in weekly_data.items()}
             
             # Create visualization data
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                x=day_order,
-                y=weekly_data.values,
-                marker_color=['#dc3545' if idx < overall_avg else '#198754' for idx in weekly_data.values],
+            trace = charts.bar(
+                day_order,
+                weekly_data.to_numpy(),
+                marker={'color': np.where(weekly_data.to_numpy() < overall_avg, '#dc3545', '#198754').tolist()},
                 name='Daily Average Revenue'
-            ))
-            
-            fig.update_layout(
-                title='Weekly Seasonality Pattern',
-                xaxis_title='Day of Week',
-                yaxis_title='Average Revenue ($)',
-                template='plotly_white',
-                height=300
             )
             
             return {
                 'weekly_pattern': weekly_index,
-                'chart': fig.to_json(),
+                'chart': charts.chart([trace], charts.layout(title='Weekly Seasonality Pattern', xaxis_title='Day of Week',
+                                                             yaxis_title='Average Revenue ($)', height=300)),
                 'peak_day': weekly_data.idxmax(),
                 'low_day': weekly_data.idxmin(),
                 'seasonality_strength': float(weekly_data.std() / weekly_data.mean()) if weekly_data.mean() > 0 else 0
@@ -698,24 +914,23 @@ class GrowthAnalytics:
         }
         
         # Create demo chart
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=list(weekly_pattern.keys()),
-            y=list(weekly_pattern.values()),
-            marker_color=['#dc3545' if val < 1.0 else '#198754' for val in weekly_pattern.values()]
-        ))
-        fig.update_layout(title='Weekly Seasonality Pattern', template='plotly_white', height=300)
+        trace = charts.bar(
+            list(weekly_pattern.keys()),
+            list(weekly_pattern.values()),
+            marker={'color': ['#dc3545' if val < 1.0 else '#198754' for val in weekly_pattern.values()]}
+        )
         
         return {
+            'fallback': True,
             'weekly_pattern': weekly_pattern,
-            'chart': fig.to_json(),
+            'chart': charts.chart([trace], charts.layout(title='Weekly Seasonality Pattern', height=300)),
             'peak_day': 'Saturday',
             'low_day': 'Sunday',
             'seasonality_strength': 0.35
         }
     
-    def detect_anomalies(self):
-        """Detect sales anomalies using statistical methods"""
+    def detect_anomalies(self, top_n=5):
+        """Detect sales anomalies using statistical methods, most unusual first"""
         try:
             anomalies = []
             
@@ -723,36 +938,19 @@ class GrowthAnalytics:
                 'date' in self.processed_df.columns and 'revenue' in self.processed_df.columns and
                 'product' in self.processed_df.columns):
                 
-                # Group by product and date
-                daily_sales = self.processed_df.groupby(['product', 'date'])['revenue'].sum().reset_index()
+                # Group by product and date, then flag IQR outliers of all products in one pass
+                daily_sales = self.graph.get('product_daily_revenue')
+                flagged = flag_anomalies(daily_sales, top_n=top_n)
                 
-                for product in self.processed_df['product'].unique():
-                    product_data = daily_sales[daily_sales['product'] == product]['revenue']
-                    
-                    if len(product_data) >= 5:
-                        # Calculate IQR for anomaly detection
-                        q1 = product_data.quantile(0.25)
-                        q3 = product_data.quantile(0.75)
-                        iqr = q3 - q1
-                        lower_bound = q1 - 1.5 * iqr
-                        upper_bound = q3 + 1.5 * iqr
-                        
-                        # Find anomalies
-                        anomalous_values = product_data[(product_data < lower_bound) | (product_data > upper_bound)]
-                        
-                        if not anomalous_values.empty:
-                            for idx, value in anomalous_values.items():
-                                anomaly_type = 'spike' if value > upper_bound else 'drop'
-                                severity = 'high' if abs(value - product_data.median()) > 2 * product_data.std() else 'medium'
-                                
-                                anomalies.append({
-                                    'product': str(product),
-                                    'type': anomaly_type,
-                                    'severity': severity,
-                                    'value': float(value),
-                                    'expected_range': f"${lower_bound:.2f} - ${upper_bound:.2f}",
-                                    'deviation_percent': float(abs(value - product_data.median()) / product_data.median() * 100) if product_data.median() > 0 else 0
-                                })
+                for row in flagged.itertuples(index=False):
+                    anomalies.append({
+                        'product': str(row.product),
+                        'type': 'spike' if row.value > row.upper_bound else 'drop',
+                        'severity': 'high' if row.deviation > 2 * row.std else 'medium',
+                        'value': float(row.value),
+                        'expected_range': f"${row.lower_bound:.2f} - ${row.upper_bound:.2f}",
+                        'deviation_percent': float(row.deviation_percent)
+                    })
             
             # Add fallback anomalies if none detected
             if not anomalies:
@@ -775,7 +973,7 @@ class GrowthAnalytics:
                     }
                 ]
             
-            return anomalies[:5]  # Return top 5 anomalies
+            return anomalies[:top_n]
             
         except Exception as e:
             return [
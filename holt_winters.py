@@ -0,0 +1,185 @@
+"""
+Vectorized Holt-Winters Forecasting for Smart Data Analyzer
+Additive trend and additive weekly seasonality exponential smoothing run over
+a 2D array of daily series at once: the level/trend/seasonal recursions step
+through time for every series and every candidate smoothing parameter set
+together, so a catalog of thousands of products costs one pass over its days
+rather than one optimizer run per product.
+"""
+
+import numpy as np
+from statistics import NormalDist
+from typing import Dict, Optional, Sequence
+
+SEASON_LENGTH = 7
+# Coarse search grid; the best point of each series is then refined on a finer grid around it
+ALPHA_GRID = np.array([0.05, 0.2, 0.4, 0.6, 0.8, 0.95])
+BETA_GRID = np.array([0.0, 0.05, 0.2])
+GAMMA_GRID = np.array([0.0, 0.1, 0.3, 0.6])
+REFINE_STEPS = {'alpha': 0.075, 'beta': 0.025, 'gamma': 0.05}
+
+
+def left_align(series: Sequence[np.ndarray]):
+    """
+    Stack series of different lengths as rows of a NaN-padded matrix, each
+    starting in the first column. Returns (values, lengths).
+    """
+    lengths = np.array([len(values) for values in series], dtype=np.int64)
+    values = np.full((len(series), lengths.max() if len(series) else 0), np.nan)
+    for row, y in enumerate(series):
+        values[row, :len(y)] = y
+    return values, lengths
+
+
+def initial_states(values: np.ndarray, lengths: np.ndarray, season_length: int = SEASON_LENGTH,
+                   seasons: int = 4):
+    """
+    Starting level, trend and seasonal indices per series.
+    A least-squares line is fitted to each series' first few whole seasons
+    (up to `seasons`): its slope starts the trend, its value just before the
+    first day the level, and the mean deviation from it on each weekday the
+    seasonal indices. Series shorter than two seasons get no seasonality.
+    """
+    m = season_length
+    seasonal = lengths >= 2 * m
+    window = np.where(seasonal, np.minimum(lengths // m, seasons) * m, np.minimum(lengths, 2 * m))
+    t = np.arange(min(values.shape[1], seasons * m if seasonal.any() else 2 * m))
+    used = t[None, :] < window[:, None]
+    y = np.where(used, values[:, :len(t)], 0.0)
+    counts = window.astype(float)
+    t_mean = (window - 1) / 2
+    y_mean = y.sum(axis=1) / counts
+    centered_t = np.where(used, t[None, :] - t_mean[:, None], 0.0)
+    sxx = (centered_t ** 2).sum(axis=1)
+    slope = np.divide((centered_t * (y - y_mean[:, None])).sum(axis=1), sxx, out=np.zeros(len(values)), where=sxx > 0)
+    intercept = y_mean - slope * t_mean
+
+    residual = np.where(used, y - intercept[:, None] - slope[:, None] * t[None, :], 0.0)
+    phase_sums = np.zeros((len(values), m))
+    phase_counts = np.zeros((len(values), m))
+    np.add.at(phase_sums.T, t % m, residual.T)
+    np.add.at(phase_counts.T, t % m, used.T)
+    season = np.where(seasonal[:, None], phase_sums / np.maximum(phase_counts, 1), 0.0)
+    season -= season.mean(axis=1, keepdims=True)
+    return intercept - slope, slope, season, seasonal
+
+
+def smooth(values: np.ndarray, lengths: np.ndarray, alpha: np.ndarray, beta: np.ndarray, gamma: np.ndarray,
+           season_length: int = SEASON_LENGTH) -> Dict[str, np.ndarray]:
+    """
+    Run the additive Holt-Winters recursions for parameter sets of shape
+    (candidates, series), the statsmodels ExponentialSmoothing formulation:
+        level  = alpha (y - season) + (1 - alpha) (level + trend)
+        trend  = beta (level change) + (1 - beta) trend
+        season = gamma (y - previous level - previous trend) + (1 - gamma) season
+    Returns the one-step-ahead sum of squared errors per candidate and series
+    and the final states; gamma is ignored for series too short to be seasonal.
+    """
+    m = season_length
+    level0, trend0, season0, seasonal = initial_states(values, lengths, m)
+    shape = np.broadcast_shapes(alpha.shape, beta.shape, gamma.shape, (1, len(values)))
+    # Series sorted longest first, so the ones still running at any step are a prefix
+    order = np.argsort(-lengths, kind='stable')
+    active = np.searchsorted(-lengths[order], -np.arange(values.shape[1]), side='left')
+    observations = np.ascontiguousarray(values[order].T)
+    alpha = np.broadcast_to(alpha, shape)[:, order]
+    alpha_beta = alpha * np.broadcast_to(beta, shape)[:, order]
+    gamma = np.where(seasonal[order], np.broadcast_to(gamma, shape)[:, order], 0.0)
+    level = np.broadcast_to(level0[order], shape).copy()
+    trend = np.broadcast_to(trend0[order], shape).copy()
+    season = np.broadcast_to(season0[order].T[:, None, :], (m,) + shape).copy()
+    sse = np.zeros(shape)
+
+    # Error-correction form of the same recursions: with e = y - (level + trend + season),
+    # level += trend + alpha e, trend += alpha beta e, season += gamma e
+    for t in range(values.shape[1]):
+        k = active[t]
+        y, l, b, s = observations[t, :k], level[:, :k], trend[:, :k], season[t % m][:, :k]
+        error = y - l
+        error -= b
+        error -= s
+        sse[:, :k] += error * error
+        l += b
+        l += alpha[:, :k] * error
+        b += alpha_beta[:, :k] * error
+        s += gamma[:, :k] * error
+
+    inverse = np.argsort(order)
+    return {'sse': sse[:, inverse], 'level': level[:, inverse], 'trend': trend[:, inverse],
+            'season': season[:, :, inverse].transpose(1, 2, 0), 'seasonal': seasonal}
+
+
+def _search(values, lengths, alphas, betas, gammas, season_length, block_size):
+    """Best candidate per series; candidate arrays are (candidates, series) or (candidates, 1)"""
+    best = {name: np.empty(len(values)) for name in ['alpha', 'beta', 'gamma', 'sse']}
+    for start in range(0, len(values), block_size):
+        block = slice(start, start + block_size)
+        candidates = [np.broadcast_to(grid, (len(grid), min(block_size, len(values) - start))) if grid.shape[1] == 1
+                      else grid[:, block] for grid in (alphas, betas, gammas)]
+        sse = smooth(values[block], lengths[block], *candidates, season_length=season_length)['sse']
+        choice = sse.argmin(axis=0)
+        columns = np.arange(sse.shape[1])
+        for name, grid in zip(['alpha', 'beta', 'gamma'], candidates):
+            best[name][block] = grid[choice, columns]
+        best['sse'][block] = sse[choice, columns]
+    return best
+
+
+def holt_winters(series: Sequence[np.ndarray], horizon: int = 30, season_length: int = SEASON_LENGTH,
+                 level: float = 0.95, block_size: int = 500,
+                 initial: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """
+    Fit and forecast every series (a list of 1D arrays of daily values, each
+    at least two days long) with smoothing parameters picked per series by a
+    vectorized grid search on one-step-ahead squared error, refined once
+    around the best coarse point.
+    initial warm-starts the fit from earlier alpha/beta/gamma per series:
+    the coarse search is skipped and only the refinement around them runs.
+    Returns (series, horizon) forecast/lower/upper arrays, with intervals
+    from the ETS(A,A,A) forecast variance, and the chosen alpha/beta/gamma
+    and residual_std per series.
+    """
+    values, lengths = left_align(series)
+    if initial is None:
+        grid = np.array(np.meshgrid(ALPHA_GRID, BETA_GRID, GAMMA_GRID, indexing='ij')).reshape(3, -1, 1)
+        best = _search(values, lengths, *grid, season_length, block_size)
+    else:
+        best = {name: np.broadcast_to(np.asarray(initial[name], dtype=float), len(values))
+                for name in ['alpha', 'beta', 'gamma']}
+
+    offsets = np.array(np.meshgrid([-1, 0, 1], [-1, 0, 1], [-1, 0, 1], indexing='ij')).reshape(3, -1, 1)
+    refined = [np.clip(best[name][None, :] + offsets[i] * REFINE_STEPS[name], 0.0, 1.0)
+               for i, name in enumerate(['alpha', 'beta', 'gamma'])]
+    best = _search(values, lengths, *refined, season_length, block_size)
+
+    final = {}
+    for start in range(0, len(values), block_size):
+        block = slice(start, start + block_size)
+        states = smooth(values[block], lengths[block], best['alpha'][None, block], best['beta'][None, block],
+                        best['gamma'][None, block], season_length)
+        for name in ['level', 'trend', 'season']:
+            final.setdefault(name, []).append(states[name][0])
+        final.setdefault('seasonal', []).append(states['seasonal'])
+    level_T, trend_T, season_T, seasonal = (np.concatenate(final[name]) for name in
+                                            ['level', 'trend', 'season', 'seasonal'])
+
+    steps = np.arange(1, horizon + 1)
+    phase = (lengths[:, None] + steps - 1) % season_length
+    forecast = level_T[:, None] + trend_T[:, None] * steps + np.take_along_axis(season_T, phase, axis=1)
+
+    # h-step variance: sigma^2 (1 + sum_{j<h} c_j^2), c_j = alpha (1 + j beta) + gamma [j is a whole season]
+    alpha, beta, gamma = best['alpha'][:, None], best['beta'][:, None], np.where(seasonal, best['gamma'], 0.0)[:, None]
+    j = steps[None, :-1]
+    c = alpha * (1 + j * beta) + gamma * (j % season_length == 0)
+    multiplier = np.sqrt(1 + np.concatenate([np.zeros((len(values), 1)), np.cumsum(c * c, axis=1)], axis=1))
+    residual_std = np.sqrt(best['sse'] / np.maximum(lengths, 1))
+    spread = NormalDist().inv_cdf((1 + level) / 2) * residual_std[:, None] * multiplier
+    return {
+        'forecast': forecast,
+        'lower': forecast - spread,
+        'upper': forecast + spread,
+        'alpha': best['alpha'],
+        'beta': best['beta'],
+        'gamma': np.where(seasonal, best['gamma'], 0.0),
+        'residual_std': residual_std,
+    }
@@ -0,0 +1,290 @@
+"""
+Upload Ingestion for Smart Data Analyzer
+Streams large CSV uploads into the columnar dataset store chunk by chunk,
+or parses newline-aligned byte ranges of very large files on a process pool
+"""
+
+import io
+import os
+import multiprocessing
+from collections import deque
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Tuple
+
+from column_mapper import ColumnMapper
+from data_store import DatasetWriter
+from aggregate_cube import AggregateCube
+from sales_dataset import SalesDataset, CANONICAL_FIELDS
+
+SALES_SHEET_KEYWORDS = ['product', 'item', 'sales', 'price', 'qty', 'quantity', 'order']
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_RANGE_BYTES = 64 * 1024 * 1024
+# Parsed ranges waiting for the writer, per pool worker
+IN_FLIGHT_PER_WORKER = 2
+# Partial cubes of ingested chunks held before they are compacted into one
+CUBE_PARTIALS = 16
+
+
+class ChunkCubes:
+    """
+    Aggregate cube of a dataset ingested chunk by chunk, built from one
+    partial cube per chunk and compacted as it goes, so the stored dataset
+    is never loaded whole to aggregate it
+    """
+
+    def __init__(self):
+        self.partials: List[AggregateCube] = []
+        self.complete = True
+
+    def add(self, chunk: pd.DataFrame, row_offset: int):
+        if not self.complete or chunk.empty:
+            return
+        dataset = SalesDataset.from_frame(chunk)
+        if dataset.fields != CANONICAL_FIELDS:
+            self.complete = False
+            return
+        self.partials.append(AggregateCube.build(dataset, row_offset=row_offset))
+        if len(self.partials) >= CUBE_PARTIALS:
+            self.partials = [AggregateCube.combine(self.partials)]
+
+    def save(self, dataset_path: str, content_hash: str):
+        """Store the combined cube next to the dataset; the first analysis builds it otherwise"""
+        if not (self.complete and self.partials):
+            return
+        try:
+            AggregateCube.combine(self.partials).save(dataset_path, content_hash)
+        except (OSError, ValueError) as e:
+            print(f"Ingest: Could not store aggregate cube: {e}")
+
+
+def _sheet_summaries(filepath: str) -> List[Dict[str, Any]]:
+    """Read only the header row and row count of every sheet in a workbook"""
+    summaries = []
+    if filepath.lower().endswith('.xls'):
+        import xlrd
+        workbook = xlrd.open_workbook(filepath, on_demand=True)
+        try:
+            for name in workbook.sheet_names():
+                sheet = workbook.sheet_by_name(name)
+                header = sheet.row_values(0) if sheet.nrows else []
+                summaries.append({'name': name, 'rows': sheet.nrows, 'header': header})
+                workbook.unload_sheet(name)
+        finally:
+            workbook.release_resources()
+        return summaries
+
+    import openpyxl
+    workbook = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.max_row
+            if rows is None:
+                # Workbook has no dimension record, count rows as a stream
+                sheet.reset_dimensions()
+                rows = sum(1 for _ in sheet.iter_rows(values_only=True))
+            header = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            summaries.append({'name': sheet.title, 'rows': rows, 'header': list(header)})
+    finally:
+        workbook.close()
+    return summaries
+
+
+def sniff_excel_sheet(filepath: str) -> Tuple[Any, Any]:
+    """
+    Pick the sheet that looks like sales data from header rows and row counts
+    only, and whether it has a usable header row.
+    Returns (sheet_name, header) ready for pd.read_excel.
+    """
+    summaries = _sheet_summaries(filepath)
+    print(f"Found {len(summaries)} sheets: {[s['name'] for s in summaries]}")
+    if not summaries:
+        return 0, None
+
+    chosen = None
+    for summary in summaries:
+        # Rows after the header, matching len() of the parsed sheet
+        if summary['rows'] - 1 > 5:
+            cols_str = ' '.join(str(col).lower() for col in summary['header'] if col is not None)
+            if any(keyword in cols_str for keyword in SALES_SHEET_KEYWORDS):
+                chosen = summary
+                print(f"Using sheet '{summary['name']}' which appears to contain sales data")
+                break
+
+    # If no sales sheet found, use the largest sheet
+    if chosen is None:
+        chosen = max(summaries, key=lambda s: s['rows'])
+        print(f"No clear sales sheet found, using largest sheet: '{chosen['name']}'")
+
+    # Blank header cells would become "Unnamed:" columns, so let
+    # ColumnMapper find the header row instead
+    header = chosen['header']
+    if not header or any(col is None or str(col).strip() == '' for col in header):
+        print("Detected unnamed columns, reading sheet without headers")
+        return chosen['name'], None
+    return chosen['name'], 0
+
+
+def read_excel_upload(filepath: str) -> pd.DataFrame:
+    """Parse exactly one sheet of an uploaded workbook, exactly once"""
+    try:
+        sheet_name, header = sniff_excel_sheet(filepath)
+    except Exception as e:
+        print(f"Excel sheet sniffing failed: {e}, trying without headers")
+        return pd.read_excel(filepath, header=None)
+    return pd.read_excel(filepath, sheet_name=sheet_name, header=header)
+
+
+def _detect_mapping(sample: pd.DataFrame, mapper: ColumnMapper) -> Dict[str, Any]:
+    """Run column detection on a sample of the file and validate it"""
+    if sample.empty:
+        raise ValueError("The uploaded file appears to be empty")
+
+    mapping_result = mapper.detect_column_mapping(sample)
+    is_valid, missing_fields = mapper.validate_required_fields(mapping_result['mappings'])
+    if not is_valid:
+        raise ValueError(
+            f"Could not automatically detect required columns: {', '.join(missing_fields)}. "
+            "Please ensure your file has columns for: product, quantity, price, date"
+        )
+
+    if not all(original in sample.columns for original in mapping_result['mappings'].values()):
+        # Header repair rewrites the frame, which needs the whole file in memory
+        raise ValueError("Chunked ingest requires column headers on the first row of the file")
+
+    return mapping_result
+
+
+def stream_csv_to_dataset(filepath: str, dataset_path: str, mapper: ColumnMapper,
+                          chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, Any]:
+    """
+    Ingest a CSV file without holding it in memory.
+    Column detection runs on the first chunk only; mapping, date parsing and
+    revenue computation are applied chunk by chunk and appended to the store,
+    and each chunk is folded into the dataset's aggregate cube.
+    Returns the same shape as validate_sales_data's mapping data (minus the
+    DataFrame) plus the dataset metadata.
+    """
+    sample = pd.read_csv(filepath, nrows=chunk_rows)
+    mapping_result = _detect_mapping(sample, mapper)
+    mapping = mapping_result['mappings']
+    # Ambiguous day/month order is decided once so every chunk agrees
+    dayfirst = mapping_result.get('date_format', {}).get('dayfirst')
+
+    # Columns keep the type inferred from the first chunk; product names are
+    # always text so numeric SKUs in early rows do not drop later names
+    dtypes = {mapping['product']: str}
+
+    writer = DatasetWriter(dataset_path)
+    cubes = ChunkCubes()
+    try:
+        for chunk_number, chunk in enumerate(pd.read_csv(filepath, chunksize=chunk_rows, dtype=dtypes)):
+            standardized = mapper.apply_mapping(chunk, mapping, dayfirst=dayfirst)
+            cubes.add(standardized, writer.rows)
+            writer.append(standardized)
+            print(f"Streaming ingest: chunk {chunk_number + 1} - {writer.rows} rows stored")
+        if writer.rows == 0:
+            raise ValueError("No rows with valid dates were found in the uploaded file")
+        meta = writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    cubes.save(dataset_path, meta['content_hash'])
+
+    return {
+        'mapping': mapping,
+        'confidence': mapping_result['confidence'],
+        'dayfirst': dayfirst,
+        'meta': meta,
+    }
+
+
+def split_byte_ranges(filepath: str, start: int, range_bytes: int) -> List[Tuple[int, int]]:
+    """Split a file from `start` into byte ranges that end on a newline"""
+    size = os.path.getsize(filepath)
+    ranges = []
+    with open(filepath, 'rb') as f:
+        while start < size:
+            end = min(start + range_bytes, size)
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _parse_byte_range(filepath: str, start: int, end: int, columns: List[str],
+                      dtypes: Dict[str, Any], mapping: Dict[str, str],
+                      mapper: ColumnMapper, dayfirst: bool = None) -> pd.DataFrame:
+    """Worker: parse one byte range and apply the detected mapping"""
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    try:
+        chunk = pd.read_csv(io.BytesIO(data), header=None, names=columns, dtype=dtypes)
+    except pd.errors.EmptyDataError:
+        chunk = pd.DataFrame(columns=columns)
+    return mapper.apply_mapping(chunk, mapping, dayfirst=dayfirst)
+
+
+def parallel_csv_to_dataset(filepath: str, dataset_path: str, mapper: ColumnMapper,
+                            workers: int = None, range_bytes: int = DEFAULT_RANGE_BYTES,
+                            sample_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, Any]:
+    """
+    Ingest a CSV file by parsing newline-aligned byte ranges on a process pool.
+    The mapping is detected once on a sample; each worker parses and maps its
+    range and results are appended to the store in file order. Files with
+    quoted fields spanning several lines cannot be split this way and should
+    use stream_csv_to_dataset instead.
+    """
+    sample = pd.read_csv(filepath, nrows=sample_rows)
+    mapping_result = _detect_mapping(sample, mapper)
+    mapping = mapping_result['mappings']
+    dayfirst = mapping_result.get('date_format', {}).get('dayfirst')
+    columns = list(sample.columns)
+    dtypes = {mapping['product']: str}
+
+    with open(filepath, 'rb') as f:
+        f.readline()
+        data_start = f.tell()
+    ranges = split_byte_ranges(filepath, data_start, range_bytes)
+    workers = workers or os.cpu_count() or 1
+
+    writer = DatasetWriter(dataset_path)
+    cubes = ChunkCubes()
+    try:
+        # Spawned workers avoid forking a threaded web server process
+        context = multiprocessing.get_context('spawn')
+        pool_size = min(workers, len(ranges)) or 1
+        with ProcessPoolExecutor(max_workers=pool_size, mp_context=context) as executor:
+            # Only a window of ranges is parsed ahead of the writer, so memory stays bounded
+            submit = lambda start, end: executor.submit(_parse_byte_range, filepath, start, end, columns,
+                                                        dtypes, mapping, mapper, dayfirst)
+            window = IN_FLIGHT_PER_WORKER * pool_size
+            in_flight = deque(submit(start, end) for start, end in ranges[:window])
+            for range_number in range(len(ranges)):
+                chunk = in_flight.popleft().result()
+                if range_number + window < len(ranges):
+                    in_flight.append(submit(*ranges[range_number + window]))
+                cubes.add(chunk, writer.rows)
+                writer.append(chunk)
+                # Drop the parsed range before waiting for the next one
+                del chunk
+                print(f"Parallel ingest: range {range_number + 1}/{len(ranges)} - {writer.rows} rows stored")
+        if writer.rows == 0:
+            raise ValueError("No rows with valid dates were found in the uploaded file")
+        meta = writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    cubes.save(dataset_path, meta['content_hash'])
+
+    return {
+        'mapping': mapping,
+        'confidence': mapping_result['confidence'],
+        'dayfirst': dayfirst,
+        'meta': meta,
+    }
@@ -0,0 +1,259 @@
+"""
+Analytics Result Cache for Smart Data Analyzer
+Content-addressed cache of analysis results keyed by dataset content hash,
+analysis name, parameters and code version, with an in-memory LRU tier and
+an on-disk tier that survives restarts
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import pickle
+import hashlib
+import inspect
+import threading
+import types
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+_MISSING = object()
+_code_versions: Dict[str, str] = {}
+
+
+def local_modules(module) -> List[types.ModuleType]:
+    """
+    A module and every module from the same directory it imports, directly
+    or through the modules it imports, found from their module-level names
+    """
+    root = os.path.dirname(os.path.abspath(module.__file__))
+    found, pending = {}, [module]
+    while pending:
+        current = pending.pop()
+        filename = getattr(current, '__file__', None)
+        if current.__name__ in found or not filename or os.path.dirname(os.path.abspath(filename)) != root:
+            continue
+        found[current.__name__] = current
+        for value in list(vars(current).values()):
+            if isinstance(value, types.ModuleType):
+                pending.append(value)
+            elif isinstance(getattr(value, '__module__', None), str) and value.__module__ in sys.modules:
+                pending.append(sys.modules[value.__module__])
+    return [found[name] for name in sorted(found)]
+
+
+def code_version(obj) -> str:
+    """
+    Fingerprint of the source of the module defining obj and the local
+    modules it depends on, so results are recomputed after code changes to
+    the engine or any of its analytics
+    """
+    module = inspect.getmodule(obj)
+    if module is None or not getattr(module, '__file__', None):
+        return 'unknown'
+    if module.__name__ not in _code_versions:
+        digest = hashlib.sha256()
+        for dependency in local_modules(module):
+            with open(dependency.__file__, 'rb') as f:
+                digest.update(dependency.__name__.encode('utf-8'))
+                digest.update(hashlib.sha256(f.read()).digest())
+        _code_versions[module.__name__] = digest.hexdigest()[:16]
+    return _code_versions[module.__name__]
+
+
+def is_fallback(value) -> bool:
+    """Whether an analysis returned its placeholder data (marked 'fallback': True) instead of a result"""
+    if isinstance(value, dict):
+        return bool(value.get('fallback'))
+    if isinstance(value, list) and value:
+        return all(isinstance(row, dict) and row.get('fallback') for row in value)
+    return False
+
+
+def cache_key(content_hash: str, analysis: str, params: Optional[Dict[str, Any]] = None,
+              version: str = '') -> str:
+    """Stable key for one analysis of one dataset"""
+    payload = json.dumps([content_hash, analysis, params or {}, version], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier result cache.
+    Memory entries are evicted least-recently-used beyond max_memory_bytes;
+    disk entries are pickles named by key, evicted oldest-first beyond
+    max_disk_bytes. Entries in either tier expire after ttl seconds.
+    """
+
+    def __init__(self, directory: Optional[str] = None, ttl: float = 24 * 3600,
+                 max_memory_bytes: int = 64 * 1024 * 1024, max_disk_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: 'OrderedDict[str, Tuple[float, bytes]]' = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+
+    def get(self, key: str, default=None):
+        """Cached value for key, or default"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return pickle.loads(entry[1])
+                self._drop_memory(key)
+
+        payload, created = self._read_disk(key, now)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.disk_hits += 1
+            self._store_memory(key, created, payload)
+        return pickle.loads(payload)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value in both tiers"""
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"ResultCache: Could not cache result: {e}")
+            return
+        created = time.time()
+        with self._lock:
+            self._store_memory(key, created, payload)
+        self._write_disk(key, payload)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]):
+        """
+        Return the cached value, computing and storing it on a miss.
+        Fallback placeholders are returned but not stored, so the next call
+        retries the analysis instead of serving them until they expire.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            if not is_fallback(value):
+                self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        for path, _, _ in self._disk_entries():
+            self._remove(path)
+        self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_bytes': self._disk_bytes,
+            }
+
+    # Memory tier
+
+    def _store_memory(self, key: str, created: float, payload: bytes) -> None:
+        self._drop_memory(key)
+        if len(payload) > self.max_memory_bytes:
+            return
+        self._memory[key] = (created, payload)
+        self._memory_bytes += len(payload)
+        while self._memory_bytes > self.max_memory_bytes:
+            self._drop_memory(next(iter(self._memory)))
+
+    def _drop_memory(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry[1])
+
+    # Disk tier
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def _disk_entries(self):
+        """(path, mtime, size) of every cached file"""
+        entries = []
+        if not self.directory or not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _read_disk(self, key: str, now: float):
+        if not self.directory:
+            return None, None
+        path = self._path(key)
+        try:
+            created = os.path.getmtime(path)
+            if now - created > self.ttl:
+                self._remove(path)
+                return None, None
+            with open(path, 'rb') as f:
+                return f.read(), created
+        except OSError:
+            return None, None
+
+    def _write_disk(self, key: str, payload: bytes) -> None:
+        if not self.directory or len(payload) > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            self._disk_bytes += len(payload)
+        except OSError as e:
+            print(f"ResultCache: Disk write failed: {e}")
+            self._remove(tmp_path)
+            return
+        if self._disk_bytes > self.max_disk_bytes:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Delete expired files, then the oldest ones until under budget"""
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[1])
+        total = sum(size for _, _, size in entries)
+        now = time.time()
+        for path, mtime, size in entries:
+            if total <= self.max_disk_bytes and now - mtime <= self.ttl:
+                continue
+            self._remove(path)
+            total -= size
+        self._disk_bytes = total
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,30 +1,327 @@
 import os
 import pandas as pd
 import numpy as np
-from flask import render_template, request, jsonify, flash, redirect, url_for, session, make_response, send_file, abort
+from flask import render_template, request, jsonify, flash, redirect, url_for, session, make_response, send_file, abort, Response
 from flask_mail import Message
 from werkzeug.utils import secure_filename
 from app import app, mail
 import json
+import time
+import threading
+import importlib
+from functools import lru_cache, partial
 from datetime import datetime
-from pdf_generator import PDFReportGenerator
-from enhanced_pdf_generator import EnhancedPDFGenerator
-from email_service import EmailService
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from growth_analytics import GrowthAnalytics
-from advanced_analytics import AdvancedAnalytics
+from advanced_analytics import AdvancedAnalytics, forecast_chart
 from data_cleaner import SmartDataCleaner
-from column_mapper import ColumnMapper
+from date_parser import parse_dates
+from data_store import dataset_path_for
+from sales_dataset import SalesDataset, DatasetRegistry, append_to_dataset
+from result_cache import ResultCache, cache_key, code_version
+from ingest import stream_csv_to_dataset, parallel_csv_to_dataset, read_excel_upload
+from chart_spec import template_json, DEFAULT_TEMPLATE
+from batch_forecast import ForecastStore, run_batch_forecast, resolve_backend, series_history
+from forecast_cache import ForecastModelCache
+from backtest import backtest_dataset
+import backtest
 
-# Initialize services
-enhanced_pdf_generator = EnhancedPDFGenerator()
-email_service = EmailService()
-column_mapper = ColumnMapper()
+# Initialize services; report, email and mapping services are created on first use
+dataset_registry = DatasetRegistry(max_bytes=app.config['DATASET_CACHE_BYTES'],
+                                   mmap=app.config['DATASET_MMAP'])
+result_cache = ResultCache(directory=app.config['ANALYTICS_CACHE_DIR'],
+                           ttl=app.config['ANALYTICS_CACHE_TTL'],
+                           max_memory_bytes=app.config['ANALYTICS_CACHE_MEMORY_BYTES'],
+                           max_disk_bytes=app.config['ANALYTICS_CACHE_DISK_BYTES'])
+# Dashboard forecast models outlive the analytics results of any one dataset version, so they can warm-start refits
+forecast_model_cache = ForecastModelCache(ResultCache(directory=app.config['FORECAST_MODEL_CACHE_DIR'],
+                                                      ttl=app.config['FORECAST_MODEL_CACHE_TTL']),
+                                          warm_start_max_days=app.config['FORECAST_WARM_START_DAYS'],
+                                          version=code_version(AdvancedAnalytics))
+section_pool = ThreadPoolExecutor(max_workers=app.config['ANALYTICS_SECTION_WORKERS'],
+                                  thread_name_prefix='analytics-section')
+# How often a request checks whether its queued sections have started on the shared pool
+SECTION_POLL_SECONDS = 0.05
+# Batch forecasts run one at a time per worker, in the background of the request that starts them
+forecast_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='batch-forecast')
+forecast_runs = {}
+# Forecast backtests run in the background of the first request for a dataset, one at a time
+backtest_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='backtest')
+backtest_runs = {}
+# Guards checking and starting runs in forecast_runs and backtest_runs; finished runs are dropped
+# as new ones start, keeping the latest MAX_FAILED_RUNS failures so they are reported, not retried
+runs_lock = threading.Lock()
+MAX_FAILED_RUNS = 64
+# Sections whose output depends on the backtest scores, so they are cached with and without them
+BACKTEST_SECTIONS = {'predict_revenue_trend', 'smart_forecast'}
+
+# Heavy optional dependencies that must not load until an analysis needs them
+LAZY_MODULES = ['sklearn', 'reportlab', 'plotly', 'prophet', 'statsmodels']
+
+@lru_cache(maxsize=None)
+def get_column_mapper():
+    from column_mapper import ColumnMapper
+    return ColumnMapper()
+
+@lru_cache(maxsize=None)
+def get_enhanced_pdf_generator():
+    from enhanced_pdf_generator import EnhancedPDFGenerator
+    return EnhancedPDFGenerator()
+
+@lru_cache(maxsize=None)
+def get_email_service():
+    from email_service import EmailService
+    return EmailService()
+
+def warm_up():
+    """
+    Load the lazily imported dependencies and services ahead of the first request.
+    Called at import when WARM_UP_IMPORTS is set, so with gunicorn --preload the master
+    pays for the imports once and every forked worker starts warm.
+    Returns seconds spent per step.
+    """
+    from advanced_analytics import PROPHET_AVAILABLE, STATSMODELS_AVAILABLE
+    modules = ['sklearn.cluster', 'sklearn.linear_model', 'sklearn.preprocessing', 'pdf_generator']
+    if PROPHET_AVAILABLE:
+        modules.append('prophet')
+    if STATSMODELS_AVAILABLE:
+        modules.append('statsmodels.tsa.holtwinters')
+    steps = {module: partial(importlib.import_module, module) for module in modules}
+    steps['services'] = lambda: (get_column_mapper(), get_enhanced_pdf_generator(), get_email_service())
+    steps['chart_template'] = partial(template_json, DEFAULT_TEMPLATE)
+
+    timings = {}
+    for name, load in steps.items():
+        start = time.perf_counter()
+        try:
+            load()
+        except Exception as e:
+            print(f"Warm-up: could not load {name}: {e}")
+        timings[name] = round(time.perf_counter() - start, 3)
+    print(f"Warm-up: loaded {', '.join(timings)} in {sum(timings.values()):.2f}s")
+    return timings
 
 ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def format_upload_limit(num_bytes):
+    """Human readable upload limit for templates and error messages"""
+    if num_bytes >= 1024 ** 3:
+        return f"{num_bytes / 1024 ** 3:g}GB"
+    return f"{num_bytes / 1024 ** 2:g}MB"
+
+@app.context_processor
+def inject_upload_limits():
+    max_bytes = app.config['MAX_CONTENT_LENGTH']
+    return {'max_upload_bytes': max_bytes, 'max_upload_label': format_upload_limit(max_bytes)}
+
+def load_session_dataset():
+    """Load the canonical dataset for the current session, reusing this worker's copy"""
+    return dataset_registry.get(session['filepath'])
+
+def load_session_data():
+    """Load the processed DataFrame for the current session (shared, treat as read-only)"""
+    return load_session_dataset().base
+
+def cached_analysis(dataset, engine, name, compute, params=None):
+    """Run one analysis through the result cache, keyed by dataset content and engine code"""
+    if not dataset.content_hash:
+        return compute()
+    key = cache_key(dataset.content_hash, f"{engine.__name__}.{name}", params, code_version(engine))
+    computed = []
+    result = result_cache.get_or_compute(key, lambda: computed.append(True) or compute())
+    if not computed and isinstance(result, dict) and 'forecast_source' in result:
+        # Served whole from the result cache (a copy), whatever produced it the first time
+        result['forecast_source'] = 'cache'
+    return result
+
+def select_sections(sections):
+    """Sections named in the comma-separated ?fields= parameter, all of them by default"""
+    fields = request.args.get('fields')
+    if not fields:
+        return sections
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in sections]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(sections)}")
+    return {name: sections[name] for name in names}
+
+def section_params(method):
+    """Result cache parameters of a section beyond the dataset it analyzes"""
+    engine = method.__self__
+    if method.__name__ in BACKTEST_SECTIONS:
+        return {'backtest': getattr(engine, 'backtest', None) is not None}
+    if method.__name__ == 'customer_segmentation':
+        # Above the exact limit customers are clustered on a sample, so both settings change the segments
+        return {'exact_limit': engine.segmentation_exact_limit, 'sample_size': engine.segmentation_sample_size}
+    return None
+
+def submit_sections(dataset, engine, sections):
+    """
+    Start each section on the shared section pool. Returns futures by section name and
+    the time.monotonic() each section started running, filled in as the pool picks it up
+    """
+    started = {}
+
+    def run_section(name, method):
+        started[name] = time.monotonic()
+        return cached_analysis(dataset, engine, method.__name__, method, section_params(method))
+
+    futures = {name: section_pool.submit(run_section, name, method) for name, method in sections.items()}
+    return futures, started
+
+def timed_out_section(engine, name, timeout):
+    """Placeholder reported for a section that missed its time budget"""
+    print(f"{engine.__name__}: section {name} exceeded its {timeout:g}s budget")
+    return {
+        'error': 'Section timed out',
+        'timed_out': True,
+        'message': f'This analysis took longer than {timeout:g}s; retry shortly to load it from cache.'
+    }
+
+def completed_sections(futures, started, timeout):
+    """
+    (name, future) for each section in completion order, or (name, None) once a section
+    has run for longer than timeout. A section's budget starts when it starts running,
+    so sections still queued behind other requests on the shared pool are waited for.
+    """
+    pending = {future: name for name, future in futures.items()}
+    while pending:
+        now = time.monotonic()
+        waits = [started[name] + timeout - now for name in pending.values() if name in started]
+        if len(waits) < len(pending):
+            # Until every section has started, wake up regularly to pick up new start times
+            waits.append(SECTION_POLL_SECONDS)
+        done, _ = wait(pending, timeout=max(min(waits), 0), return_when=FIRST_COMPLETED)
+        for future in [future for future in pending if future in done]:
+            yield pending.pop(future), future
+        now = time.monotonic()
+        for future, name in list(pending.items()):
+            if name in started and now >= started[name] + timeout:
+                pending.pop(future)
+                yield name, None
+
+def run_sections(dataset, engine, sections):
+    """
+    Run independent analysis sections concurrently on the shared section pool.
+    Sections running for longer than ANALYTICS_SECTION_TIMEOUT are reported as timed
+    out rather than holding up the rest; they finish in the background and land in the
+    result cache, so the next request gets them. A section's ValueError is re-raised
+    as before.
+    """
+    futures, started = submit_sections(dataset, engine, sections)
+    timeout = app.config['ANALYTICS_SECTION_TIMEOUT']
+    result = {}
+    for name, future in completed_sections(futures, started, timeout):
+        result[name] = future.result() if future else timed_out_section(engine, name, timeout)
+    return {name: result[name] for name in futures}
+
+def sse_event(event, payload):
+    """One Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {app.json.dumps(payload)}\n\n"
+
+def stream_sections(dataset, engine, sections):
+    """
+    Server-Sent Events for run_sections: a 'section' event ({name, data}) as each
+    section finishes, in completion order, then a 'done' event. Sections keep the
+    JSON shapes of the blocking endpoints; a failing section is reported in its own
+    event with 'failed' set instead of failing the whole response.
+    """
+    futures, started = submit_sections(dataset, engine, sections)
+    timeout = app.config['ANALYTICS_SECTION_TIMEOUT']
+    try:
+        for name, future in completed_sections(futures, started, timeout):
+            if future is None:
+                data = timed_out_section(engine, name, timeout)
+            else:
+                try:
+                    data = future.result()
+                except ValueError as e:
+                    data = {'error': 'Data validation failed', 'failed': True, 'message': str(e)}
+                except Exception as e:
+                    print(f"{engine.__name__}: section {name} failed: {e}")
+                    data = {'error': 'Analysis failed', 'failed': True, 'message': f'Error analyzing your data: {str(e)}'}
+            yield sse_event('section', {'name': name, 'data': data})
+        yield sse_event('done', {'sections': list(futures)})
+    finally:
+        # Client went away: drop sections that have not started yet
+        for future in futures.values():
+            future.cancel()
+
+def backtest_key(dataset):
+    params = {'horizon': app.config['BACKTEST_HORIZON'], 'origins': app.config['BACKTEST_ORIGINS']}
+    return cache_key(dataset.content_hash, 'backtest', params, code_version(backtest))
+
+def prune_runs(runs):
+    """Drop finished runs from a run registry, keeping the latest failures; call with runs_lock held"""
+    for key in [key for key, run in runs.items() if run.done() and run.exception() is None]:
+        del runs[key]
+    failed = [key for key, run in runs.items() if run.done()]
+    for key in failed[:max(len(failed) - MAX_FAILED_RUNS, 0)]:
+        del runs[key]
+
+def compute_backtest(dataset, key):
+    scores = backtest_dataset(dataset, horizon=app.config['BACKTEST_HORIZON'], origins=app.config['BACKTEST_ORIGINS'],
+                              workers=app.config['BACKTEST_WORKERS'] or None,
+                              timeout=app.config['FORECAST_SERIES_TIMEOUT'])
+    result_cache.set(key, scores)
+    return scores
+
+def backtest_scores(dataset):
+    """
+    Forecast backtest scores of a stored dataset from the result cache. On a miss the
+    backtest is started in the background and None returned, so no request waits for it;
+    requests after it finishes get the scores. A backtest that failed is not retried;
+    one whose scores were evicted from the cache is.
+    """
+    if not dataset.content_hash:
+        return None
+    key = backtest_key(dataset)
+    with runs_lock:
+        scores = result_cache.get(key)
+        run = backtest_runs.get(key)
+        if scores is None and (run is None or (run.done() and run.exception() is None)):
+            prune_runs(backtest_runs)
+            backtest_runs[key] = backtest_pool.submit(compute_backtest, dataset, key)
+    return scores
+
+def create_engine(engine, dataset):
+    """Analytics engine for a dataset, with its settings from app.config"""
+    if engine is AdvancedAnalytics:
+        return AdvancedAnalytics(dataset,
+                                 segmentation_exact_limit=app.config['SEGMENTATION_EXACT_LIMIT'],
+                                 segmentation_sample_size=app.config['SEGMENTATION_SAMPLE_SIZE'],
+                                 model_cache=forecast_model_cache,
+                                 backtest=backtest_scores(dataset))
+    if engine is GrowthAnalytics:
+        return GrowthAnalytics(dataset, backtest=backtest_scores(dataset))
+    return engine(dataset)
+
+def section_stream_response(engine, build_sections, label):
+    """SSE response streaming the ?fields= sections of an analytics engine for the session dataset"""
+    if 'filepath' not in session:
+        return jsonify({'error': 'No data available'}), 400
+
+    try:
+        dataset = load_session_dataset()
+        if dataset.empty:
+            return jsonify({'error': 'No data found in uploaded file'}), 400
+        sections = select_sections(build_sections(create_engine(engine, dataset)))
+    except ValueError as e:
+        return jsonify({'error': 'Data validation failed', 'message': str(e)}), 400
+    except Exception as e:
+        print(f"{label} stream error: {e}")
+        return jsonify({'error': f'{label} processing failed', 'message': f'Error analyzing your data: {str(e)}'}), 500
+
+    print(f"{label} - Streaming {len(sections)} sections over {len(dataset)} rows")
+    response = Response(stream_sections(dataset, engine, sections), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies from buffering the stream into one response
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 def validate_sales_data(df):
     """Intelligent validation and mapping of uploaded sales data"""
     # Check if DataFrame is empty
@@ -32,10 +329,10 @@ def validate_sales_data(df):
         return False, "The uploaded file appears to be empty", None
     
     # Detect column mappings
-    mapping_result = column_mapper.detect_column_mapping(df)
+    mapping_result = get_column_mapper().detect_column_mapping(df)
     
     # Check if all required fields were found
-    is_valid, missing_fields = column_mapper.validate_required_fields(mapping_result['mappings'])
+    is_valid, missing_fields = get_column_mapper().validate_required_fields(mapping_result['mappings'])
     
     if not is_valid:
         error_msg = f"Could not automatically detect required columns: {', '.join(missing_fields)}. "
@@ -52,11 +349,13 @@ def validate_sales_data(df):
     
     # Apply the mapping to create standardized DataFrame
     try:
-        standardized_df = column_mapper.apply_mapping(df, mapping_result['mappings'])
+        dayfirst = mapping_result.get('date_format', {}).get('dayfirst')
+        standardized_df = get_column_mapper().apply_mapping(df, mapping_result['mappings'], dayfirst=dayfirst)
         return True, f"Successfully mapped columns: {mapping_result['mappings']}", {
             'dataframe': standardized_df,
             'mapping': mapping_result['mappings'],
-            'confidence': mapping_result['confidence']
+            'confidence': mapping_result['confidence'],
+            'dayfirst': dayfirst
         }
     except Exception as e:
         return False, f"Error processing data: {str(e)}", mapping_result
@@ -65,6 +364,45 @@ def validate_sales_data(df):
 def index():
     return render_template('index.html')
 
+def read_uploaded_file(filepath, filename):
+    """Read an uploaded CSV/Excel file into a DataFrame"""
+    if filename.lower().endswith('.csv'):
+        return pd.read_csv(filepath)
+    # Workbooks are sniffed header-first so only the sales sheet is parsed
+    return read_excel_upload(filepath)
+
+def use_streaming_ingest(filepath, filename):
+    """Large CSV uploads are streamed chunk by chunk instead of loaded whole"""
+    return (filename.lower().endswith('.csv') and
+            os.path.getsize(filepath) > app.config['STREAMING_INGEST_THRESHOLD'])
+
+def ingest_large_csv(filepath, processed_filepath):
+    """Parse very large CSVs on a process pool when enabled, otherwise stream them"""
+    workers = app.config['PARALLEL_INGEST_WORKERS']
+    if workers > 1 and os.path.getsize(filepath) > app.config['PARALLEL_INGEST_THRESHOLD']:
+        try:
+            print(f"Parallel ingest with {workers} workers")
+            return parallel_csv_to_dataset(filepath, processed_filepath, get_column_mapper(), workers=workers)
+        except pd.errors.ParserError as e:
+            # Quoted fields spanning lines cannot be split on byte ranges
+            print(f"Parallel ingest failed: {e}, falling back to streaming ingest")
+    return stream_csv_to_dataset(filepath, processed_filepath, get_column_mapper(),
+                                 chunk_rows=app.config['INGEST_CHUNK_ROWS'])
+
+def append_upload(filepath, filename):
+    """Merge a new export into the session's dataset using the mapping and date order detected at first upload"""
+    mapping = session['column_mapping']
+    df = read_uploaded_file(filepath, filename)
+    missing = [original for original in mapping.values() if original not in df.columns]
+    if missing:
+        raise ValueError(f"New file does not match the existing column mapping; missing: {', '.join(missing)}")
+    # Ambiguous dates such as 03/04 must read the same way as in the stored rows
+    standardized = get_column_mapper().apply_mapping(df, mapping, dayfirst=session.get('date_dayfirst'))
+    meta = append_to_dataset(session['filepath'], standardized)
+    # Workers reload from the stored copy, which now includes the delta
+    dataset_registry.invalidate(session['filepath'])
+    return meta
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -80,80 +418,71 @@ def upload_file():
     if file and file.filename and allowed_file(file.filename):
         filename = secure_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        
+        if request.form.get('upload_mode') == 'append' and 'filepath' in session:
+            # Keep the delta file apart from the dataset's own upload of the same name
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"append_{datetime.now():%Y%m%d%H%M%S}_{filename}")
+            file.save(filepath)
+            try:
+                meta = append_upload(filepath, filename)
+            except Exception as e:
+                flash(f'Error appending file: {str(e)}', 'error')
+                return redirect(url_for('index'))
+            finally:
+                os.remove(filepath)
+            session['total_rows'] = meta['rows']
+            session['upload_time'] = datetime.now().isoformat()
+            flash(f"Appended {meta['appended']} new records from {filename} "
+                  f"({meta['duplicates']} already stored rows skipped). "
+                  f"{session['filename']} now has {meta['rows']} records.", 'success')
+            return redirect(url_for('dashboard'))
+        
         file.save(filepath)
+        processed_filepath = dataset_path_for(filepath)
         
         try:
-            # Read the file based on extension with improved handling
-            if filename.lower().endswith('.csv'):
-                df = pd.read_csv(filepath)
-            else:
-                # Try different approaches for Excel files
-                try:
-                    # First check if there are multiple sheets
-                    xl_file = pd.read_excel(filepath, sheet_name=None)
-                    sheets = list(xl_file.keys())
-                    print(f"Found {len(sheets)} sheets: {sheets}")
-                    
-                    # Look for sheets that might contain sales data
-                    sales_sheet = None
-                    for sheet_name in sheets:
-                        sheet_df = xl_file[sheet_name]
-                        if len(sheet_df) > 5:  # Has some data
-                            # Check if columns look like sales data
-                            cols_str = ' '.join(str(col).lower() for col in sheet_df.columns)
-                            if any(keyword in cols_str for keyword in ['product', 'item', 'sales', 'price', 'qty', 'quantity', 'order']):
-                                sales_sheet = sheet_name
-                                df = sheet_df
-                                print(f"Using sheet '{sheet_name}' which appears to contain sales data")
-                                break
-                    
-                    # If no sales sheet found, use the largest sheet
-                    if sales_sheet is None:
-                        largest_sheet = max(sheets, key=lambda s: len(xl_file[s]))
-                        df = xl_file[largest_sheet]
-                        print(f"No clear sales sheet found, using largest sheet: '{largest_sheet}'")
-                        
-                    # If we get unnamed columns, try reading without headers
-                    if any('Unnamed:' in str(col) for col in df.columns):
-                        print("Detected unnamed columns, trying alternative Excel read")
-                        df = pd.read_excel(filepath, sheet_name=sales_sheet or 0, header=None)
-                        
-                except Exception as e:
-                    print(f"Excel read failed: {e}, trying without headers")
-                    df = pd.read_excel(filepath, header=None)
-                    
-            print(f"File loaded: {df.shape[0]} rows, {df.shape[1]} columns")
-            print(f"Columns: {list(df.columns)}")
-            
-            # Intelligent validation and mapping
-            is_valid, validation_message, mapping_data = validate_sales_data(df)
-            if not is_valid:
-                flash(validation_message, 'error')
-                os.remove(filepath)  # Clean up
-                return redirect(url_for('index'))
-            
-            # Use the standardized DataFrame from mapping
-            if mapping_data and 'dataframe' in mapping_data:
-                df = mapping_data['dataframe']
-            else:
-                raise ValueError("Failed to process column mapping")
-            
-            # Save the processed DataFrame to a new file
-            processed_filepath = filepath.replace('.', '_processed.')
-            if filename.lower().endswith('.csv'):
-                df.to_csv(processed_filepath, index=False)
+            if use_streaming_ingest(filepath, filename):
+                print(f"Chunked ingest for {filename} ({os.path.getsize(filepath)} bytes)")
+                mapping_data = ingest_large_csv(filepath, processed_filepath)
+                total_rows = mapping_data['meta']['rows']
+                columns = [column['name'] for column in mapping_data['meta']['columns']]
             else:
-                df.to_excel(processed_filepath, index=False)
+                df = read_uploaded_file(filepath, filename)
+                print(f"File loaded: {df.shape[0]} rows, {df.shape[1]} columns")
+                print(f"Columns: {list(df.columns)}")
+                
+                # Intelligent validation and mapping
+                is_valid, validation_message, mapping_data = validate_sales_data(df)
+                if not is_valid:
+                    flash(validation_message, 'error')
+                    os.remove(filepath)  # Clean up
+                    return redirect(url_for('index'))
+                
+                # Use the standardized DataFrame from mapping
+                if mapping_data and 'dataframe' in mapping_data:
+                    df = mapping_data['dataframe']
+                else:
+                    raise ValueError("Failed to process column mapping")
+                
+                # Canonical schema pass, persisted as a typed columnar dataset
+                dataset = SalesDataset.from_frame(df)
+                dataset.save(processed_filepath)
+                if not dataset_registry.mmap:
+                    # Mapped workers load the stored copy on first use instead
+                    dataset_registry.put(processed_filepath, dataset)
+                total_rows = len(dataset)
+                columns = list(dataset.base.columns)
             
             # Store file information in session
             session['filepath'] = processed_filepath
             session['original_filepath'] = filepath
             session['filename'] = filename
             session['upload_time'] = datetime.now().isoformat()
-            session['total_rows'] = len(df)
-            session['columns'] = list(df.columns)
+            session['total_rows'] = total_rows
+            session['columns'] = columns
             session['column_mapping'] = mapping_data['mapping']
             session['mapping_confidence'] = mapping_data['confidence']
+            session['date_dayfirst'] = mapping_data.get('dayfirst')
             
             # Show successful mapping information
             mapping_info = f"Successfully mapped: "
@@ -162,7 +491,7 @@ def upload_file():
                 mapping_info += f"{standard}→{original} ({conf:.0%}), "
             mapping_info = mapping_info.rstrip(', ')
             
-            flash(f'Successfully uploaded {filename} with {len(df)} records. {mapping_info}', 'success')
+            flash(f'Successfully uploaded {filename} with {total_rows} records. {mapping_info}', 'success')
             return redirect(url_for('dashboard'))
             
         except Exception as e:
@@ -192,34 +521,43 @@ def dashboard():
 def analyze_sales_data(df):
     """Comprehensive sales data analysis using pandas"""
     analysis = {}
+    canonical = isinstance(df, SalesDataset)
     
-    # Standardize column names for analysis
-    df_clean = df.copy()
-    df_clean.columns = df_clean.columns.str.lower().str.strip()
-    
-    # Basic data info
-    analysis['total_rows'] = len(df_clean)
-    analysis['total_columns'] = len(df_clean.columns)
-    
-    # Find required columns
-    required_cols = {}
-    for col in df_clean.columns:
-        if 'product' in col or 'item' in col or 'name' in col:
-            required_cols['product'] = col
-        elif 'price' in col or 'cost' in col or 'amount' in col:
-            required_cols['price'] = col
-        elif 'quantity' in col or 'qty' in col or 'units' in col:
-            required_cols['quantity'] = col
-        elif 'date' in col or 'time' in col:
-            required_cols['date'] = col
+    if canonical:
+        # Canonical dataset: names, types, revenue and calendar fields are ready
+        df_clean = df.frame
+        required_cols = {field: field for field in df.fields if field != 'revenue'}
+        analysis['total_rows'] = len(df_clean)
+        analysis['total_columns'] = len(df.base.columns)
+    else:
+        # Standardize column names for analysis
+        df_clean = df.copy()
+        df_clean.columns = df_clean.columns.str.lower().str.strip()
+        
+        # Basic data info
+        analysis['total_rows'] = len(df_clean)
+        analysis['total_columns'] = len(df_clean.columns)
+        
+        # Find required columns
+        required_cols = {}
+        for col in df_clean.columns:
+            if 'product' in col or 'item' in col or 'name' in col:
+                required_cols['product'] = col
+            elif 'price' in col or 'cost' in col or 'amount' in col:
+                required_cols['price'] = col
+            elif 'quantity' in col or 'qty' in col or 'units' in col:
+                required_cols['quantity'] = col
+            elif 'date' in col or 'time' in col:
+                required_cols['date'] = col
     
     # Revenue analysis
     if 'price' in required_cols and 'quantity' in required_cols:
         try:
-            df_clean[required_cols['price']] = pd.to_numeric(df_clean[required_cols['price']], errors='coerce')
-            df_clean[required_cols['quantity']] = pd.to_numeric(df_clean[required_cols['quantity']], errors='coerce')
-            
-            df_clean['revenue'] = df_clean[required_cols['price']] * df_clean[required_cols['quantity']]
+            if not canonical:
+                df_clean[required_cols['price']] = pd.to_numeric(df_clean[required_cols['price']], errors='coerce')
+                df_clean[required_cols['quantity']] = pd.to_numeric(df_clean[required_cols['quantity']], errors='coerce')
+                
+                df_clean['revenue'] = df_clean[required_cols['price']] * df_clean[required_cols['quantity']]
             analysis['total_revenue'] = float(df_clean['revenue'].sum())
             analysis['avg_order_value'] = float(df_clean['revenue'].mean())
             analysis['revenue_std'] = float(df_clean['revenue'].std())
@@ -258,12 +596,16 @@ def analyze_sales_data(df):
     # Date analysis
     if 'date' in required_cols:
         try:
-            df_clean[required_cols['date']] = pd.to_datetime(df_clean[required_cols['date']], errors='coerce')
-            df_clean = df_clean.dropna(subset=[required_cols['date']])
-            
-            # Time-based insights
-            df_clean['month'] = df_clean[required_cols['date']].dt.month
-            df_clean['day_of_week'] = df_clean[required_cols['date']].dt.day_name()
+            if canonical:
+                if df_clean['date'].hasnans:
+                    df_clean = df_clean[df_clean['date'].notna()]
+            else:
+                df_clean[required_cols['date']] = parse_dates(df_clean[required_cols['date']])
+                df_clean = df_clean.dropna(subset=[required_cols['date']])
+                
+                # Time-based insights
+                df_clean['month'] = df_clean[required_cols['date']].dt.month
+                df_clean['day_of_week'] = df_clean[required_cols['date']].dt.day_name()
             
             monthly_sales = df_clean.groupby('month')['revenue'].sum()
             daily_sales = df_clean.groupby('day_of_week')['revenue'].sum()
@@ -278,46 +620,28 @@ def analyze_sales_data(df):
     
     return analysis
 
-def detect_data_quality_issues(df):
-    """Detect data quality issues in uploaded file"""
+def detect_data_quality_issues(profile):
+    """Data quality issues of an uploaded file, from its DataProfile"""
     issues = {}
     
     # Missing values - convert to native Python types
-    missing_data = df.isnull().sum()
-    missing_dict = {}
-    missing_pct_dict = {}
-    
-    for col, count in missing_data.items():
-        if count > 0:
-            missing_dict[str(col)] = int(count)
-            missing_pct_dict[str(col)] = float(round(count / len(df) * 100, 2))
-    
-    issues['missing_values'] = missing_dict
-    issues['missing_percentage'] = missing_pct_dict
+    issues['missing_values'] = {str(col): count for col, count in profile.nulls.items() if count > 0}
+    issues['missing_percentage'] = {col: float(round(profile.percentage(count), 2))
+                                    for col, count in issues['missing_values'].items()}
     
     # Duplicate rows
-    duplicate_count = df.duplicated().sum()
-    issues['duplicate_rows'] = int(duplicate_count)
-    issues['duplicate_percentage'] = float(round(duplicate_count / len(df) * 100, 2))
-    
-    # Zero or negative values in numeric columns
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    zero_negative_dict = {}
-    
-    for col in numeric_cols:
-        if 'price' in col.lower() or 'cost' in col.lower() or 'amount' in col.lower():
-            zero_count = (df[col] <= 0).sum()
-            if zero_count > 0:
-                zero_negative_dict[str(col)] = int(zero_count)
+    issues['duplicate_rows'] = profile.duplicates
+    issues['duplicate_percentage'] = float(round(profile.percentage(profile.duplicates), 2))
     
-    issues['zero_negative_values'] = zero_negative_dict
+    # Zero or negative values in numeric price/cost/amount columns
+    issues['zero_negative_values'] = {}
+    for col in profile.numeric_columns(['price', 'cost', 'amount'], numeric_dtype=True):
+        zero_count = profile.stat(col, 'negative') + profile.stat(col, 'zero')
+        if zero_count > 0:
+            issues['zero_negative_values'][str(col)] = zero_count
     
     # Data type inconsistencies
-    data_types_dict = {}
-    for col, dtype in df.dtypes.items():
-        data_types_dict[str(col)] = str(dtype)
-    
-    issues['data_types'] = data_types_dict
+    issues['data_types'] = {str(col): dtype for col, dtype in profile.dtypes.items()}
     
     return issues
 
@@ -329,12 +653,9 @@ def generate_report():
             return jsonify({'error': 'No data uploaded. Please upload a CSV or Excel file first.'}), 400
         
         # Load the uploaded data
-        filepath = session['filepath']
         try:
-            if filepath.lower().endswith('.csv'):
-                df = pd.read_csv(filepath)
-            else:
-                df = pd.read_excel(filepath)
+            dataset = load_session_dataset()
+            df = dataset.base
         except Exception as e:
             return jsonify({'error': f'Error reading file: {str(e)}'}), 400
         
@@ -342,8 +663,8 @@ def generate_report():
             return jsonify({'error': 'The uploaded file is empty'}), 400
         
         # Perform comprehensive analysis
-        analysis = analyze_sales_data(df)
-        quality_issues = detect_data_quality_issues(df)
+        analysis = analyze_sales_data(dataset)
+        quality_issues = detect_data_quality_issues(dataset.profile)
         
         # Generate insights based on real data
         insights = []
@@ -401,34 +722,45 @@ def generate_report():
 def answer_data_question(df, question):
     """Answer specific questions about the data using pandas analysis"""
     question = question.lower().strip()
+    canonical = isinstance(df, SalesDataset)
     
-    # Standardize column names
-    df_clean = df.copy()
-    df_clean.columns = df_clean.columns.str.lower().str.strip()
-    
-    # Find key columns
-    product_col = None
-    price_col = None
-    quantity_col = None
-    date_col = None
-    
-    for col in df_clean.columns:
-        if 'product' in col or 'item' in col or 'name' in col:
-            product_col = col
-        elif 'price' in col or 'cost' in col or 'amount' in col:
-            price_col = col
-        elif 'quantity' in col or 'qty' in col or 'units' in col:
-            quantity_col = col
-        elif 'date' in col or 'time' in col:
-            date_col = col
+    if canonical:
+        # Canonical dataset: columns are known and already typed, never copied
+        df_clean = df.base
+        fields = df.fields
+        product_col, price_col, quantity_col, date_col = (
+            field if field in fields else None for field in ['product', 'price', 'quantity', 'date'])
+    else:
+        # Standardize column names
+        df_clean = df.copy()
+        df_clean.columns = df_clean.columns.str.lower().str.strip()
+        
+        # Find key columns
+        product_col = None
+        price_col = None
+        quantity_col = None
+        date_col = None
+        
+        for col in df_clean.columns:
+            if 'product' in col or 'item' in col or 'name' in col:
+                product_col = col
+            elif 'price' in col or 'cost' in col or 'amount' in col:
+                price_col = col
+            elif 'quantity' in col or 'qty' in col or 'units' in col:
+                quantity_col = col
+            elif 'date' in col or 'time' in col:
+                date_col = col
     
     try:
         # Revenue questions
         if any(word in question for word in ['revenue', 'total sales', 'money', 'earnings']):
             if price_col and quantity_col:
-                df_clean[price_col] = pd.to_numeric(df_clean[price_col], errors='coerce')
-                df_clean[quantity_col] = pd.to_numeric(df_clean[quantity_col], errors='coerce')
-                total_revenue = (df_clean[price_col] * df_clean[quantity_col]).sum()
+                if canonical:
+                    total_revenue = df_clean['revenue'].sum()
+                else:
+                    df_clean[price_col] = pd.to_numeric(df_clean[price_col], errors='coerce')
+                    df_clean[quantity_col] = pd.to_numeric(df_clean[quantity_col], errors='coerce')
+                    total_revenue = (df_clean[price_col] * df_clean[quantity_col]).sum()
                 return f"Your total revenue is ${total_revenue:,.2f} based on {len(df_clean)} transactions."
             else:
                 return "Revenue calculation requires both price and quantity columns in your data."
@@ -436,9 +768,10 @@ def answer_data_question(df, question):
         # Best selling product questions
         elif any(word in question for word in ['best selling', 'top product', 'most popular', 'highest sales']):
             if product_col and price_col and quantity_col:
-                df_clean[price_col] = pd.to_numeric(df_clean[price_col], errors='coerce')
-                df_clean[quantity_col] = pd.to_numeric(df_clean[quantity_col], errors='coerce')
-                df_clean['revenue'] = df_clean[price_col] * df_clean[quantity_col]
+                if not canonical:
+                    df_clean[price_col] = pd.to_numeric(df_clean[price_col], errors='coerce')
+                    df_clean[quantity_col] = pd.to_numeric(df_clean[quantity_col], errors='coerce')
+                    df_clean['revenue'] = df_clean[price_col] * df_clean[quantity_col]
                 
                 top_products = df_clean.groupby(product_col)['revenue'].sum().sort_values(ascending=False).head(3)
                 top_product = top_products.index[0]
@@ -446,7 +779,8 @@ def answer_data_question(df, question):
                 
                 return f"Your best-selling product is '{top_product}' with ${top_revenue:,.2f} in total revenue. Top 3: {', '.join(top_products.index[:3])}"
             elif product_col and quantity_col:
-                df_clean[quantity_col] = pd.to_numeric(df_clean[quantity_col], errors='coerce')
+                if not canonical:
+                    df_clean[quantity_col] = pd.to_numeric(df_clean[quantity_col], errors='coerce')
                 top_by_quantity = df_clean.groupby(product_col)[quantity_col].sum().sort_values(ascending=False).head(3)
                 return f"By quantity sold: '{top_by_quantity.index[0]}' with {top_by_quantity.iloc[0]} units. Top 3: {', '.join(top_by_quantity.index[:3])}"
             else:
@@ -455,18 +789,25 @@ def answer_data_question(df, question):
         # Date/time trend questions
         elif any(word in question for word in ['trend', 'over time', 'monthly', 'daily', 'when', 'best day']):
             if date_col and price_col and quantity_col:
-                df_clean[date_col] = pd.to_datetime(df_clean[date_col], errors='coerce')
-                df_clean = df_clean.dropna(subset=[date_col])
-                df_clean[price_col] = pd.to_numeric(df_clean[price_col], errors='coerce')
-                df_clean[quantity_col] = pd.to_numeric(df_clean[quantity_col], errors='coerce')
-                df_clean['revenue'] = df_clean[price_col] * df_clean[quantity_col]
+                if canonical:
+                    df_clean = df.frame
+                    if df_clean[date_col].hasnans:
+                        df_clean = df_clean[df_clean[date_col].notna()]
+                else:
+                    df_clean[date_col] = parse_dates(df_clean[date_col])
+                    df_clean = df_clean.dropna(subset=[date_col])
+                    df_clean[price_col] = pd.to_numeric(df_clean[price_col], errors='coerce')
+                    df_clean[quantity_col] = pd.to_numeric(df_clean[quantity_col], errors='coerce')
+                    df_clean['revenue'] = df_clean[price_col] * df_clean[quantity_col]
                 
                 if 'day' in question:
-                    df_clean['day_name'] = df_clean[date_col].dt.day_name()
-                    daily_sales = df_clean.groupby('day_name')['revenue'].sum().sort_values(ascending=False)
+                    if not canonical:
+                        df_clean['day_of_week'] = df_clean[date_col].dt.day_name()
+                    daily_sales = df_clean.groupby('day_of_week')['revenue'].sum().sort_values(ascending=False)
                     return f"Best performing day: {daily_sales.index[0]} with ${daily_sales.iloc[0]:,.2f} in sales."
                 else:
-                    df_clean['month'] = df_clean[date_col].dt.month
+                    if not canonical:
+                        df_clean['month'] = df_clean[date_col].dt.month
                     monthly_sales = df_clean.groupby('month')['revenue'].sum().sort_values(ascending=False)
                     return f"Peak sales month: {monthly_sales.index[0]} with ${monthly_sales.iloc[0]:,.2f}. Date range: {df_clean[date_col].min().strftime('%Y-%m-%d')} to {df_clean[date_col].max().strftime('%Y-%m-%d')}"
             else:
@@ -483,9 +824,10 @@ def answer_data_question(df, question):
         # Average questions
         elif any(word in question for word in ['average', 'mean', 'typical']):
             if price_col and quantity_col:
-                df_clean[price_col] = pd.to_numeric(df_clean[price_col], errors='coerce')
-                df_clean[quantity_col] = pd.to_numeric(df_clean[quantity_col], errors='coerce')
-                df_clean['revenue'] = df_clean[price_col] * df_clean[quantity_col]
+                if not canonical:
+                    df_clean[price_col] = pd.to_numeric(df_clean[price_col], errors='coerce')
+                    df_clean[quantity_col] = pd.to_numeric(df_clean[quantity_col], errors='coerce')
+                    df_clean['revenue'] = df_clean[price_col] * df_clean[quantity_col]
                 avg_order = df_clean['revenue'].mean()
                 avg_price = df_clean[price_col].mean()
                 return f"Average order value: ${avg_order:.2f}. Average price per item: ${avg_price:.2f}"
@@ -522,12 +864,9 @@ def explore_data():
             return jsonify({'error': 'Please ask a question about your data'}), 400
         
         # Load the data
-        filepath = session['filepath']
         try:
-            if filepath.lower().endswith('.csv'):
-                df = pd.read_csv(filepath)
-            else:
-                df = pd.read_excel(filepath)
+            dataset = load_session_dataset()
+            df = dataset.base
         except Exception as e:
             return jsonify({'error': f'Error reading file: {str(e)}'}), 400
         
@@ -535,7 +874,7 @@ def explore_data():
             return jsonify({'error': 'The uploaded file is empty'}), 400
         
         # Answer the question using real data analysis
-        response = answer_data_question(df, question)
+        response = answer_data_question(dataset, question)
         
         # Generate relevant follow-up suggestions based on available columns
         suggestions = []
@@ -572,20 +911,17 @@ def clean_data():
             return jsonify({'error': 'No data uploaded. Please upload a file first.'}), 400
         
         # Load the uploaded data
-        filepath = session['filepath']
         try:
-            if filepath.lower().endswith('.csv'):
-                df = pd.read_csv(filepath)
-            else:
-                df = pd.read_excel(filepath)
+            dataset = load_session_dataset()
+            df = dataset.base
         except Exception as e:
             return jsonify({'error': f'Error reading file: {str(e)}'}), 400
         
         if df.empty:
             return jsonify({'error': 'The uploaded file is empty'}), 400
         
-        # Analyze data quality using SmartDataCleaner
-        cleaner = SmartDataCleaner(df)
+        # Analyze data quality using SmartDataCleaner, from the dataset's shared profile
+        cleaner = SmartDataCleaner(df, profile=dataset.profile)
         cleaning_analysis = cleaner.analyze_data_quality()
         
         # Get specific cleaning suggestions
@@ -615,7 +951,7 @@ def clean_data():
 
 @app.errorhandler(413)
 def too_large(e):
-    flash('File too large. Maximum size is 16MB.', 'error')
+    flash(f"File too large. Maximum size is {format_upload_limit(app.config['MAX_CONTENT_LENGTH'])}.", 'error')
     return redirect(url_for('index'))
 
 @app.errorhandler(404)
@@ -631,11 +967,7 @@ def download_report():
     
     try:
         # Get report data (same as /report endpoint)
-        filepath = session['filepath']
-        if filepath.lower().endswith('.csv'):
-            df = pd.read_csv(filepath)
-        else:
-            df = pd.read_excel(filepath)
+        df = load_session_data()
         
         # Generate report data
         total_rows = len(df)
@@ -684,6 +1016,7 @@ def download_report():
         }
         
         # Generate PDF
+        from pdf_generator import PDFReportGenerator
         pdf_generator = PDFReportGenerator()
         pdf_content, filename = pdf_generator.create_report_from_session_data(session, report_data)
         
@@ -698,6 +1031,29 @@ def download_report():
         flash(f'Error generating PDF report: {str(e)}', 'error')
         return redirect(url_for('dashboard'))
 
+def growth_sections(analytics):
+    """Growth analytics sections by response field"""
+    return {
+        'revenue_prediction': analytics.predict_revenue_trend,
+        'top_products': analytics.get_top_products,
+        'best_times': analytics.analyze_best_selling_times,
+        'missed_opportunities': analytics.find_missed_opportunities,
+        'data_quality': analytics.get_data_quality_summary,
+        'recommendations': analytics.generate_ai_recommendations,
+        'product_lifecycle': analytics.detect_product_lifecycle,
+        'seasonality': analytics.detect_seasonality_patterns,
+        'anomalies': analytics.detect_anomalies
+    }
+
+def advanced_sections(analytics):
+    """Advanced analytics sections by response field"""
+    return {
+        'customer_segmentation': analytics.customer_segmentation,
+        'forecast': analytics.smart_forecast,
+        'data_health': analytics.data_health_score,
+        'growth_metrics': analytics.growth_metrics
+    }
+
 @app.route('/growth-analytics')
 def growth_analytics():
     """Generate comprehensive growth analytics"""
@@ -706,33 +1062,22 @@ def growth_analytics():
     
     try:
         # Load data
-        filepath = session['filepath']
-        if filepath.lower().endswith('.csv'):
-            df = pd.read_csv(filepath)
-        else:
-            df = pd.read_excel(filepath)
+        dataset = load_session_dataset()
         
         # Validate data exists
-        if df.empty:
+        if dataset.empty:
             return jsonify({'error': 'No data found in uploaded file'}), 400
         
-        print(f"Growth Analytics - Processing {len(df)} rows with columns: {list(df.columns)}")
+        print(f"Growth Analytics - Processing {len(dataset)} rows with columns: {list(dataset.base.columns)}")
         
         # Initialize growth analytics with real data
-        analytics = GrowthAnalytics(df)
-        
-        # Generate all analytics including new advanced features
-        result = {
-            'revenue_prediction': analytics.predict_revenue_trend(),
-            'top_products': analytics.get_top_products(),
-            'best_times': analytics.analyze_best_selling_times(),
-            'missed_opportunities': analytics.find_missed_opportunities(),
-            'data_quality': analytics.get_data_quality_summary(),
-            'recommendations': analytics.generate_ai_recommendations(),
-            'product_lifecycle': analytics.detect_product_lifecycle(),
-            'seasonality': analytics.detect_seasonality_patterns(),
-            'anomalies': analytics.detect_anomalies()
-        }
+        analytics = create_engine(GrowthAnalytics, dataset)
+        
+        # Independent sections, run concurrently; ?fields= selects a subset
+        result = run_sections(dataset, GrowthAnalytics, select_sections(growth_sections(analytics)))
+        if request.args.get('profile'):
+            # Intermediate results computed for this request (cache hits compute none)
+            result['profile'] = analytics.node_timings()
         
         return jsonify(result)
         
@@ -757,28 +1102,19 @@ def advanced_analytics():
     
     try:
         # Load data from session using correct filepath key
-        filepath = session['filepath']
-        if filepath.lower().endswith('.csv'):
-            df = pd.read_csv(filepath)
-        else:
-            df = pd.read_excel(filepath)
+        dataset = load_session_dataset()
         
         # Validate data exists
-        if df.empty:
+        if dataset.empty:
             return jsonify({'error': 'No data found in uploaded file'}), 400
         
-        print(f"Advanced Analytics - Processing {len(df)} rows with columns: {list(df.columns)}")
+        print(f"Advanced Analytics - Processing {len(dataset)} rows with columns: {list(dataset.base.columns)}")
         
         # Initialize advanced analytics with real data
-        analytics = AdvancedAnalytics(df)
+        analytics = create_engine(AdvancedAnalytics, dataset)
         
         # Generate all advanced analytics
-        result = {
-            'customer_segmentation': analytics.customer_segmentation(),
-            'forecast': analytics.smart_forecast(),
-            'data_health': analytics.data_health_score(),
-            'growth_metrics': analytics.growth_metrics()
-        }
+        result = run_sections(dataset, AdvancedAnalytics, select_sections(advanced_sections(analytics)))
         
         return jsonify(result)
         
@@ -796,6 +1132,157 @@ def advanced_analytics():
             'note': 'Please ensure your file has the required columns: product, price, quantity, date.'
         }), 500
 
+@app.route('/growth-analytics/stream')
+def growth_analytics_stream():
+    """Growth analytics sections as Server-Sent Events, each sent as soon as it is computed"""
+    return section_stream_response(GrowthAnalytics, growth_sections, 'Growth Analytics')
+
+@app.route('/advanced-analytics/stream')
+def advanced_analytics_stream():
+    """Advanced analytics sections as Server-Sent Events, each sent as soon as it is computed"""
+    return section_stream_response(AdvancedAnalytics, advanced_sections, 'Advanced Analytics')
+
+@app.route('/chart-template/<name>')
+def chart_template(name):
+    """Shared Plotly template named by chart specs, cached by the browser"""
+    try:
+        body, etag = template_json(name)
+    except KeyError:
+        abort(404)
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['CHART_TEMPLATE_MAX_AGE']
+    return response.make_conditional(request)
+
+def forecast_store(values, dataset):
+    """Forecast store for the backend and by_store options of a request"""
+    if not dataset.path:
+        raise ValueError("Batch forecasts need a stored dataset; upload the file again")
+    backend = resolve_backend(values.get('backend') or app.config['FORECAST_BACKEND'])
+    by_store = str(values.get('by_store', '')).lower() in ('1', 'true', 'yes')
+    return ForecastStore(dataset.path, backend, by_store)
+
+def json_floats(values, decimals=2):
+    """Rounded floats for JSON, with None for NaN"""
+    return [None if np.isnan(value) else round(float(value), decimals) for value in values]
+
+@app.route('/forecast-accuracy')
+def forecast_accuracy():
+    """Backtest scores of the forecasters on the session dataset; 202 while they are computed"""
+    if 'filepath' not in session:
+        return jsonify({'error': 'No data available'}), 400
+    dataset = load_session_dataset()
+    if not dataset.content_hash:
+        return jsonify({'error': 'Forecast accuracy needs a stored dataset'}), 400
+
+    scores = backtest_scores(dataset)
+    if scores is not None:
+        return jsonify({'state': 'complete', **scores})
+    with runs_lock:
+        run = backtest_runs.get(backtest_key(dataset))
+    if run is not None and run.done() and run.exception() is not None:
+        return jsonify({'state': 'failed', 'error': 'Backtest failed', 'message': str(run.exception())}), 400
+    return jsonify({'state': 'running'}), 202
+
+@app.route('/batch-forecast', methods=['POST'])
+def start_batch_forecast():
+    """Start forecasting every product (or product x store) series of the session dataset"""
+    if 'filepath' not in session:
+        return jsonify({'error': 'No data available'}), 400
+    values = request.get_json(silent=True) or request.form
+    try:
+        dataset = load_session_dataset()
+        store = forecast_store(values, dataset)
+        horizon = int(values.get('horizon') or app.config['FORECAST_HORIZON'])
+        if not 1 <= horizon <= 365:
+            raise ValueError("Forecast horizon must be between 1 and 365 days")
+        if store.by_store and dataset.store_column is None:
+            raise ValueError("Per-store forecasts need a store column (e.g. store, branch or location)")
+    except ValueError as e:
+        return jsonify({'error': 'Invalid batch forecast request', 'message': str(e)}), 400
+
+    meta = store.meta(dataset.content_hash)
+    force = str(values.get('force', '')).lower() in ('1', 'true', 'yes')
+    if meta is not None and meta['horizon'] == horizon and not force:
+        return jsonify({'state': 'complete', **meta})
+    with runs_lock:
+        running = forecast_runs.get(store.path)
+        if running is None or running.done():
+            prune_runs(forecast_runs)
+            forecast_runs[store.path] = forecast_pool.submit(
+                run_batch_forecast, dataset, backend=store.backend, by_store=store.by_store, horizon=horizon,
+                workers=app.config['FORECAST_WORKERS'] or None, timeout=app.config['FORECAST_SERIES_TIMEOUT'])
+    return jsonify({'state': 'running', 'backend': store.backend, 'by_store': store.by_store,
+                    'status_url': url_for('batch_forecast_status', backend=store.backend,
+                                          by_store=int(store.by_store))}), 202
+
+@app.route('/batch-forecast')
+def batch_forecast_status():
+    """Progress of the batch forecast and, once complete, its per-series statuses and growth"""
+    if 'filepath' not in session:
+        return jsonify({'error': 'No data available'}), 400
+    try:
+        dataset = load_session_dataset()
+        store = forecast_store(request.args, dataset)
+    except ValueError as e:
+        return jsonify({'error': 'Invalid batch forecast request', 'message': str(e)}), 400
+
+    meta = store.meta(dataset.content_hash)
+    if meta is None:
+        status = store.status()
+        if status is None or status['state'] == 'complete' or status.get('content_hash') != dataset.content_hash:
+            return jsonify({'state': 'missing', 'message': 'No batch forecast for the current data; start one first.'}), 404
+        return jsonify(status)
+
+    series = store.series()
+    if request.args.get('status'):
+        series = series[series['status'] == request.args['status']]
+    limit = request.args.get('limit', 100, type=int)
+    records = []
+    for record in series.head(limit).to_dict('records'):
+        record['growth_rate'] = json_floats([record['growth_rate']])[0]
+        record['seconds'] = round(record['seconds'], 3)
+        records.append(record)
+    return jsonify({'state': 'complete', **meta, 'matching': len(series), 'results': records})
+
+@app.route('/batch-forecast/series')
+def batch_forecast_series():
+    """Stored forecast of one product (?product=, and ?store= for per-store runs), without refitting"""
+    if 'filepath' not in session:
+        return jsonify({'error': 'No data available'}), 400
+    product = request.args.get('product')
+    try:
+        dataset = load_session_dataset()
+        store = forecast_store(request.args, dataset)
+        if not product or (store.by_store and not request.args.get('store')):
+            raise ValueError("Name the series with ?product= (and ?store= for per-store forecasts)")
+    except ValueError as e:
+        return jsonify({'error': 'Invalid batch forecast request', 'message': str(e)}), 400
+
+    meta = store.meta(dataset.content_hash)
+    if meta is None:
+        return jsonify({'error': 'No batch forecast for the current data; start one first.'}), 404
+    forecast = store.lookup(product, request.args.get('store') if store.by_store else None)
+    if forecast is None:
+        return jsonify({'error': f'No forecast for {product}'}), 404
+
+    dates = forecast.pop('dates')
+    history = series_history(dataset, meta['last_day'], product, request.args.get('store') if store.by_store else None)
+    title = f"{meta['horizon']}-Day Forecast: {product}"
+    forecast['chart'] = forecast_chart(history.index.to_numpy(), history.to_numpy(), dates.to_numpy(),
+                                       forecast['forecast'], lower=forecast['lower'], upper=forecast['upper'],
+                                       title=title)
+    forecast['dates'] = dates.strftime('%Y-%m-%d').tolist()
+    for name in ['forecast', 'lower', 'upper']:
+        forecast[name] = json_floats(forecast[name])
+    return jsonify(forecast)
+
+@app.route('/cache-stats')
+def cache_stats():
+    """Dataset cache counters for this worker"""
+    return jsonify({'datasets': dataset_registry.stats(), 'analytics': result_cache.stats()})
+
 @app.route('/send-report', methods=['POST'])
 def send_report():
     """Simulate sending report via email or Slack"""
@@ -850,25 +1337,21 @@ def email_report():
             }), 400
         
         # Load and analyze data
-        filepath = session['filepath']
-        if filepath.lower().endswith('.csv'):
-            df = pd.read_csv(filepath)
-        else:
-            df = pd.read_excel(filepath)
+        dataset = load_session_dataset()
         
         # Perform comprehensive analysis
-        analysis_data = analyze_sales_data(df)
+        analysis_data = analyze_sales_data(dataset)
         
         # Generate comprehensive PDF report
-        report_info = enhanced_pdf_generator.generate_comprehensive_report(
+        report_info = get_enhanced_pdf_generator().generate_comprehensive_report(
             analysis_data=analysis_data,
             client_email=client_email,
-            sample_data=df
+            sample_data=dataset.base
         )
         
         # Send email with download link
         base_url = f"https://{request.host}" if request.is_secure else f"http://{request.host}"
-        email_result = email_service.send_report_email(
+        email_result = get_email_service().send_report_email(
             client_email=client_email,
             report_info=report_info,
             download_url=f"{base_url}{report_info['download_url']}"
@@ -908,11 +1391,11 @@ def secure_download(report_id):
         
         if access_token:
             # Validate access token for secure downloads
-            if not email_service.validate_access_token(access_token, report_id):
+            if not get_email_service().validate_access_token(access_token, report_id):
                 abort(403)  # Forbidden - invalid or expired token
             
             # Get report info from token
-            token_data = email_service.get_report_info_by_token(access_token)
+            token_data = get_email_service().get_report_info_by_token(access_token)
             if not token_data:
                 abort(404)
                 
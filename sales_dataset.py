@@ -0,0 +1,302 @@
+"""
+Canonical Sales Dataset for Smart Data Analyzer
+Typed product/quantity/price/date/revenue data produced once at upload and
+shared read-only by every analytics engine
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Any, Tuple
+
+from date_parser import parse_dates
+from aggregate_cube import AggregateCube
+from data_profile import DataProfile, profile_frame
+from data_store import (save_dataset, load_dataset, append_dataset, read_meta, is_dataset, is_mapped,
+                        dataset_lock, read_processed_file, META_FILENAME)
+
+CANONICAL_FIELDS = ['product', 'quantity', 'price', 'date', 'revenue']
+DAY_NAMES = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'], dtype=object)
+CUSTOMER_KEYWORDS = ['customer', 'client', 'user']
+STORE_KEYWORDS = ['store', 'branch', 'shop', 'outlet', 'location']
+CALENDAR_DTYPES = {'hour': np.int8, 'month': np.int8, 'year': np.int16, 'week': np.int8}
+
+
+def canonicalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Coerce canonical columns to their analysis types.
+    ColumnMapper.apply_mapping output already satisfies this, so at upload
+    this is a cheap check; legacy processed files get converted here.
+    """
+    df = df.copy(deep=False)
+    if 'date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['date'].dtype):
+        df['date'] = parse_dates(df['date'])
+    for col in ['quantity', 'price', 'revenue']:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col].dtype):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    if 'revenue' not in df.columns and 'quantity' in df.columns and 'price' in df.columns:
+        df['revenue'] = df['quantity'] * df['price']
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0:
+        df = df.reset_index(drop=True)
+    return df
+
+
+class SalesDataset:
+    """
+    Read-only canonical dataset.
+    `base` holds the stored columns; `frame` is a shallow view of the same
+    arrays plus calendar fields (day_of_week, hour, month, year, week) that
+    the engines group by, so no engine needs to copy, rename or re-parse.
+    """
+
+    def __init__(self, base: pd.DataFrame, content_hash: Optional[str] = None, path: Optional[str] = None):
+        self.base = base
+        self.content_hash = content_hash
+        self.path = path
+        self.frame = self._with_calendar_fields(base)
+        self.customer_column = self._find_column(base.columns, CUSTOMER_KEYWORDS)
+        self.store_column = self._find_column(base.columns, STORE_KEYWORDS)
+        self._cube = None
+        self._profile = None
+        # Analytics sections share one dataset across threads; each lazy build runs once
+        self._cube_lock = threading.Lock()
+        self._profile_lock = threading.Lock()
+
+    @staticmethod
+    def _with_calendar_fields(base: pd.DataFrame) -> pd.DataFrame:
+        frame = base.copy(deep=False)
+        if 'date' in frame.columns and pd.api.types.is_datetime64_any_dtype(frame['date'].dtype):
+            dates = frame['date'].dt
+            valid = frame['date'].notna().to_numpy()
+            day_of_week = np.full(len(frame), np.nan, dtype=object)
+            day_of_week[valid] = DAY_NAMES[dates.dayofweek.to_numpy()[valid].astype(np.int64)]
+            frame['day_of_week'] = day_of_week
+            calendar = {'hour': dates.hour, 'month': dates.month, 'year': dates.year,
+                        'week': dates.isocalendar().week}
+            for name, values in calendar.items():
+                # Derived columns are private to each worker, so keep them narrow
+                if valid.all():
+                    values = values.astype(CALENDAR_DTYPES[name])
+                frame[name] = values
+        return frame
+
+    @staticmethod
+    def _find_column(columns, keywords) -> Optional[str]:
+        for col in columns:
+            if any(keyword in str(col).lower() for keyword in keywords):
+                return col
+        return None
+
+    @property
+    def fields(self) -> List[str]:
+        """Canonical fields present in this dataset"""
+        return [field for field in CANONICAL_FIELDS if field in self.base.columns]
+
+    @property
+    def empty(self) -> bool:
+        return self.base.empty
+
+    def __len__(self):
+        return len(self.base)
+
+    def memory_usage(self) -> int:
+        """
+        Approximate private bytes of the dataset.
+        Memory-mapped columns live in the shared page cache and are not
+        counted; stored category columns repeat the same string objects, so
+        object payloads are counted once per distinct value.
+        """
+        total = 0
+        for col in self.frame.columns:
+            values = self.frame[col].to_numpy()
+            if is_mapped(values):
+                continue
+            total += self.frame[col].memory_usage(index=False, deep=False)
+            if values.dtype == object:
+                total += sum(sys.getsizeof(value) for value in pd.unique(values))
+        return int(total)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, content_hash: Optional[str] = None) -> 'SalesDataset':
+        """Build a dataset from a processed DataFrame"""
+        return cls(canonicalize_frame(df), content_hash=content_hash)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False) -> 'SalesDataset':
+        """
+        Load a stored dataset, or convert a legacy processed CSV/Excel file.
+        mmap=True maps the stored columns read-only instead of copying them.
+        """
+        if is_dataset(path):
+            return cls(load_dataset(path, mmap=mmap), content_hash=read_meta(path)['content_hash'], path=path)
+        return cls.from_frame(read_processed_file(path))
+
+    def save(self, path: str) -> Dict[str, Any]:
+        """Persist the stored columns and the aggregate cube, and remember where they live"""
+        meta = save_dataset(self.base, path)
+        self.path = path
+        self.content_hash = meta['content_hash']
+        with self._cube_lock:
+            self._cube = self._load_or_build_cube()
+        return meta
+
+    @property
+    def cube(self) -> Optional[AggregateCube]:
+        """Aggregate cube for this dataset, None without all canonical fields"""
+        if self._cube is None:
+            with self._cube_lock:
+                if self._cube is None:
+                    self._cube = self._load_or_build_cube()
+        return self._cube
+
+    @property
+    def profile(self) -> DataProfile:
+        """Data quality profile of the stored columns, built on first use"""
+        if self._profile is None:
+            with self._profile_lock:
+                if self._profile is None:
+                    self._profile = profile_frame(self.base)
+        return self._profile
+
+    def _load_or_build_cube(self) -> Optional[AggregateCube]:
+        """Load the stored cube, or build it once and persist it next to the dataset"""
+        if self.fields != CANONICAL_FIELDS:
+            return None
+        stored = bool(self.path) and is_dataset(self.path)
+        cube = AggregateCube.load(self.path, self.content_hash) if stored else None
+        if cube is None:
+            cube = AggregateCube.build(self)
+            if stored:
+                try:
+                    cube.save(self.path, self.content_hash)
+                except OSError as e:
+                    print(f"SalesDataset: Could not store aggregate cube: {e}")
+        return cube
+
+
+def append_to_dataset(path: str, df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Append new transactions to a stored dataset.
+    df must carry the stored columns (extra columns are ignored). Rows that
+    are already stored are skipped, only the remaining delta is written, and
+    the aggregate cube is extended with the delta's partial aggregates, so
+    the cost follows the size of df rather than the stored history.
+    Returns the new dataset metadata plus 'appended' and 'duplicates' counts.
+    """
+    if not is_dataset(path):
+        raise ValueError("Appending requires a stored dataset")
+    # Another worker process may be appending to the same dataset
+    with dataset_lock(path):
+        previous = read_meta(path)
+        names = [column['name'] for column in previous['columns']]
+        missing = [name for name in names if name not in df.columns]
+        if missing:
+            raise ValueError(f"New data is missing columns of the existing dataset: {', '.join(missing)}")
+
+        delta = canonicalize_frame(df)[names]
+        meta = append_dataset(delta, path)
+        appended = SalesDataset.from_frame(meta.pop('appended'))
+        if len(appended) and appended.fields == CANONICAL_FIELDS:
+            try:
+                extended = AggregateCube.append(path, appended, previous['rows'],
+                                                previous['content_hash'], meta['content_hash'])
+            except (OSError, ValueError) as e:
+                print(f"SalesDataset: Could not extend aggregate cube: {e}")
+                extended = False
+            if not extended:
+                print("SalesDataset: Aggregate cube will be rebuilt on next load")
+        meta['appended'] = len(appended)
+    return meta
+
+
+def dataset_stamp(path: str) -> Tuple[int, int]:
+    """Identity of a processed file on disk: (mtime_ns, size) of its data or meta file"""
+    target = os.path.join(path, META_FILENAME) if os.path.isdir(path) else path
+    stat = os.stat(target)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DatasetRegistry:
+    """
+    Process-local LRU cache of loaded datasets.
+    Entries are keyed by processed-file path and revalidated against the
+    file's mtime/size, so a replaced upload is reloaded rather than served
+    stale. Least recently used entries are evicted once the byte budget is
+    exceeded; a dataset larger than the whole budget is returned uncached.
+    With mmap=True stored columns are mapped rather than copied, so workers
+    share them and only private (decoded/derived) bytes count to the budget.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, mmap: bool = False):
+        self.max_bytes = max_bytes
+        self.mmap = mmap
+        self._entries: 'OrderedDict[str, Tuple[Tuple[int, int], SalesDataset, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str) -> SalesDataset:
+        """Return the dataset at path, loading it on a miss"""
+        key = os.path.abspath(path)
+        stamp = dataset_stamp(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Load outside the lock so other datasets stay servable meanwhile
+        dataset = SalesDataset.load(path, mmap=self.mmap)
+        self.put(key, dataset, stamp)
+        return dataset
+
+    def put(self, path: str, dataset: SalesDataset, stamp: Optional[Tuple[int, int]] = None) -> None:
+        """Register an already loaded dataset, e.g. the one just built at upload"""
+        key = os.path.abspath(path)
+        stamp = stamp or dataset_stamp(key)
+        size = dataset.memory_usage()
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (stamp, dataset, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def invalidate(self, path: str) -> None:
+        with self._lock:
+            self._discard(os.path.abspath(path))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current memory use"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
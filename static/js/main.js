@@ -58,9 +58,11 @@ function initializeFileUpload() {
             return;
         }
 
-        // Validate file size (16MB)
-        if (file.size > 16 * 1024 * 1024) {
-            showAlert('File too large. Maximum size is 16MB.', 'error');
+        // Validate file size against the server-configured limit
+        const uploadForm = document.getElementById('uploadForm');
+        const maxBytes = parseInt(uploadForm.dataset.maxBytes, 10) || 16 * 1024 * 1024;
+        if (file.size > maxBytes) {
+            showAlert(`File too large. Maximum size is ${uploadForm.dataset.maxLabel || '16MB'}.`, 'error');
             return;
         }
 
@@ -280,19 +282,40 @@ function generateGrowthInsights() {
     btn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Analyzing Growth Opportunities...';
     btn.disabled = true;
 
-    // Fetch growth analytics data
-    fetch('/growth-analytics')
-        .then(response => response.json())
+    let shown = false;
+    const showContent = () => {
+        if (shown) return;
+        shown = true;
+        loading.style.display = 'none';
+        content.style.display = 'block';
+        content.classList.add('fade-in');
+    };
+
+    // Render each section as soon as the server finishes it
+    streamSections('/growth-analytics/stream', (name, section) => {
+        if (renderSection(section, GROWTH_RENDERERS[name])) {
+            showContent();
+        }
+    })
         .then(data => {
-            if (data.error) {
-                showAlert(data.error, 'error');
-                return;
+            notifyTimedOutSections(data);
+            if (!shown) {
+                loading.style.display = 'none';
+                showAlert('No growth insights could be generated from this data.', 'error');
             }
-            
-            displayGrowthInsights(data);
-            loading.style.display = 'none';
-            content.style.display = 'block';
-            content.classList.add('fade-in');
+        }, () => {
+            // Streaming unavailable: fetch every section at once
+            return fetch('/growth-analytics')
+                .then(response => response.json())
+                .then(data => {
+                    if (data.error) {
+                        showAlert(data.error, 'error');
+                        return;
+                    }
+                    
+                    displayGrowthInsights(data);
+                    showContent();
+                });
         })
         .catch(error => {
             console.error('Error generating growth insights:', error);
@@ -304,46 +327,117 @@ function generateGrowthInsights() {
         });
 }
 
+/*
+ * Stream analytics sections from a Server-Sent Events endpoint, calling onSection(name, data)
+ * as each one arrives. Resolves with all received sections once the server is done (or the
+ * stream drops after some arrived); rejects when nothing could be streamed.
+ */
+function streamSections(url, onSection) {
+    return new Promise((resolve, reject) => {
+        if (!window.EventSource) {
+            reject(new Error('Server-Sent Events are not supported'));
+            return;
+        }
+        
+        const source = new EventSource(url);
+        const received = {};
+        source.addEventListener('section', event => {
+            const section = JSON.parse(event.data);
+            received[section.name] = section.data;
+            onSection(section.name, section.data);
+        });
+        source.addEventListener('done', () => {
+            source.close();
+            resolve(received);
+        });
+        source.onerror = () => {
+            source.close();
+            if (Object.keys(received).length) {
+                console.warn('Analytics stream ended early');
+                resolve(received);
+            } else {
+                reject(new Error('Analytics stream unavailable'));
+            }
+        };
+    });
+}
+
+// Render one analytics section; sections not requested (?fields=), over their time budget or failed are skipped
+function renderSection(section, render) {
+    if (!section) {
+        return false;
+    }
+    if (section.timed_out || section.failed) {
+        console.warn(section.message);
+        return false;
+    }
+    render(section);
+    return true;
+}
+
+function notifyTimedOutSections(data) {
+    if (Object.values(data).some(section => section && section.timed_out)) {
+        showAlert('Some analyses are still running. Regenerate in a moment to load them.', 'info');
+    }
+}
+
+// Growth insight sections and their renderers, in display order
+const GROWTH_RENDERERS = {
+    revenue_prediction: displayRevenuePrediction,
+    top_products: displayTopProducts,
+    best_times: displayBestTimes,
+    missed_opportunities: displayMissedOpportunities,
+    data_quality: displayDataQuality,
+    product_lifecycle: displayProductLifecycle,
+    seasonality: displaySeasonalityPatterns,
+    anomalies: displayAnomalies,
+    recommendations: displayRecommendations
+};
+
 function displayGrowthInsights(data) {
-    // Revenue Prediction
-    displayRevenuePrediction(data.revenue_prediction);
-    
-    // Top Products
-    displayTopProducts(data.top_products);
-    
-    // Best Times
-    displayBestTimes(data.best_times);
-    
-    // Missed Opportunities
-    displayMissedOpportunities(data.missed_opportunities);
-    
-    // Data Quality
-    displayDataQuality(data.data_quality);
-    
-    // Advanced Features
-    displayProductLifecycle(data.product_lifecycle);
-    displaySeasonalityPatterns(data.seasonality);
-    displayAnomalies(data.anomalies);
-    
-    // AI Recommendations
-    displayRecommendations(data.recommendations);
+    Object.entries(GROWTH_RENDERERS).forEach(([name, render]) => renderSection(data[name], render));
+    notifyTimedOutSections(data);
+}
+
+// Shared chart templates, fetched once per page load; the browser caches the responses
+const chartTemplates = {};
+
+function loadChartTemplate(name) {
+    if (!chartTemplates[name]) {
+        chartTemplates[name] = fetch(`/chart-template/${encodeURIComponent(name)}`)
+            .then(response => response.ok ? response.json() : null)
+            .catch(() => null);
+    }
+    return chartTemplates[name];
+}
+
+// Plot a chart spec ({data, layout, template}); figure JSON strings, as in the demo data, also work
+function renderChart(elementId, chart) {
+    const spec = typeof chart === 'string' ? JSON.parse(chart) : chart;
+    const template = spec.template ? loadChartTemplate(spec.template) : Promise.resolve(null);
+    return template.then(shared => {
+        const layout = shared ? {...spec.layout, template: shared} : spec.layout;
+        Plotly.newPlot(elementId, spec.data, layout, {responsive: true});
+    });
 }
 
 function displayRevenuePrediction(data) {
     // Update metrics
     document.getElementById('growthRate').textContent = `+${data.growth_rate}%`;
     document.getElementById('nextMonthRevenue').textContent = `$${data.next_month_revenue.toLocaleString()}`;
-    document.getElementById('predictionAccuracy').textContent = `${data.prediction_accuracy} Confidence`;
+    const predictionAccuracy = document.getElementById('predictionAccuracy');
+    predictionAccuracy.textContent = `${data.prediction_accuracy} Confidence`;
+    if (data.backtest && data.backtest.mape !== null) {
+        predictionAccuracy.title = `Backtested MAPE ${data.backtest.mape.toFixed(1)}% over ${data.backtest.origins} past ${data.backtest.horizon}-day forecasts`;
+    }
     
     // Render chart
-    const chartData = JSON.parse(data.chart);
-    Plotly.newPlot('revenuePredictionChart', chartData.data, chartData.layout, {responsive: true});
+    renderChart('revenuePredictionChart', data.chart);
 }
 
 function displayTopProducts(data) {
     // Render chart
-    const chartData = JSON.parse(data.chart);
-    Plotly.newPlot('topProductsChart', chartData.data, chartData.layout, {responsive: true});
+    renderChart('topProductsChart', data.chart);
     
     // Display product list
     const listContainer = document.getElementById('topProductsList');
@@ -370,8 +464,7 @@ function displayTopProducts(data) {
 
 function displayBestTimes(data) {
     // Render chart
-    const chartData = JSON.parse(data.chart);
-    Plotly.newPlot('bestTimesChart', chartData.data, chartData.layout, {responsive: true});
+    renderChart('bestTimesChart', data.chart);
     
     // Update recommendation
     document.getElementById('timeRecommendation').innerHTML = `
@@ -529,8 +622,7 @@ function displayProductLifecycle(lifecycleData) {
 
 function displaySeasonalityPatterns(seasonalityData) {
     // Render seasonality chart
-    const chartData = JSON.parse(seasonalityData.chart);
-    Plotly.newPlot('seasonalityChart', chartData.data, chartData.layout, {responsive: true});
+    renderChart('seasonalityChart', seasonalityData.chart);
     
     // Update peak day info
     document.getElementById('peakDay').textContent = `${seasonalityData.peak_day} (${(seasonalityData.seasonality_strength * 100).toFixed(1)}% variation)`;
@@ -741,6 +833,27 @@ function initializeAdvancedAnalytics() {
     }
 }
 
+// Advanced analytics sections: renderer and the panels it fills
+const ADVANCED_SECTIONS = {
+    data_health: {render: displayDataHealth, panels: ['dataHealthSection']},
+    growth_metrics: {render: displayGrowthMetrics, panels: ['growthMetricsSection']},
+    customer_segmentation: {
+        render: segmentation => {
+            displayCustomerSegmentation(segmentation);
+            displayCustomerSamples(segmentation.sample_customers);
+        },
+        panels: ['segmentationForecastSection', 'customerSamplesSection']
+    },
+    forecast: {render: displayForecast, panels: ['segmentationForecastSection']}
+};
+
+function renderAdvancedSection(name, section) {
+    const {render, panels} = ADVANCED_SECTIONS[name];
+    if (renderSection(section, render)) {
+        panels.forEach(id => document.getElementById(id).style.display = 'block');
+    }
+}
+
 function generateAdvancedAnalytics() {
     const generateBtn = document.getElementById('generateAdvancedBtn');
     const sendEmailBtn = document.getElementById('sendEmailBtn');
@@ -750,21 +863,23 @@ function generateAdvancedAnalytics() {
     generateBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>Analyzing...';
     generateBtn.disabled = true;
     
-    fetch('/advanced-analytics')
-        .then(response => response.json())
+    // Render each section as soon as the server finishes it
+    streamSections('/advanced-analytics/stream', renderAdvancedSection)
+        .catch(() => {
+            // Streaming unavailable: fetch every section at once
+            return fetch('/advanced-analytics')
+                .then(response => response.json())
+                .then(data => {
+                    if (data.error) {
+                        throw new Error(data.message || data.error);
+                    }
+                    
+                    Object.entries(data).forEach(([name, section]) => renderAdvancedSection(name, section));
+                    return data;
+                });
+        })
         .then(data => {
-            // Display all analytics components
-            displayDataHealth(data.data_health);
-            displayGrowthMetrics(data.growth_metrics);
-            displayCustomerSegmentation(data.customer_segmentation);
-            displayForecast(data.forecast);
-            displayCustomerSamples(data.customer_segmentation.sample_customers);
-            
-            // Show all sections
-            document.getElementById('dataHealthSection').style.display = 'block';
-            document.getElementById('growthMetricsSection').style.display = 'block';
-            document.getElementById('segmentationForecastSection').style.display = 'block';
-            document.getElementById('customerSamplesSection').style.display = 'block';
+            notifyTimedOutSections(data);
             
             // Show send buttons
             sendEmailBtn.style.display = 'inline-block';
@@ -1004,8 +1119,7 @@ function drawSparkline(canvasId, data, color) {
 
 function displayCustomerSegmentation(segmentationData) {
     // Display segmentation chart
-    const chartData = JSON.parse(segmentationData.chart);
-    Plotly.newPlot('segmentationChart', chartData.data, chartData.layout, {responsive: true});
+    renderChart('segmentationChart', segmentationData.chart);
     
     // Display segment table
     const segmentTable = document.getElementById('segmentTable');
@@ -1039,8 +1153,7 @@ function displayCustomerSegmentation(segmentationData) {
 
 function displayForecast(forecastData) {
     // Display forecast chart
-    const chartData = JSON.parse(forecastData.chart);
-    Plotly.newPlot('forecastChart', chartData.data, chartData.layout, {responsive: true});
+    renderChart('forecastChart', forecastData.chart);
     
     // Update forecast summary
     const forecastSummary = document.getElementById('forecastSummary');
@@ -1049,6 +1162,15 @@ function displayForecast(forecastData) {
             <i class="fas fa-chart-line me-2"></i>
             ${forecastData.summary}
         `;
+        if (forecastData.accuracy) {
+            // Measured on past cut-offs by the background backtest
+            const accuracy = forecastData.accuracy;
+            const mape = accuracy.mape === null ? 'n/a' : `${accuracy.mape.toFixed(1)}%`;
+            forecastSummary.innerHTML += `
+                <div class="small mt-1">${accuracy.accuracy} accuracy (${forecastData.model}):
+                backtested MAPE ${mape} over ${accuracy.origins} past ${accuracy.horizon}-day forecasts</div>
+            `;
+        }
         forecastSummary.className = forecastData.growth_rate >= 0 ? 'alert alert-success' : 'alert alert-warning';
     }
 }
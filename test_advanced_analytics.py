@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Tests for scalable customer segmentation
+"""
+
+import numpy as np
+
+from advanced_analytics import cluster_customers, stratified_sample
+
+
+def create_customer_blobs(per_cluster=2000):
+    rng = np.random.default_rng(5)
+    centers = np.array([[0.0, 0.0, 0.0, 0.0], [6.0, 6.0, 0.0, 0.0], [0.0, 6.0, 6.0, 6.0]])
+    return np.vstack([center + rng.normal(size=(per_cluster, 4)) for center in centers])
+
+
+def test_stratified_sample_covers_every_band():
+    values = np.arange(10_000, dtype=float)
+    positions = stratified_sample(values, 100)
+    assert len(positions) == 100 and len(np.unique(positions)) == 100
+    assert np.bincount(positions // 1000, minlength=10).tolist() == [10] * 10
+
+
+def test_sampled_clustering_matches_exact_on_large_customer_bases():
+    features = create_customer_blobs()
+    exact, exact_mode = cluster_customers(features)
+    sampled, sampled_mode = cluster_customers(features, exact_limit=1000, sample_size=300)
+    assert (exact_mode, sampled_mode) == ('exact', 'sampled')
+    # Same partition up to the numbering of clusters
+    pairs = set(zip(exact.tolist(), sampled.tolist()))
+    assert len(pairs) == 3
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for the upload-time aggregate cube
+"""
+
+import os
+import pytest
+
+from aggregate_cube import AggregateCube, CUBE_DIRNAME
+from sales_dataset import SalesDataset
+from growth_analytics import GrowthAnalytics
+from test_sales_dataset import create_processed_data
+
+
+def test_cube_is_stored_with_the_dataset_and_reloaded(tmp_path):
+    path = str(tmp_path / 'sales_processed')
+    dataset = SalesDataset.from_frame(create_processed_data())
+    dataset.save(path)
+
+    assert os.path.isdir(os.path.join(path, CUBE_DIRNAME))
+    loaded = AggregateCube.load(path, dataset.content_hash)
+    assert loaded is not None and loaded.stats() == dataset.cube.stats()
+    assert AggregateCube.load(path, 'other-content') is None
+
+
+def test_cube_totals_match_rows():
+    df = create_processed_data()
+    cube = SalesDataset.from_frame(df).cube
+
+    totals = cube.product_totals()
+    assert totals['revenue'].to_dict() == pytest.approx(df.groupby('product')['revenue'].sum().to_dict())
+    assert totals['quantity'].sum() == df['quantity'].sum()
+    assert cube.daily_revenue().sum() == pytest.approx(df['revenue'].sum())
+    assert cube.customer_features()['frequency'].sum() == len(df)
+
+
+def test_growth_answers_from_cube_match_rows():
+    df = create_processed_data()
+    fast = GrowthAnalytics(SalesDataset.from_frame(df))
+    legacy = GrowthAnalytics(df)
+
+    assert fast.cube is not None
+    assert fast.analyze_best_selling_times()['best_day'] == legacy.analyze_best_selling_times()['best_day']
+    assert fast.analyze_best_selling_times()['best_hour'] == legacy.analyze_best_selling_times()['best_hour']
+    missed, expected = fast.find_missed_opportunities(), legacy.find_missed_opportunities()
+    assert missed['count'] == expected['count']
+    assert missed['total_missed_revenue'] == pytest.approx(expected['total_missed_revenue'])
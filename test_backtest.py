@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests for rolling-origin forecast backtesting
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import rolling_origins, score_forecasts, run_backtest, fit_origins, daily_series
+from advanced_analytics import AdvancedAnalytics
+from growth_analytics import GrowthAnalytics
+from sales_dataset import SalesDataset
+
+
+def test_rolling_origins_step_back_from_the_last_full_horizon():
+    cutoffs, horizon = rolling_origins(100, horizon=30, origins=8, step=7, min_train=28)
+    assert horizon == 30
+    assert list(cutoffs) == [28, 35, 42, 49, 56, 63, 70]
+
+    cutoffs, horizon = rolling_origins(40, horizon=30, min_train=28)
+    assert horizon == 12 and list(cutoffs) == [28]
+    with pytest.raises(ValueError):
+        rolling_origins(30, min_train=28)
+
+
+def test_scores_per_horizon_day_skip_failed_fits_and_zero_days():
+    forecasts = np.array([[10.0, 20.0], [np.nan, np.nan], [12.0, -5.0]])
+    actual = np.array([[11.0, 0.0], [1.0, 1.0], [12.0, 10.0]])
+    scores = score_forecasts(forecasts, actual)
+    assert scores['origins'] == 2
+    assert scores['mae_by_horizon'] == [0.5, 15.0]
+    assert scores['mape_by_horizon'] == [pytest.approx(100 / 11 / 2, abs=1e-3), 100.0]
+
+
+def test_backtest_picks_the_model_that_fits_the_series():
+    rng = np.random.default_rng(3)
+    t = np.arange(140)
+    weekly = 500 + 200 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 10, len(t))
+    dates = pd.date_range('2024-01-01', periods=len(t)).to_numpy()
+
+    result = run_backtest(dates, weekly, models=['linear', 'holt_winters'], workers=1)
+    assert result['best_model'] == 'holt_winters'
+    assert result['models']['holt_winters']['accuracy'] == 'High'
+    assert len(result['models']['linear']['mae_by_horizon']) == result['horizon'] == 30
+    assert len(result['origins']) == 8
+
+
+def test_last_origin_forecasts_match_the_dashboard_on_a_gapped_series():
+    # Nothing sells at weekends, so the dashboard's calendar series has zero days
+    rng = np.random.default_rng(11)
+    days = pd.date_range('2024-01-01', periods=140)
+    days = days[days.dayofweek < 5]
+    revenue = 100 + 2.0 * np.arange(len(days)) + rng.normal(0, 20, len(days))
+    dataset = SalesDataset.from_frame(pd.DataFrame({'product': 'Lamp', 'quantity': 1, 'price': revenue,
+                                                    'date': days}))
+    dates, values, sold = daily_series(dataset)
+    assert not sold.all()
+    cutoff = rolling_origins(len(values))[0][-1]
+    assert sold[cutoff - 1]
+
+    history = dataset.base[dataset.base['date'] < dates[cutoff]]
+    engine = AdvancedAnalytics(SalesDataset.from_frame(history))
+    daily_sales = engine.cube.daily_revenue().reset_index()
+    for model, forecaster in [('linear', engine._linear_forecast), ('holt_winters', engine._holt_winters_forecast)]:
+        dashboard = [row['forecast'] for row in forecaster(daily_sales)['forecast_data']]
+        backtested = fit_origins(model, dates, values, [cutoff], 30, sold=sold)[0]
+        np.testing.assert_allclose(np.maximum(backtested, 0), dashboard, rtol=1e-9)
+
+    trend = fit_origins('trend', dates, values, [cutoff], 30, sold=sold)[0]
+    prediction = GrowthAnalytics(SalesDataset.from_frame(history)).predict_revenue_trend()
+    assert prediction['next_month_revenue'] == pytest.approx(trend.mean() * 30, abs=0.01)
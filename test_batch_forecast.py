@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for batch per-product forecasting
+"""
+
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import batch_forecast
+from batch_forecast import ForecastStore, run_batch_forecast, sales_series, forecast_chunk
+from sales_dataset import SalesDataset
+from test_sales_dataset import create_processed_data
+
+
+def create_store_dataset(path):
+    df = create_processed_data(2000)
+    df['store'] = np.random.default_rng(3).choice(['North', 'South'], len(df))
+    dataset = SalesDataset.from_frame(df)
+    dataset.save(path)
+    return dataset
+
+
+def test_series_run_from_first_sale_to_the_last_day(tmp_path):
+    dataset = create_store_dataset(str(tmp_path / 'sales'))
+    series = sales_series(dataset, by_store=True)
+    assert series['keys'].columns.tolist() == ['product', 'store'] and len(series['keys']) == 8
+
+    laptop_north = dataset.base[(dataset.base['product'] == 'Laptop') & (dataset.base['store'] == 'North')]
+    index = series['keys'].index[(series['keys']['product'] == 'Laptop') & (series['keys']['store'] == 'North')][0]
+    start, end = series['starts'][index], series['ends'][index]
+    assert np.isclose(series['revenue'][start:end].sum(), laptop_north['revenue'].sum())
+
+
+def test_batch_forecast_is_stored_per_series(tmp_path):
+    dataset = create_store_dataset(str(tmp_path / 'sales'))
+    summary = run_batch_forecast(dataset, backend='linear', by_store=True, horizon=14, workers=1)
+    assert summary['series'] == 8 and summary['statuses'] == {'ok': 8}
+
+    store = ForecastStore(dataset.path, 'linear', by_store=True)
+    assert store.meta(dataset.content_hash)['horizon'] == 14
+    assert store.meta('other-data') is None
+    forecast = store.lookup('Mouse', 'South')
+    assert forecast['status'] == 'ok' and len(forecast['forecast']) == 14
+    assert forecast['dates'][0] == dataset.base['date'].max().normalize() + pd.Timedelta(days=1)
+    assert (forecast['lower'] <= forecast['forecast']).all() and (forecast['forecast'] <= forecast['upper']).all()
+    assert store.lookup('Mouse', 'West') is None
+    assert store.status()['state'] == 'complete'
+
+
+def test_auto_backend_fits_all_series_in_one_vectorized_call(tmp_path):
+    dataset = create_store_dataset(str(tmp_path / 'sales'))
+    summary = run_batch_forecast(dataset, horizon=7)
+    assert summary['backend'] == 'holt_winters' and summary['statuses'] == {'ok': 4}
+
+    forecast = ForecastStore(dataset.path, 'holt_winters').lookup('Desk')
+    assert len(forecast['forecast']) == 7 and (forecast['forecast'] >= 0).all()
+
+
+def test_slow_series_time_out_without_failing_the_batch(tmp_path, monkeypatch):
+    def slow_forecast(dates, values, horizon):
+        if len(values) > 100:
+            time.sleep(5)
+        return batch_forecast.linear_forecast(dates, values, horizon)
+
+    monkeypatch.setitem(batch_forecast.BACKENDS, 'linear', slow_forecast)
+    day = np.arange(120)
+    tasks = [{'series': 0, 'day': day, 'revenue': np.ones(120), 'first_day': np.datetime64('2024-01-01'), 'last_day': 119},
+             {'series': 1, 'day': day[60:], 'revenue': np.ones(60), 'first_day': np.datetime64('2024-01-01'), 'last_day': 119},
+             {'series': 2, 'day': day[117:], 'revenue': np.ones(3), 'first_day': np.datetime64('2024-01-01'), 'last_day': 119}]
+    start = time.perf_counter()
+    results = forecast_chunk('linear', tasks, horizon=7, timeout=0.2)
+    assert time.perf_counter() - start < 2
+    assert [result['status'] for result in results] == ['timed_out', 'ok', 'insufficient_data']
+
+
+def test_background_runs_report_whether_timeouts_were_enforced(tmp_path, monkeypatch):
+    dataset = create_store_dataset(str(tmp_path / 'sales'))
+    in_background = lambda **kwargs: ThreadPoolExecutor(max_workers=1).submit(
+        run_batch_forecast, dataset, backend='linear', horizon=7, timeout=5.0, **kwargs).result()
+
+    assert run_batch_forecast(dataset, backend='linear', horizon=7, workers=1, timeout=5.0)['timeouts_enforced']
+    assert not in_background(workers=1)['timeouts_enforced']
+    # A single chunk of a pooled backend goes to a worker process, where SIGALRM works
+    monkeypatch.setattr(batch_forecast, 'IN_PROCESS_BACKENDS', set())
+    summary = in_background(workers=2)
+    assert summary['timeouts_enforced'] and summary['statuses'] == {'ok': 4}
+
+
+def test_chunks_run_on_a_spawned_pool():
+    tasks = [{'series': 0, 'day': np.arange(30), 'revenue': np.arange(30.0),
+              'first_day': np.datetime64('2024-01-01'), 'last_day': 29}]
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        result, = executor.submit(forecast_chunk, 'linear', tasks, 7, 5.0).result()
+    assert result['status'] == 'ok'
+    np.testing.assert_allclose(result['forecast'], np.arange(30.0, 37.0))
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for compact chart specs
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+import chart_spec as charts
+
+
+def test_numbers_round_trip_as_typed_arrays():
+    values = np.array([1.5, np.nan, -2.25])
+    encoded = charts.encode_array(values)
+    assert encoded['dtype'] == 'f8'
+    np.testing.assert_array_equal(charts.decode_array(encoded), values)
+
+    counts = charts.encode_array(np.array([3, 70000], dtype=np.int64))
+    assert counts['dtype'] == 'i4'
+    assert charts.decode_array(counts).tolist() == [3, 70000]
+    assert charts.encode_array(['Laptop', 3]) == ['Laptop', '3']
+
+
+def test_regular_axes_are_sent_as_start_and_step():
+    days = pd.date_range('2024-01-01', periods=30).to_numpy()
+    trace = charts.scatter(days, np.arange(30.0), mode='lines')
+    assert trace['x0'] == '2024-01-01' and trace['dx'] == 86400000.0 and 'x' not in trace
+    assert charts.bar(np.arange(24), np.ones(24))['x0'] == 0
+
+    gaps = days[[0, 1, 5]]
+    assert charts.scatter(gaps, [1, 2, 3])['x'] == ['2024-01-01', '2024-01-02', '2024-01-06']
+    hours = pd.to_datetime(['2024-01-01 09:30', '2024-01-02 10:00']).to_numpy()
+    assert charts.scatter(hours, [1, 2])['x'] == ['2024-01-01T09:30:00', '2024-01-02T10:00:00']
+
+
+def test_stacked_rows_bind_traces_to_row_axes():
+    traces, grid = charts.stacked_rows([[charts.bar(['Mon'], [1.0])], [charts.scatter([0, 1], [1.0, 2.0])]],
+                                       titles=('Days', 'Hours'), vertical_spacing=0.15)
+    assert [(t['xaxis'], t['yaxis']) for t in traces] == [('x', 'y'), ('x2', 'y2')]
+    assert grid['yaxis']['domain'] == [0.575, 1.0] and grid['yaxis2']['domain'] == [0.0, 0.425]
+    assert [a['text'] for a in grid['annotations']] == ['Days', 'Hours']
+
+
+def test_chart_names_a_shared_template():
+    spec = charts.chart([charts.bar(['A'], [1])], charts.layout(title='T', yaxis_title='Revenue ($)', height=300))
+    assert spec['template'] == 'plotly_white' and 'template' not in spec['layout']
+    assert spec['layout']['title'] == {'text': 'T'} and spec['layout']['height'] == 300
+
+    body, etag = charts.template_json('plotly_white')
+    assert set(json.loads(body)) == {'data', 'layout'}
+    assert charts.template_json('plotly_white')[1] == etag
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Tests for the memoized computation graph
+"""
+
+import pytest
+
+from computation_graph import ComputationGraph
+from growth_analytics import GrowthAnalytics
+from sales_dataset import SalesDataset
+from test_sales_dataset import create_processed_data
+
+
+def test_nodes_are_computed_once_with_their_dependencies():
+    calls = []
+    graph = ComputationGraph()
+    graph.add('rows', lambda: calls.append('rows') or [1, 2, 3])
+    graph.add('total', lambda rows: calls.append('total') or sum(rows), ['rows'])
+    graph.add('mean', lambda rows, total: total / len(rows), ['rows', 'total'])
+
+    assert graph.get('mean') == 2
+    assert graph.get('total') == 6
+    assert calls == ['rows', 'total']
+    assert set(graph.timings()) == {'rows', 'total', 'mean'}
+    assert graph.timings()['rows']['hits'] == 1 and graph.timings()['total']['hits'] == 1
+
+    with pytest.raises(ValueError):
+        graph.add('broken', lambda missing: missing, ['missing'])
+
+
+def test_failures_are_memoized():
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ValueError("no data")
+
+    graph = ComputationGraph()
+    graph.add('fail', fail)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            graph.get('fail')
+    assert calls == [1]
+
+
+def test_growth_analyses_share_intermediate_results():
+    analytics = GrowthAnalytics(SalesDataset.from_frame(create_processed_data()))
+
+    analytics.get_top_products()
+    analytics.analyze_best_selling_times()
+    recommendations = analytics.generate_ai_recommendations()
+
+    timings = analytics.node_timings()
+    assert timings['product_performance']['hits'] == 1 and timings['best_times']['hits'] == 1
+    assert recommendations[0]['type'] == 'bundling'
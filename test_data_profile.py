@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for the data quality profile
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_profile import profile_frame, count_duplicates
+from data_cleaner import SmartDataCleaner
+from sales_dataset import SalesDataset
+from test_sales_dataset import create_processed_data
+
+
+def create_messy_data():
+    return pd.DataFrame({
+        'Product': ['a', 'b', None, 'a', 'a'],
+        'Unit Price': [10.0, 0.0, np.nan, 10.0, 1000.0],
+        'qty': [1, -2, 3, 1, 2],
+        'amount': ['5', 'n/a', None, '5', '-1'],
+        'Order Date': ['2024-01-05', 'someday', None, '2024-01-05', '2024-01-06'],
+    })
+
+
+def test_profile_counts_every_issue_in_one_pass():
+    profile = profile_frame(create_messy_data())
+
+    assert profile.rows == 5 and profile.duplicates == 1
+    assert profile.nulls == {'Product': 1, 'Unit Price': 1, 'qty': 0, 'amount': 1, 'Order Date': 1}
+    price = profile.numeric['Unit Price']
+    assert (price['zero'], price['min'], price['max'], price['q1'], price['q3']) == (1, 0.0, 1000.0, 7.5, 257.5)
+    assert price['outliers'] == 1
+    assert profile.numeric['qty']['negative'] == 1
+    amount = profile.numeric['amount']
+    assert not amount['numeric_dtype'] and amount['non_numeric'] == 1 and amount['negative'] == 1
+    assert profile.dates['Order Date'] == {'invalid': 1, 'sample_invalid': ['someday']}
+    assert 'Product' not in profile.numeric
+
+
+def test_duplicates_treat_missing_values_as_equal():
+    df = pd.DataFrame({'a': [1.0, np.nan, np.nan, 1.0], 'b': ['x', None, None, 'y']})
+    assert count_duplicates(df) == int(df.duplicated().sum()) == 1
+
+
+def test_consumers_share_the_dataset_profile():
+    dataset = SalesDataset.from_frame(create_processed_data())
+    profile = dataset.profile
+    assert dataset.profile is profile
+
+    report = SmartDataCleaner(dataset.base, profile=profile).analyze_data_quality()
+    assert report['summary']['rows_analyzed'] == profile.rows == len(dataset)
+    cleaned = SmartDataCleaner(create_messy_data()).analyze_data_quality()
+    assert cleaned['issues']['invalid_formats'] == {'amount': {'issue': 'Non-numeric values in price column', 'count': 1}}
+    assert cleaned['issues']['date_format_issues']['Order Date']['invalid_count'] == 1
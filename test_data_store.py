@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the columnar dataset store
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_store import save_dataset, load_dataset, append_dataset, read_meta, is_dataset, is_mapped
+
+
+def create_processed_data():
+    """Create a standardized DataFrame like ColumnMapper.apply_mapping returns"""
+    df = pd.DataFrame({
+        'product': ['Laptop', 'Mouse', np.nan, 'Laptop'],
+        'quantity': [2, 5, 1, 3],
+        'price': [899.99, 29.99, np.nan, 899.99],
+        'date': pd.to_datetime(['2024-01-15', '2024-01-16', '2024-01-16', '2024-01-17']),
+        'in_stock': [True, False, True, True],
+    })
+    df['revenue'] = df['quantity'] * df['price']
+    return df
+
+
+def test_round_trip_preserves_values_and_dtypes(tmp_path):
+    df = create_processed_data()
+    path = str(tmp_path / 'sales_processed')
+
+    meta = save_dataset(df, path)
+    loaded = load_dataset(path)
+
+    assert is_dataset(path)
+    assert meta['rows'] == 4
+    assert [c['kind'] for c in meta['columns']] == ['category', 'int', 'float', 'datetime', 'bool', 'float']
+    pd.testing.assert_frame_equal(loaded, df)
+
+
+def test_content_hash_tracks_data(tmp_path):
+    df = create_processed_data()
+    first = save_dataset(df, str(tmp_path / 'a'))
+    same = save_dataset(df.copy(), str(tmp_path / 'b'))
+    df.loc[0, 'price'] = 1.0
+    changed = save_dataset(df, str(tmp_path / 'c'))
+
+    assert first['content_hash'] == same['content_hash']
+    assert first['content_hash'] != changed['content_hash']
+
+
+def test_save_replaces_existing_dataset(tmp_path):
+    path = str(tmp_path / 'sales_processed')
+    save_dataset(create_processed_data(), path)
+    save_dataset(create_processed_data().head(2), path)
+
+    assert read_meta(path)['rows'] == 2
+    assert len(load_dataset(path)) == 2
+
+
+
+def test_mapped_load_shares_fixed_width_columns(tmp_path):
+    df = create_processed_data()
+    path = str(tmp_path / 'sales_processed')
+    save_dataset(df, path)
+
+    mapped = load_dataset(path, mmap=True)
+
+    pd.testing.assert_frame_equal(mapped, df)
+    assert is_mapped(mapped['price'].to_numpy()) and is_mapped(mapped['date'].to_numpy())
+    assert not is_mapped(load_dataset(path)['price'].to_numpy())
+
+    # Replacing a mapped dataset leaves the old mapping readable
+    save_dataset(df.head(2), path)
+    assert mapped['quantity'].sum() == df['quantity'].sum()
+
+
+def test_append_skips_stored_rows_and_keeps_mapped_readers(tmp_path):
+    df = create_processed_data()
+    path = str(tmp_path / 'sales_processed')
+    first = save_dataset(df, path)
+    mapped = load_dataset(path, mmap=True)
+
+    # Overlapping export: two stored rows, one repeat of a stored row, one gap promoting quantity to float
+    delta = pd.concat([df.iloc[2:], df.iloc[[3]], df.iloc[[0]].assign(quantity=np.nan, product='Desk')],
+                      ignore_index=True)
+    meta = append_dataset(delta, path)
+
+    assert meta['duplicates'] == 2 and len(meta['appended']) == 2
+    assert meta['rows'] == 6 and meta['content_hash'] != first['content_hash']
+    stored = load_dataset(path)
+    pd.testing.assert_frame_equal(stored.iloc[:4], df, check_dtype=False)
+    assert stored['product'].iloc[-1] == 'Desk' and np.isnan(stored['quantity'].iloc[-1])
+    assert mapped['quantity'].sum() == df['quantity'].sum()
+
+    unchanged = append_dataset(df, path)
+    assert unchanged['duplicates'] == 4 and unchanged['content_hash'] == meta['content_hash']
+
+
+def test_append_turns_numeric_column_to_text_when_text_arrives(tmp_path):
+    df = create_processed_data().assign(customer=[1000, 1001, 1002, 1000])
+    path = str(tmp_path / 'sales_processed')
+    save_dataset(df, path)
+    mapped = load_dataset(path, mmap=True)
+
+    delta = df.iloc[[0]].assign(customer='C-7', date=pd.Timestamp('2024-02-01'))
+    append_dataset(delta, path)
+
+    assert read_meta(path)['columns'][-1]['kind'] == 'category'
+    assert load_dataset(path)['customer'].tolist() == ['1000', '1001', '1002', '1000', 'C-7']
+    assert mapped['customer'].sum() == 4003
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the date parsing engine
+"""
+
+import pandas as pd
+
+from date_parser import DateParser, parse_dates, detect_date_formats
+
+
+def test_mixed_iso_and_slash_dates_all_parse():
+    dates = pd.Series(['2025-08-23', '2025/01/28', '2025-07-09', None, 'not a date'])
+    parsed = parse_dates(dates)
+
+    assert parsed.tolist()[:3] == [pd.Timestamp('2025-08-23'), pd.Timestamp('2025-01-28'), pd.Timestamp('2025-07-09')]
+    assert parsed.isna().tolist() == [False, False, False, True, True]
+    assert detect_date_formats(dates)['formats'] == ['%Y-%m-%d', '%Y/%m/%d']
+
+
+def test_day_first_detected_from_unambiguous_values():
+    parser = DateParser()
+    assert parser.parse(pd.Series(['25/12/2023', '05/06/2024'])).tolist() == [
+        pd.Timestamp('2023-12-25'), pd.Timestamp('2024-06-05')]
+    # Without evidence the pandas month-first default applies
+    assert parser.parse(pd.Series(['05/06/2024'])).tolist() == [pd.Timestamp('2024-05-06')]
+
+
+def test_matches_pandas_mixed_parsing_and_keeps_index():
+    values = ['2024-01-15 09:30:00', '2024/02/01', '03/04/2024', 'Jan 5 2024'] * 50
+    series = pd.Series(values, index=range(100, 300), name='date')
+    parsed = parse_dates(series)
+
+    expected = pd.to_datetime(series, format='mixed', dayfirst=False)
+    pd.testing.assert_series_equal(parsed, expected)
+
+
+def test_datetime_columns_pass_through():
+    dates = pd.Series(pd.date_range('2024-01-01', periods=3))
+    assert parse_dates(dates) is dates
+
+
+def test_strings_cached_by_another_thread_mid_lookup_still_parse():
+    class RacingCache(dict):
+        """Another thread caches each string right after this parse misses it"""
+        def get(self, key, default=None):
+            value = super().get(key, default)
+            if key not in self:
+                self[key] = pd.Timestamp('2024-03-01').to_datetime64()
+            return value
+
+    parser = DateParser()
+    parser._cache[False] = RacingCache()
+    assert parser.parse(pd.Series(['2024-03-01']), dayfirst=False).tolist() == [pd.Timestamp('2024-03-01')]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the forecast model cache
+"""
+
+import numpy as np
+import pandas as pd
+
+from forecast_cache import ForecastModelCache
+from result_cache import ResultCache
+
+
+def daily_series(days):
+    dates = pd.date_range('2024-01-01', periods=days, freq='D').to_numpy()
+    values = 100 + np.arange(days, dtype=float)
+    return dates, values
+
+
+def test_lookup_serves_identical_series_and_warm_starts_short_appends():
+    cache = ForecastModelCache(ResultCache(), warm_start_max_days=7)
+    dates, values = daily_series(60)
+    assert cache.lookup('sales', 'holt_winters', dates[:50], values[:50]) == ('refit', None)
+
+    cache.store('sales', 'holt_winters', dates[:50], values[:50], {'alpha': 0.3}, {'summary': 'fit'})
+    mode, entry = cache.lookup('sales', 'holt_winters', dates[:50], values[:50])
+    assert mode == 'cache' and entry['result'] == {'summary': 'fit'}
+
+    mode, entry = cache.lookup('sales', 'holt_winters', dates[:55], values[:55])
+    assert mode == 'warm_start' and entry['parameters'] == {'alpha': 0.3}
+
+    # Too many new days, a revised history, another backend or an unknown series all refit
+    assert cache.lookup('sales', 'holt_winters', dates, values)[0] == 'refit'
+    revised = values[:55].copy()
+    revised[10] += 1
+    assert cache.lookup('sales', 'holt_winters', dates[:55], revised)[0] == 'refit'
+    assert cache.lookup('sales', 'prophet', dates[:55], values[:55])[0] == 'refit'
+    assert cache.lookup(None, 'holt_winters', dates[:55], values[:55])[0] == 'refit'
+
+
+def test_code_version_invalidates_fits_and_warm_starts():
+    store = ResultCache()
+    dates, values = daily_series(50)
+    ForecastModelCache(store, version='v1').store('sales', 'holt_winters', dates, values, {'alpha': 0.3}, {})
+
+    cache = ForecastModelCache(store, version='v2')
+    assert cache.lookup('sales', 'holt_winters', dates, values)[0] == 'refit'
+    dates, values = daily_series(52)
+    assert cache.lookup('sales', 'holt_winters', dates, values)[0] == 'refit'
+
+
+def test_failed_holt_winters_warm_start_refits(monkeypatch):
+    import advanced_analytics
+    from advanced_analytics import AdvancedAnalytics
+    from sales_dataset import SalesDataset
+
+    dates, values = daily_series(60)
+    engine = AdvancedAnalytics(SalesDataset.from_frame(pd.DataFrame({'product': 'Lamp', 'quantity': 1,
+                                                                     'price': values, 'date': dates})))
+    engine.model_cache = ForecastModelCache(ResultCache())
+    monkeypatch.setattr(engine, '_forecast_model', lambda *args: ('warm_start', {'parameters': {'alpha': 0.3}}))
+    fit = advanced_analytics.holt_winters
+
+    def holt_winters(series, horizon=30, initial=None):
+        if initial is not None:
+            raise ValueError('incompatible parameters')
+        return fit(series, horizon=horizon)
+
+    monkeypatch.setattr(advanced_analytics, 'holt_winters', holt_winters)
+    result = engine._holt_winters_forecast(engine.cube.daily_revenue().reset_index())
+    assert result['forecast_source'] == 'refit' and 'fallback' not in result
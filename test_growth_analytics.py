@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the grouped Growth Analytics kernels
+"""
+
+import numpy as np
+import pandas as pd
+
+from growth_analytics import GrowthAnalytics, flag_anomalies, fit_trends, trend_intervals
+from sales_dataset import SalesDataset
+
+
+def create_series_data():
+    """Products with known daily revenue series"""
+    series = {
+        'Rising': [10, 10, 10, 20, 30, 40],
+        'Flat': [10, 11, 9, 10, 10, 10, 11, 9, 10, 10, 10, 10],
+        'Falling': [40, 30, 20, 10],
+        'New': [5, 5],
+    }
+    rows = []
+    for product, revenues in series.items():
+        for day, revenue in enumerate(revenues):
+            rows.append({'product': product, 'quantity': 1, 'price': revenue,
+                         'date': pd.Timestamp('2024-01-01') + pd.Timedelta(days=day)})
+    rows.append({'product': np.nan, 'quantity': 1, 'price': 3.0, 'date': pd.Timestamp('2024-01-01')})
+    df = pd.DataFrame(rows).sample(frac=1, random_state=3).reset_index(drop=True)
+    df['revenue'] = df['quantity'] * df['price']
+    return df
+
+
+def test_product_lifecycle_stages():
+    df = create_series_data()
+    lifecycle = GrowthAnalytics(SalesDataset.from_frame(df)).detect_product_lifecycle()
+
+    by_product = {item['product']: item for item in lifecycle}
+    assert [item['product'] for item in lifecycle] == [str(p) for p in pd.unique(df['product'])]
+    assert {p: by_product[p]['stage'] for p in ['Rising', 'Flat', 'Falling', 'New', 'nan']} == {
+        'Rising': 'Growth', 'Flat': 'Mature', 'Falling': 'Decline', 'New': 'Launch', 'nan': 'Launch'}
+    assert by_product['Flat']['confidence'] == 'High' and by_product['Falling']['confidence'] == 'Medium'
+    assert by_product['Rising']['trend_value'] == (30 - 10) / 10
+    assert by_product['Rising']['total_revenue'] == 120
+    assert by_product['Falling']['daily_slope'] == -10.0 and by_product['Falling']['r_squared'] == 1.0
+    assert by_product['Rising']['daily_slope'] > 0
+
+
+def test_anomalies_are_ranked_by_deviation():
+    values = {'Steady': [10, 11, 9, 10, 12, 10, 40], 'Volatile': [100, 95, 105, 100, 98, 300, 5]}
+    index = pd.MultiIndex.from_tuples(
+        [(product, pd.Timestamp('2024-01-01') + pd.Timedelta(days=day))
+         for product, series in values.items() for day in range(len(series))], names=['product', 'date'])
+    daily_sales = pd.Series([v for series in values.values() for v in series], index=index, dtype=float)
+
+    flagged = flag_anomalies(daily_sales, top_n=None)
+
+    assert list(zip(flagged['product'], flagged['value'])) == [('Steady', 40.0), ('Volatile', 300.0), ('Volatile', 5.0)]
+    assert flagged['median'].tolist() == [10.0, 100.0, 100.0]
+    assert flagged['deviation_percent'].iloc[0] == 300.0
+    assert len(flag_anomalies(daily_sales, top_n=2)) == 2
+
+
+def test_detect_anomalies_reports_top_n():
+    df = create_series_data()
+    df.loc[len(df)] = {'product': 'Flat', 'quantity': 1, 'price': 500.0,
+                       'date': pd.Timestamp('2024-02-01'), 'revenue': 500.0}
+    analytics = GrowthAnalytics(SalesDataset.from_frame(df))
+
+    anomalies = analytics.detect_anomalies()
+    assert anomalies[0]['product'] == 'Flat' and anomalies[0]['type'] == 'spike'
+    assert anomalies[0]['severity'] == 'high' and anomalies[0]['value'] == 500.0
+    assert len(analytics.detect_anomalies(top_n=1)) == 1
+
+
+def test_fit_trends_matches_per_series_least_squares():
+    rng = np.random.default_rng(5)
+    series = [(np.arange(8.0), 3 + 2 * np.arange(8.0) + rng.normal(0, 1, 8)),
+              (np.array([0.0, 2.0, 5.0, 6.0]), np.array([9.0, 7.0, 4.0, 1.0])),
+              (np.arange(5.0), 1 + 0.5 * np.arange(5.0)),
+              (np.array([3.0]), np.array([4.0]))]
+    x, y = np.concatenate([s[0] for s in series]), np.concatenate([s[1] for s in series])
+    ends = np.cumsum([len(s[0]) for s in series])
+    fit = fit_trends(x, y, ends - [len(s[0]) for s in series], ends)
+
+    for (sx, sy), (_, row) in zip(series[:3], fit.iterrows()):
+        slope, intercept = np.polyfit(sx, sy, 1)
+        assert np.isclose(row['slope'], slope) and np.isclose(row['intercept'], intercept)
+        assert np.isclose(row['r_squared'], np.corrcoef(sx, sy)[0, 1] ** 2)
+    assert np.isclose(fit['residual_std'].iloc[2], 0) and fit['r_squared'].iloc[2] == 1.0
+    assert fit['slope'].iloc[3] == 0 and fit['intercept'].iloc[3] == 4 and np.isnan(fit['residual_std'].iloc[3])
+
+
+def test_trend_intervals_use_the_t_distribution():
+    x = np.arange(5.0)
+    y = np.array([1.0, 3.0, 2.0, 5.0, 4.0])
+    fit = fit_trends(x, y, np.array([0]), np.array([5]))
+    prediction, lower, upper = trend_intervals(fit, [2.0, 6.0])
+
+    row = fit.iloc[0]
+    assert np.allclose(prediction[0], row['intercept'] + row['slope'] * np.array([2.0, 6.0]))
+    # t(0.975, 3 dof) = 3.1824; standard error of a new observation at x = x_mean
+    expected = 3.1824 * row['residual_std'] * np.sqrt(1 + 1 / 5)
+    assert np.isclose(upper[0, 0] - prediction[0, 0], expected, rtol=2e-3)
+    assert (upper[0, 1] - lower[0, 1]) > (upper[0, 0] - lower[0, 0])
+
+
+def test_revenue_trend_reports_fit_quality():
+    df = create_series_data()
+    result = GrowthAnalytics(SalesDataset.from_frame(df)).predict_revenue_trend()
+    assert 0 <= result['r_squared'] <= 1
+    assert [trace.get('name') for trace in result['chart']['data']] == [
+        'Actual Revenue', 'Predicted Revenue', None, '95% Prediction Interval']
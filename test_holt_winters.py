@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized Holt-Winters kernel
+"""
+
+import numpy as np
+
+from holt_winters import holt_winters, smooth, initial_states, left_align
+
+
+def reference_smooth(y, alpha, beta, gamma, level, trend, season):
+    """One series through the statsmodels ExponentialSmoothing recursions, step by step"""
+    season = list(season)
+    sse = 0.0
+    for t, value in enumerate(y):
+        s = season[t % 7]
+        sse += (value - level - trend - s) ** 2
+        new_level = alpha * (value - s) + (1 - alpha) * (level + trend)
+        new_trend = beta * (new_level - level) + (1 - beta) * trend
+        season[t % 7] = gamma * (value - level - trend) + (1 - gamma) * s
+        level, trend = new_level, new_trend
+    return sse, level, trend
+
+
+def test_smooth_matches_the_per_series_recursions():
+    rng = np.random.default_rng(2)
+    series = [100 + rng.normal(0, 10, n) for n in (40, 25, 9)]
+    values, lengths = left_align(series)
+    alpha = np.array([[0.3], [0.7]])
+    beta = np.array([[0.1], [0.0]])
+    gamma = np.array([[0.2], [0.5]])
+    result = smooth(values, lengths, alpha, beta, gamma)
+    level0, trend0, season0, seasonal = initial_states(values, lengths)
+    assert seasonal.tolist() == [True, True, False]
+
+    for candidate in range(2):
+        for row, y in enumerate(series):
+            g = gamma[candidate, 0] if seasonal[row] else 0.0
+            sse, level, trend = reference_smooth(y, alpha[candidate, 0], beta[candidate, 0], g,
+                                                 level0[row], trend0[row], season0[row])
+            np.testing.assert_allclose(result['sse'][candidate, row], sse)
+            np.testing.assert_allclose(result['level'][candidate, row], level)
+            np.testing.assert_allclose(result['trend'][candidate, row], trend)
+
+
+def test_trend_and_weekly_season_are_extrapolated():
+    t = np.arange(140)
+    weekly = np.array([0, 5, 10, 5, 0, -10, -10])
+    rng = np.random.default_rng(4)
+    series = [200 + 0.5 * t + weekly[t % 7] + rng.normal(0, 0.5, 140), 50 - 0.1 * t[:10]]
+    fit = holt_winters(series, horizon=14)
+
+    future = np.arange(140, 154)
+    np.testing.assert_allclose(fit['forecast'][0], 200 + 0.5 * future + weekly[future % 7], atol=2)
+    np.testing.assert_allclose(fit['forecast'][1], 50 - 0.1 * np.arange(10, 24), atol=0.1)
+    assert fit['gamma'][1] == 0
+    width = fit['upper'][0] - fit['lower'][0]
+    assert (np.diff(width) >= 0).all() and (fit['lower'][0] < fit['forecast'][0]).all()
+
+
+def test_warm_start_refines_around_previous_parameters():
+    rng = np.random.default_rng(5)
+    t = np.arange(120)
+    y = 200 + 0.5 * t + 20 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 5, len(t))
+    cold = holt_winters([y[:-3]])
+    previous = {name: cold[name] for name in ['alpha', 'beta', 'gamma']}
+    warm = holt_winters([y], initial=previous)
+
+    for name, step in [('alpha', 0.075), ('beta', 0.025), ('gamma', 0.05)]:
+        assert abs(warm[name][0] - previous[name][0]) <= step + 1e-12
+    assert np.allclose(warm['forecast'], holt_winters([y])['forecast'], rtol=0.05)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for upload ingestion
+"""
+
+import numpy as np
+import pandas as pd
+
+from column_mapper import ColumnMapper
+from data_store import load_dataset
+import ingest
+from aggregate_cube import AggregateCube, CUBE_TABLES
+from sales_dataset import SalesDataset
+from ingest import stream_csv_to_dataset, parallel_csv_to_dataset, sniff_excel_sheet, read_excel_upload
+
+
+def test_streaming_ingest_matches_in_memory_mapping(tmp_path):
+    rows = 250
+    raw = pd.DataFrame({
+        'Product Name': [f'SKU-{i % 7}' for i in range(rows)],
+        'Qty': np.arange(rows) % 5 + 1,
+        'Unit Price': np.round(np.linspace(1, 50, rows), 2),
+        'Order Date': pd.date_range('2024-01-01', periods=rows, freq='D').strftime('%Y-%m-%d'),
+    })
+    csv_path = tmp_path / 'export.csv'
+    raw.to_csv(csv_path, index=False)
+
+    mapper = ColumnMapper()
+    result = stream_csv_to_dataset(str(csv_path), str(tmp_path / 'export_processed'), mapper, chunk_rows=40)
+    expected = mapper.apply_mapping(pd.read_csv(csv_path), result['mapping'])
+
+    assert result['meta']['rows'] == rows
+    pd.testing.assert_frame_equal(load_dataset(str(tmp_path / 'export_processed')), expected.reset_index(drop=True))
+
+
+def test_streaming_ingest_keeps_text_that_follows_numeric_chunks(tmp_path):
+    rows = 600
+    raw = pd.DataFrame({
+        'Product Name': [f'SKU-{i % 7}' for i in range(rows)],
+        'Customer ID': [str(1000 + i) if i < 300 else f'C-{i}' for i in range(rows)],
+        'Qty': np.arange(rows) % 5 + 1,
+        'Unit Price': np.round(np.linspace(1, 50, rows), 2),
+        'Order Date': pd.date_range('2024-01-01', periods=rows, freq='D').strftime('%Y-%m-%d'),
+    })
+    csv_path = tmp_path / 'export.csv'
+    raw.to_csv(csv_path, index=False)
+
+    stream_csv_to_dataset(str(csv_path), str(tmp_path / 'export_processed'), ColumnMapper(), chunk_rows=200)
+    stored = load_dataset(str(tmp_path / 'export_processed'))
+
+    assert stored['Customer ID'].tolist() == raw['Customer ID'].tolist()
+
+
+def test_streaming_ingest_stores_the_cube_from_chunk_aggregates(tmp_path, monkeypatch):
+    rows = 600
+    raw = pd.DataFrame({
+        'Product Name': [f'SKU-{i % 7}' for i in range(rows)],
+        # Numeric customer ids in the first chunks, text ones mixed in later
+        'Customer ID': [str(1000 + i % 40) if i < 300 or i % 2 else f'C-{i % 40}' for i in range(rows)],
+        'Qty': np.arange(rows) % 5 + 1,
+        'Unit Price': np.round(np.linspace(1, 50, rows), 2),
+        'Order Date': pd.date_range('2024-01-01', periods=rows, freq='6h').strftime('%Y-%m-%d %H:%M:%S'),
+    })
+    csv_path = tmp_path / 'export.csv'
+    raw.to_csv(csv_path, index=False)
+    monkeypatch.setattr(ingest, 'CUBE_PARTIALS', 3)
+    build = AggregateCube.build
+
+    def chunk_build(dataset, row_offset=0):
+        # Only chunks are aggregated, never the stored dataset as a whole
+        assert len(dataset) <= 50
+        return build(dataset, row_offset)
+
+    monkeypatch.setattr(AggregateCube, 'build', chunk_build)
+
+    path = str(tmp_path / 'export_processed')
+    result = stream_csv_to_dataset(str(csv_path), path, ColumnMapper(), chunk_rows=50)
+    stored = AggregateCube.load(path, result['meta']['content_hash'])
+    monkeypatch.undo()
+    rebuilt = AggregateCube.build(SalesDataset.load(path))
+
+    for name in CUBE_TABLES:
+        pd.testing.assert_frame_equal(getattr(stored, name), getattr(rebuilt, name), check_dtype=False)
+
+
+def test_parallel_ingest_writes_ranges_in_file_order(tmp_path):
+    rows = 400
+    raw = pd.DataFrame({
+        'Product Name': [f'SKU-{i % 7}' for i in range(rows)],
+        'Qty': np.arange(rows) % 5 + 1,
+        'Unit Price': np.round(np.linspace(1, 50, rows), 2),
+        'Order Date': pd.date_range('2024-01-01', periods=rows, freq='D').strftime('%Y-%m-%d'),
+    })
+    csv_path = tmp_path / 'export.csv'
+    raw.to_csv(csv_path, index=False)
+
+    # Many more ranges than the in-flight window of two workers
+    mapper = ColumnMapper()
+    parallel_csv_to_dataset(str(csv_path), str(tmp_path / 'parallel'), mapper, workers=2, range_bytes=512)
+    stream_csv_to_dataset(str(csv_path), str(tmp_path / 'stream'), mapper)
+    pd.testing.assert_frame_equal(load_dataset(str(tmp_path / 'parallel')), load_dataset(str(tmp_path / 'stream')))
+
+
+def test_excel_sniffing_picks_sales_sheet(tmp_path):
+    path = str(tmp_path / 'workbook.xlsx')
+    sales = pd.DataFrame({
+        'Item': [f'SKU-{i}' for i in range(10)],
+        'Quantity': range(10),
+        'Price': [9.99] * 10,
+        'Date': pd.date_range('2024-01-01', periods=10),
+    })
+    lookup = pd.DataFrame({'code': range(50), 'label': [f'L{i}' for i in range(50)]})
+    with pd.ExcelWriter(path) as writer:
+        lookup.to_excel(writer, sheet_name='Lookup', index=False)
+        sales.to_excel(writer, sheet_name='Orders', index=False)
+
+    assert sniff_excel_sheet(path) == ('Orders', 0)
+    pd.testing.assert_frame_equal(read_excel_upload(path), sales)
+
+
+def test_excel_sniffing_reads_blank_headers_without_header_row(tmp_path):
+    path = str(tmp_path / 'report.xlsx')
+    body = pd.DataFrame([
+        ['Sales report', None, None, None],
+        ['Product', 'Quantity', 'Price', 'Date'],
+    ] + [[f'SKU-{i}', i, 1.5, '2024-01-01'] for i in range(8)])
+    body.to_excel(path, sheet_name='Report', index=False, header=False)
+
+    sheet_name, header = sniff_excel_sheet(path)
+    assert (sheet_name, header) == ('Report', None)
+    assert read_excel_upload(path).shape == (10, 4)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the analytics result cache
+"""
+
+import os
+import sys
+import time
+
+import result_cache
+from result_cache import ResultCache, cache_key, code_version
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    directory = str(tmp_path / 'cache')
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'revenue': [1.0, 2.0]}
+
+    cache = ResultCache(directory=directory)
+    key = cache_key('abc123', 'GrowthAnalytics.get_top_products', {}, 'v1')
+    assert cache.get_or_compute(key, compute) == {'revenue': [1.0, 2.0]}
+    assert cache.get_or_compute(key, compute) == {'revenue': [1.0, 2.0]}
+    assert len(calls) == 1
+
+    # A fresh process only has the disk tier
+    restarted = ResultCache(directory=directory)
+    assert restarted.get(key) == {'revenue': [1.0, 2.0]}
+    assert restarted.stats()['disk_hits'] == 1
+
+
+def test_key_covers_params_and_code_version():
+    base = cache_key('abc123', 'AdvancedAnalytics.smart_forecast', {'days': 30}, 'v1')
+
+    assert base == cache_key('abc123', 'AdvancedAnalytics.smart_forecast', {'days': 30}, 'v1')
+    assert base != cache_key('abc123', 'AdvancedAnalytics.smart_forecast', {'days': 60}, 'v1')
+    assert base != cache_key('abc123', 'AdvancedAnalytics.smart_forecast', {'days': 30}, 'v2')
+    assert base != cache_key('def456', 'AdvancedAnalytics.smart_forecast', {'days': 30}, 'v1')
+
+
+def test_code_version_covers_imported_local_modules(tmp_path, monkeypatch):
+    (tmp_path / 'cv_helper.py').write_text('def scale(x):\n    return x * 2\n')
+    (tmp_path / 'cv_engine.py').write_text('from cv_helper import scale\n\nclass Engine:\n    pass\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(result_cache, '_code_versions', {})
+    import cv_engine
+    before = code_version(cv_engine.Engine)
+
+    # Changing only the helper the engine imports changes the engine's version
+    (tmp_path / 'cv_helper.py').write_text('def scale(x):\n    return x * 3\n')
+    result_cache._code_versions.clear()
+    assert code_version(cv_engine.Engine) != before
+    for name in ('cv_engine', 'cv_helper'):
+        sys.modules.pop(name, None)
+
+
+def test_ttl_expiry(tmp_path):
+    cache = ResultCache(directory=str(tmp_path), ttl=60)
+    cache.set('k', 1)
+    old = time.time() - 120
+    os.utime(os.path.join(str(tmp_path), 'k.pkl'), (old, old))
+
+    assert ResultCache(directory=str(tmp_path), ttl=60).get('k') is None
+
+
+def test_size_eviction(tmp_path):
+    payload = 'x' * 1000
+    cache = ResultCache(directory=str(tmp_path), max_memory_bytes=2500, max_disk_bytes=2500)
+    for key in ['a', 'b', 'c']:
+        cache.set(key, payload)
+
+    stats = cache.stats()
+    assert stats['memory_entries'] == 2 and stats['disk_bytes'] <= 2500
+    assert cache.get('a') is None
+    assert cache.get('c') == payload
+
+
+def test_fallback_results_are_not_cached(tmp_path):
+    cache = ResultCache(directory=str(tmp_path))
+    calls = []
+
+    def failing():
+        calls.append(1)
+        return {'fallback': True, 'forecast': [0.0]}
+
+    cache.get_or_compute('k', failing)
+    cache.get_or_compute('k', failing)
+    cache.get_or_compute('rows', lambda: [{'fallback': True}, {'fallback': True}])
+
+    assert len(calls) == 2
+    assert cache.get('k') is None and cache.get('rows') is None
+    assert cache.get_or_compute('k', lambda: {'forecast': [1.0]}) == cache.get('k')
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Tests for the analytics routes
+"""
+
+import io
+import os
+import sys
+import json
+import subprocess
+import time
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+
+os.environ.setdefault('ANALYTICS_CACHE_DIR', tempfile.mkdtemp(prefix='sda_test_cache_'))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import app
+import routes
+from growth_analytics import GrowthAnalytics
+from result_cache import ResultCache
+from forecast_cache import ForecastModelCache
+from sales_dataset import SalesDataset, append_to_dataset
+from test_sales_dataset import create_processed_data
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = str(tmp_path / 'sales_processed')
+    SalesDataset.from_frame(create_processed_data()).save(path)
+    monkeypatch.setattr(routes, 'result_cache', ResultCache())
+    monkeypatch.setattr(routes, 'forecast_model_cache', ForecastModelCache(ResultCache()))
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['filepath'] = path
+    return client
+
+
+def test_fields_select_sections(client):
+    data = client.get('/growth-analytics?fields=top_products,seasonality').get_json()
+    assert set(data) == {'top_products', 'seasonality'}
+
+    response = client.get('/growth-analytics?fields=top_products,unknown')
+    assert response.status_code == 400
+    assert 'unknown' in response.get_json()['message']
+
+
+def test_slow_section_times_out_without_holding_up_the_rest(client, monkeypatch):
+    def detect_product_lifecycle(self):
+        time.sleep(1.0)
+        return []
+
+    monkeypatch.setattr(GrowthAnalytics, 'detect_product_lifecycle', detect_product_lifecycle)
+    monkeypatch.setitem(app.config, 'ANALYTICS_SECTION_TIMEOUT', 0.3)
+
+    start = time.perf_counter()
+    data = client.get('/growth-analytics?fields=product_lifecycle,top_products').get_json()
+
+    assert time.perf_counter() - start < 1.0
+    assert data['product_lifecycle']['timed_out']
+    assert len(data['top_products']['products']) == 3
+
+
+def test_section_budget_starts_when_the_section_starts(client, monkeypatch):
+    def detect_product_lifecycle(self):
+        time.sleep(0.25)
+        return []
+
+    def detect_anomalies(self):
+        time.sleep(0.25)
+        return []
+
+    monkeypatch.setattr(GrowthAnalytics, 'detect_product_lifecycle', detect_product_lifecycle)
+    monkeypatch.setattr(GrowthAnalytics, 'detect_anomalies', detect_anomalies)
+    monkeypatch.setattr(routes, 'section_pool', ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setitem(app.config, 'ANALYTICS_SECTION_TIMEOUT', 0.35)
+
+    # The second section waits 0.25s in the queue, but only runs for 0.25s
+    data = client.get('/growth-analytics?fields=product_lifecycle,anomalies').get_json()
+    assert data == {'product_lifecycle': [], 'anomalies': []}
+
+
+def test_segmentation_is_cached_per_sampling_setting(client, monkeypatch):
+    monkeypatch.setattr(routes, 'backtest_scores', lambda dataset: None)
+
+    def segmentation():
+        return client.get('/advanced-analytics?fields=customer_segmentation').get_json()['customer_segmentation']
+
+    segmentation()
+    monkeypatch.setitem(app.config, 'SEGMENTATION_EXACT_LIMIT', 1)
+    monkeypatch.setitem(app.config, 'SEGMENTATION_SAMPLE_SIZE', 10)
+    segmentation()
+    segmentation()
+
+    assert routes.result_cache.stats()['misses'] == 2
+
+
+def read_events(response):
+    """(event, payload) pairs of a Server-Sent Events response"""
+    events = []
+    for message in response.get_data(as_text=True).strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in message.split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_stream_emits_sections_as_they_finish(client, monkeypatch):
+    def detect_product_lifecycle(self):
+        time.sleep(0.3)
+        return []
+
+    monkeypatch.setattr(GrowthAnalytics, 'detect_product_lifecycle', detect_product_lifecycle)
+    response = client.get('/growth-analytics/stream?fields=product_lifecycle,top_products')
+    assert response.mimetype == 'text/event-stream'
+
+    events = read_events(response)
+    assert [event for event, _ in events] == ['section', 'section', 'done']
+    assert [payload['name'] for _, payload in events[:2]] == ['top_products', 'product_lifecycle']
+    assert events[0][1]['data'] == client.get('/growth-analytics?fields=top_products').get_json()['top_products']
+    assert events[2][1]['sections'] == ['product_lifecycle', 'top_products']
+
+
+def test_stream_reports_failed_section_without_failing_the_rest(client, monkeypatch):
+    def detect_anomalies(self):
+        raise ValueError('Not enough history')
+
+    monkeypatch.setattr(GrowthAnalytics, 'detect_anomalies', detect_anomalies)
+    events = dict((payload['name'], payload['data'])
+                  for event, payload in read_events(client.get('/growth-analytics/stream?fields=anomalies,seasonality'))
+                  if event == 'section')
+
+    assert events['anomalies'] == {'error': 'Data validation failed', 'failed': True, 'message': 'Not enough history'}
+    assert 'failed' not in events['seasonality']
+    assert client.get('/growth-analytics/stream?fields=unknown').status_code == 400
+
+
+def test_batch_forecast_is_queryable_per_product(client):
+    assert client.get('/batch-forecast?backend=linear').status_code == 404
+
+    response = client.post('/batch-forecast', json={'backend': 'linear', 'horizon': 10})
+    assert response.status_code == 202
+    for future in list(routes.forecast_runs.values()):
+        future.result(timeout=30)
+
+    status = client.get('/batch-forecast?backend=linear').get_json()
+    assert status['state'] == 'complete' and status['series'] == 4
+    assert {result['product'] for result in status['results']} == {'Laptop', 'Mouse', 'Monitor', 'Desk'}
+    assert client.post('/batch-forecast', json={'backend': 'linear', 'horizon': 10}).status_code == 200
+
+    forecast = client.get('/batch-forecast/series?backend=linear&product=Desk').get_json()
+    assert forecast['status'] == 'ok' and len(forecast['dates']) == len(forecast['forecast']) == 10
+    assert forecast['chart']['data'][0]['name'] == 'Historical Sales'
+    assert client.get('/batch-forecast/series?backend=linear&product=Chair').status_code == 404
+    assert client.get('/batch-forecast?backend=unknown').status_code == 400
+
+
+def test_forecast_is_reused_and_warm_started_after_an_append(client, monkeypatch):
+    # Keep the default model; backtest scores landing in between could pick another one
+    monkeypatch.setattr(routes, 'backtest_scores', lambda dataset: None)
+
+    def forecast_source():
+        return client.get('/advanced-analytics?fields=forecast').get_json()['forecast']['forecast_source']
+
+    assert forecast_source() == 'refit'
+    assert forecast_source() == 'cache'
+
+    with client.session_transaction() as sess:
+        path = sess['filepath']
+    new_days = create_processed_data(30)
+    new_days['date'] = pd.Timestamp('2024-05-01') + pd.to_timedelta(np.arange(30) % 3, unit='D')
+    append_to_dataset(path, new_days)
+    assert forecast_source() == 'warm_start'
+    assert forecast_source() == 'cache'
+
+
+def test_append_reads_ambiguous_dates_in_the_first_upload_order(client, tmp_path):
+    with client.session_transaction() as sess:
+        path = sess['filepath']
+        sess['column_mapping'] = {'product': 'Item', 'quantity': 'Qty', 'price': 'Price', 'date': 'Day'}
+        sess['date_dayfirst'] = True
+        sess['filename'] = 'sales.csv'
+    export = 'Item,Qty,Price,Day\nLamp,2,10.0,03/04/2024\nLamp,1,10.0,05/06/2024\n'
+    response = client.post('/upload', data={'upload_mode': 'append',
+                                            'file': (io.BytesIO(export.encode()), 'export.csv')})
+    assert response.status_code == 302
+
+    stored = SalesDataset.load(path).base
+    lamp = stored[stored['product'] == 'Lamp']
+    assert sorted(lamp['date'].dt.strftime('%Y-%m-%d')) == ['2024-04-03', '2024-06-05']
+
+
+def test_backtest_runs_in_the_background_and_picks_the_forecast_model(client):
+    response = client.get('/forecast-accuracy')
+    assert response.status_code == 202
+    for future in list(routes.backtest_runs.values()):
+        future.result(timeout=30)
+
+    scores = client.get('/forecast-accuracy').get_json()
+    assert scores['state'] == 'complete'
+    assert set(scores['models']) == {'linear', 'holt_winters'}
+    best = scores['best_model']
+
+    data = client.get('/growth-analytics?fields=revenue_prediction').get_json()['revenue_prediction']
+    assert data['prediction_accuracy'] == scores['trend']['accuracy']
+    assert data['backtest']['best_model'] == best
+    forecast = client.get('/advanced-analytics?fields=forecast').get_json()['forecast']
+    assert forecast['model'] == best
+    assert forecast['accuracy']['mae'] == scores['models'][best]['mae']
+
+
+def test_backtest_starts_once_and_finished_runs_are_dropped(client, monkeypatch):
+    submitted = []
+
+    class Pool:
+        def submit(self, fn, dataset, key):
+            future = Future()
+            submitted.append((key, future))
+            return future
+
+    monkeypatch.setattr(routes, 'backtest_pool', Pool())
+    monkeypatch.setattr(routes, 'backtest_runs', {})
+    with client.session_transaction() as sess:
+        dataset = SalesDataset.load(sess['filepath'])
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert set(executor.map(lambda _: routes.backtest_scores(dataset), range(16))) == {None}
+    assert len(submitted) == 1
+
+    submitted[0][1].set_result({})
+    other = SalesDataset.from_frame(create_processed_data(50), content_hash='other')
+    routes.backtest_scores(other)
+    assert list(routes.backtest_runs) == [routes.backtest_key(other)]
+
+
+def test_app_import_leaves_heavy_dependencies_unloaded():
+    code = "import sys, app, routes; print('eager:', [m for m in routes.LAZY_MODULES if m in sys.modules])"
+    child = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                           capture_output=True, text=True, check=True)
+    assert child.stdout.strip().splitlines()[-1] == 'eager: []'